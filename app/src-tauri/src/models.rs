@@ -9,6 +9,8 @@ pub struct Action {
     pub volume_change: Option<i32>,
     pub second_app: Option<String>,
     pub monitor_action: Option<String>,
+    pub depends_on: Option<Vec<usize>>,
+    pub timeout_seconds: Option<f64>,
 }
 
 #[derive(Debug, Serialize, Deserialize, Clone)]
@@ -16,6 +18,7 @@ pub struct ExecutionPlan {
     pub name: String,
     pub actions: Vec<Action>,
     pub run_on_startup: Option<bool>,
+    pub timeout_seconds: Option<f64>,
 }
 
 #[derive(Debug, Serialize, Deserialize, Clone)]
@@ -33,6 +36,8 @@ pub struct CustomApp {
 #[derive(Debug, Serialize, Deserialize)]
 pub struct Settings {
     pub wake_phrase: String,
+    #[serde(default)]
+    pub wake_aliases: Vec<String>,
     pub execution_plans: Vec<ExecutionPlan>,
     pub chrome_profiles: Vec<ChromeProfile>,
     pub custom_apps: Vec<CustomApp>,
@@ -44,12 +49,16 @@ pub struct Settings {
     pub openai_api_key: Option<String>,
     #[serde(default)]
     pub openai_base_url: Option<String>,
+    /// Keys only read by the Python assistant, kept as-is on save
+    #[serde(flatten)]
+    pub extra: serde_json::Map<String, serde_json::Value>,
 }
 
 impl Default for Settings {
     fn default() -> Self {
         Self {
             wake_phrase: "ola jarvis".to_string(),
+            wake_aliases: Vec::new(),
             execution_plans: Vec::new(),
             chrome_profiles: Vec::new(),
             custom_apps: Vec::new(),
@@ -57,6 +66,7 @@ impl Default for Settings {
             llm_model: None,
             openai_api_key: None,
             openai_base_url: None,
+            extra: serde_json::Map::new(),
         }
     }
 }
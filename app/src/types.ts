@@ -6,12 +6,15 @@ export interface Action {
   volume_change?: number
   second_app?: string
   monitor_action?: string
+  depends_on?: number[]
+  timeout_seconds?: number
 }
 
 export interface ExecutionPlan {
   name: string
   actions: Action[]
   run_on_startup?: boolean
+  timeout_seconds?: number
 }
 
 export interface ChromeProfile {
@@ -26,6 +29,7 @@ export interface CustomApp {
 
 export interface Settings {
   wake_phrase: string
+  wake_aliases?: string[]
   ahk_path: string
   execution_plans: ExecutionPlan[]
   chrome_profiles: ChromeProfile[]
@@ -1,38 +1,122 @@
 import speech_recognition as sr
-from typing import Optional
-from helpers import get_logger, get_root_path
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from helpers import get_logger, get_root_path, get_process_runner
 from utils import normalize_text
-import subprocess
-import time
-import difflib
+from audio_stream import MicrophoneStream, NoiseFloorEstimator
+from wake_matcher import WakeMatcher
+from speech_backends import GoogleBackend, RecognizerBackend
+from voice_activity import VoiceActivityDetector
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class WakeMatch:
+    """Result of a wake phrase detection."""
+    phrase: str
+    matched_text: str
+    start: int
+    end: int
+    command: str = ""
+
+
+class _NoiseFloorRecognizer(sr.Recognizer):
+    """
+    sr.Recognizer whose energy threshold is read live from a shared
+    NoiseFloorEstimator instead of being calibrated per call.
+    """
+
+    def __init__(self, noise_floor: NoiseFloorEstimator):
+        self._noise_floor = noise_floor
+        super().__init__()
+        self.dynamic_energy_threshold = False
+
+    @property
+    def energy_threshold(self) -> float:  # type: ignore[override]
+        return self._noise_floor.threshold
+
+    @energy_threshold.setter
+    def energy_threshold(self, value: float):
+        pass
+
+
 class Assistant:
-    def __init__(self, wake_phrase: str, language: str = "pt-BR"):
+    def __init__(self, wake_phrase: str, language: str = "pt-BR", wake_aliases: Optional[List[str]] = None,
+                 backend: Optional[RecognizerBackend] = None, stream: Optional[MicrophoneStream] = None):
         self.language = language
-        self.maximize_microphone_volume()
-        self._wake_phrase_norm: str = normalize_text(wake_phrase or "")
+        # Com um stream externo (ex.: replay de gravações) não mexe no volume do sistema
+        if stream is None:
+            self.maximize_microphone_volume()
+        self._wake_matcher = WakeMatcher([wake_phrase] + list(wake_aliases or []))
         self._wake_window_seconds: float = 2.5
         self._wake_cooldown_seconds: float = 1.5
         self._wake_buffer: str = ""
         self._wake_last_update: float = 0.0
         self._wake_last_trigger: float = 0.0
 
+        self._stream = stream or MicrophoneStream()
+        self._recognizer = _NoiseFloorRecognizer(self._stream.noise_floor)
+        self._backend = backend or GoogleBackend(self._recognizer)
+        self._vad = VoiceActivityDetector()
+        if not self._stream.start():
+            logger.warning(
+                "Microfone ainda não abriu; a captura seguirá tentando em segundo plano")
+
+    def stats(self) -> Dict[str, Any]:
+        """Voice activity counters and recognition payload figures."""
+        return {"vad": self._vad.stats(), "recognition": self._backend.stats()}
+
+    def audio_position(self) -> int:
+        """Absolute offset of the newest captured audio."""
+        return self._stream.position
+
+    def capture_lag(self) -> float:
+        """Seconds of captured audio not yet consumed by capture_segment."""
+        if not self._stream.bytes_per_second:
+            return 0.0
+        return (self._stream.position - self._stream.tell()) / self._stream.bytes_per_second
+
+    def set_echo_reference(self, reference: Optional[Callable[[], Optional[float]]],
+                           on_speech: Optional[Callable[[], None]] = None):
+        """
+        Ducks the echo of the notification cue out of the captured audio
+        while it plays and capture keeps running in parallel, keeping
+        whatever the user says over it.
+
+        Args:
+            reference (callable or None): Current cue level (NotificationCue.level).
+            on_speech (callable, optional): Called if the user starts talking
+                over the cue.
+        """
+        self._stream.set_echo_reference(reference, on_speech)
+
     def check_wake(self, chunk: Optional[str]) -> bool:
         """
         Verifica se a wake phrase foi dita, mesmo que dividida em múltiplos reconhecimentos.
         """
+        return self.detect_wake(chunk) is not None
+
+    def detect_wake(self, chunk: Optional[str]) -> Optional[WakeMatch]:
+        """
+        Same detection as check_wake, but returns where the wake phrase matched
+        and the command said right after it in the same breath.
+
+        Args:
+            chunk (str): Recognized text of one segment.
+
+        Returns:
+            WakeMatch or None: Match details, or None if the wake phrase was not said
+        """
         if not chunk:
-            return False
+            return None
 
-        now = time.time()
+        now = self._stream.clock()
         chunk_norm = normalize_text(chunk)
 
         # Evita re-disparo em sequência
         if now - self._wake_last_trigger < self._wake_cooldown_seconds:
-            return False
+            return None
 
         # Reinicia buffer se o último update foi há muito tempo
         if now - self._wake_last_update > self._wake_window_seconds:
@@ -44,53 +128,28 @@ class Assistant:
 
         self._wake_last_update = now
 
-        # 1) Checagem exata no buffer agregado
-        if self._wake_phrase_norm in self._wake_buffer:
-            self._wake_last_trigger = now
-            # Limpa buffer após detecção para evitar duplicação imediata
-            self._wake_buffer = ""
-            self._wake_last_update = 0.0
-            return True
-
-        # 2) Checagem fuzzy de similaridade (tolerância a pequenos erros de ASR)
-        phrase = self._wake_phrase_norm
-        phrase_len = len(phrase)
-        tokens_phrase = phrase.split()
-        token_count = len(tokens_phrase)
-        threshold = 0.84  # ajuste fino se necessário
-
-        def ratio(a: str, b: str) -> float:
-            return difflib.SequenceMatcher(None, a, b).ratio()
-
-        # Candidatos por tokens: últimas janelas com mesmo nº de tokens (±1)
-        buf_tokens = self._wake_buffer.split()
-        candidates = []
-        if buf_tokens:
-            if len(buf_tokens) >= token_count:
-                candidates.append(" ".join(buf_tokens[-token_count:]))
-            if len(buf_tokens) >= token_count + 1:
-                candidates.append(" ".join(buf_tokens[-(token_count + 1):]))
-
-        # Candidatos por caracteres: sufixo recente com folga
-        suffix = self._wake_buffer[-(phrase_len + 8):]
-        if suffix:
-            # janela deslizante simples ao tamanho da frase
-            if len(suffix) >= phrase_len:
-                for i in range(0, len(suffix) - phrase_len + 1):
-                    candidates.append(suffix[i:i + phrase_len])
-            else:
-                candidates.append(suffix)
-
-        for cand in candidates:
-            if ratio(phrase, cand) >= threshold:
-                self._wake_last_trigger = now
-                self._wake_buffer = ""
-                self._wake_last_update = 0.0
-                logger.debug(
-                    f"Wake phrase detectada por similaridade: cand='{cand}' ratio>={threshold}")
-                return True
-
-        return False
+        found = self._wake_matcher.find(self._wake_buffer)
+        if found is None:
+            return None
+
+        phrase, start, end = found
+        buffer = self._wake_buffer
+        # Não corta a última palavra do match ao separar o comando
+        word_end = buffer.find(" ", end)
+        end = len(buffer) if word_end < 0 else word_end
+        self._wake_last_trigger = now
+        # Limpa buffer após detecção para evitar duplicação imediata
+        self._wake_buffer = ""
+        self._wake_last_update = 0.0
+        logger.debug(
+            f"Wake phrase '{phrase}' detectada em '{buffer[start:end]}'")
+        return WakeMatch(
+            phrase=phrase,
+            matched_text=buffer[start:end],
+            start=start,
+            end=end,
+            command=buffer[end:].strip(),
+        )
 
     def listen(self) -> Optional[str]:
         """
@@ -99,63 +158,72 @@ class Assistant:
         Returns:
             str or None: Recognized text or None if failed
         """
-        r = sr.Recognizer()
+        logger.debug("Escutando entrada de voz...")
+        audio = self.capture_segment(timeout=3)
+        if audio is None:
+            return None
+        return self.transcribe(audio)
+
+    def listen_with_timeout(self, timeout_seconds: int = 10) -> Optional[str]:
+        """
+        Listen for speech input for up to timeout_seconds seconds and convert to text.
+        Returns recognized text or None if nothing is said within the window.
+        """
+        logger.debug(
+            f"Escutando entrada de voz (até {timeout_seconds} segundos)...")
+        audio = self.capture_segment(phrase_time_limit=timeout_seconds)
+        if audio is None:
+            return None
+        return self.transcribe(audio)
+
+    def capture_segment(self, timeout: Optional[float] = None,
+                        phrase_time_limit: Optional[float] = None) -> Optional[sr.AudioData]:
+        """
+        Reads the next spoken phrase from the capture stream, without recognizing it.
 
+        Args:
+            timeout (float, optional): Max seconds of audio to wait for a phrase to start.
+            phrase_time_limit (float, optional): Max phrase length in seconds.
+
+        Returns:
+            sr.AudioData or None: The phrase audio, or None on timeout or error
+        """
         try:
-            with sr.Microphone() as source:
-                r.energy_threshold = 100
-                r.adjust_for_ambient_noise(source, duration=1)
-                logger.debug("Escutando entrada de voz...")
-                audio = r.listen(source, timeout=3)
-
-                try:
-                    text = r.recognize_google(  # type: ignore
-                        audio, language=self.language)
-                    normalized_text = text.lower()
-                    logger.info(f"Fala reconhecida: '{text}'")
-                    return normalized_text
-                except sr.UnknownValueError:
-                    logger.debug(
-                        "Fala capturada mas não pôde ser compreendida")
-                    return None
-                except sr.RequestError as e:
-                    logger.exception(
-                        f"Erro do serviço Google Speech Recognition: {e}")
-                    return None
+            audio = self._recognizer.listen(self._stream.as_source(), timeout=timeout,
+                                            phrase_time_limit=phrase_time_limit)
+            return audio
         except sr.WaitTimeoutError:
             logger.debug("Nenhuma fala detectada, continuando a escutar...")
+            return None
         except Exception as e:
             logger.exception(f"Erro durante reconhecimento de voz: {e}")
             return None
 
-    def listen_with_timeout(self, timeout_seconds: int = 10) -> Optional[str]:
+    def transcribe(self, audio: sr.AudioData) -> Optional[str]:
         """
-        Listen for speech input for up to timeout_seconds seconds and convert to text.
-        Returns recognized text or None if nothing is said within the window.
+        Runs the voice activity gate and the recognizer backend on a phrase.
+
+        Returns:
+            str or None: Recognized text (lowercase), or None if gated or not understood
         """
-        r = sr.Recognizer()
+        # Converte uma vez só para o formato do reconhecedor (VAD e backend reaproveitam)
+        audio = self._backend.prepare(audio)
+        if not self._vad.accept(audio, self._recognizer.energy_threshold):
+            return None
 
         try:
-            with sr.Microphone() as source:
-                r.energy_threshold = 100
-                r.adjust_for_ambient_noise(source, duration=1)
-                logger.debug(
-                    f"Escutando entrada de voz (até {timeout_seconds} segundos)...")
-                audio = r.listen(source, phrase_time_limit=timeout_seconds)
-                try:
-                    text = r.recognize_google(  # type: ignore
-                        audio, language=self.language)
-                    normalized_text = text.lower()
-                    logger.info(f"Fala reconhecida: '{text}'")
-                    return normalized_text
-                except sr.UnknownValueError:
-                    logger.debug(
-                        "Fala capturada mas não pôde ser compreendida")
-                    return None
-                except sr.RequestError as e:
-                    logger.exception(
-                        f"Erro do serviço Google Speech Recognition: {e}")
-                    return None
+            text = self._backend.recognize(audio, self.language)
+            normalized_text = text.lower()
+            logger.info(f"Fala reconhecida: '{text}'")
+            return normalized_text
+        except sr.UnknownValueError:
+            logger.debug(
+                "Fala capturada mas não pôde ser compreendida")
+            return None
+        except sr.RequestError as e:
+            logger.exception(
+                f"Erro do serviço de reconhecimento de voz ({self._backend.name}): {e}")
+            return None
         except Exception as e:
             logger.exception(f"Erro durante reconhecimento de voz: {e}")
             return None
@@ -167,8 +235,11 @@ class Assistant:
         volume_percent = 100
         try:
             sound_volume_exe = get_root_path() + "assets/SoundVolumeView.exe"
-            subprocess.run([sound_volume_exe, '/SetVolume', 'DefaultCaptureDevice',
-                           str(volume_percent)], check=True)
+            result = get_process_runner().run(
+                [sound_volume_exe, '/SetVolume', 'DefaultCaptureDevice', volume_percent], timeout=10)
+            if not result.ok:
+                raise RuntimeError(
+                    "tempo esgotado" if result.timed_out else f"código {result.returncode}: {result.stderr}")
             logger.info(
                 f"Volume do dispositivo de captura padrão do usuário definido para {volume_percent}%")
         except Exception as e:
@@ -0,0 +1,92 @@
+import threading
+from typing import Optional
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size circular buffer of raw PCM bytes.
+
+    Storage is a single preallocated bytearray, so writing frames all day never
+    allocates or grows. Every byte ever written has an absolute offset
+    (0 for the first byte), which lets consumers keep their own read cursor
+    and go back to any point still inside the window, e.g. the end of the
+    wake phrase.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._data = bytearray(capacity)
+        self._view = memoryview(self._data)
+        self._end = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @property
+    def end(self) -> int:
+        """Absolute offset right after the newest byte."""
+        return self._end
+
+    @property
+    def start(self) -> int:
+        """Absolute offset of the oldest byte still available."""
+        return max(0, self._end - self.capacity)
+
+    def write(self, data: bytes):
+        """Appends data, overwriting the oldest bytes once the buffer is full."""
+        size = len(data)
+        if size == 0:
+            return
+        if size > self.capacity:
+            data = data[-self.capacity:]
+            skipped = size - self.capacity
+            size = self.capacity
+        else:
+            skipped = 0
+
+        with self._cond:
+            pos = (self._end + skipped) % self.capacity
+            first = min(size, self.capacity - pos)
+            self._view[pos:pos + first] = data[:first]
+            if first < size:
+                self._view[0:size - first] = data[first:]
+            self._end += skipped + size
+            self._cond.notify_all()
+
+    def read(self, offset: int, size: int) -> bytes:
+        """
+        Copies up to size bytes starting at the absolute offset.
+        Offsets older than `start` are clamped to the oldest available byte.
+        """
+        with self._cond:
+            return self._read_locked(offset, size)
+
+    def wait_read(self, offset: int, size: int, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Waits until size bytes are available after offset and returns them.
+
+        Returns:
+            bytes or None: The requested bytes, or None on timeout or close
+        """
+        with self._cond:
+            ready = self._cond.wait_for(
+                lambda: self._end - max(offset, self.start) >= size or self._closed, timeout)
+            if not ready or self._closed:
+                return None
+            return self._read_locked(offset, size)
+
+    def close(self):
+        """Wakes up every waiting reader; further waits return None."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _read_locked(self, offset: int, size: int) -> bytes:
+        offset = max(offset, self.start)
+        size = max(0, min(size, self._end - offset))
+        pos = offset % self.capacity
+        first = min(size, self.capacity - pos)
+        if first == size:
+            return bytes(self._view[pos:pos + size])
+        return bytes(self._view[pos:]) + bytes(self._view[:size - first])
@@ -0,0 +1,381 @@
+import speech_recognition as sr
+from typing import Callable, Optional
+from helpers import get_logger
+from audio_buffer import AudioRingBuffer
+import audioop
+import math
+import threading
+import time
+
+logger = get_logger(__name__)
+
+_device_changed = threading.Event()
+
+
+def notify_device_change():
+    """
+    Signals every open MicrophoneStream that the system input device changed,
+    so the capture thread reopens the device on its next frame.
+    """
+    _device_changed.set()
+
+
+class NoiseFloorEstimator:
+    """
+    Continuous estimate of the ambient noise level, fed with every captured frame.
+
+    Tracks a low percentile of the frame energy (in the log domain) with an
+    exponential moving quantile update, so speech peaks barely move it while
+    a louder fan or AC is picked up within a few seconds. The speech threshold
+    is the floor times `ratio`. Nothing ever blocks on calibration: readers
+    just take the current value.
+    """
+
+    def __init__(self, percentile: float = 0.2, adapt_rate: float = 2.0,
+                 ratio: float = 2.0, min_threshold: float = 30.0, initial_threshold: float = 100.0):
+        self.percentile = percentile
+        self.adapt_rate = adapt_rate
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self._log_floor: Optional[float] = None
+        self._initial_threshold = initial_threshold
+
+    @property
+    def floor(self) -> float:
+        """Current ambient energy estimate (RMS)."""
+        if self._log_floor is None:
+            return self._initial_threshold / self.ratio
+        return math.exp(self._log_floor)
+
+    @property
+    def threshold(self) -> float:
+        """Energy above which a frame is considered possible speech."""
+        if self._log_floor is None:
+            return self._initial_threshold
+        return max(self.min_threshold, self.floor * self.ratio)
+
+    def update(self, rms: float, seconds: float):
+        """
+        Feeds one frame's RMS energy.
+
+        Args:
+            rms (float): Frame RMS energy.
+            seconds (float): Frame duration, so adaptation speed does not
+                depend on chunk size or sample rate.
+        """
+        value = math.log(rms + 1.0)
+        if self._log_floor is None:
+            self._log_floor = value
+            return
+        step = self.adapt_rate * seconds
+        if value > self._log_floor:
+            self._log_floor += step * self.percentile
+        else:
+            self._log_floor -= step * (1.0 - self.percentile)
+
+
+class EchoGate:
+    """
+    Tells the notification cue's echo apart from the user talking over it.
+
+    Learns how loudly the cue comes back through the microphone (the
+    coupling: captured RMS over the cue's own RMS) from every frame captured
+    while it plays, tracking a high percentile so the quiet frames before
+    the echo arrives do not pull it down, and keeps it across plays. A
+    frame counts as speech when what is left after taking away `margin`
+    times the expected echo is above the speech threshold; the rest is
+    scaled down by that same amount, so the echo is ducked instead of the
+    whole input being muted. Until enough
+    cue audio was heard to trust the coupling (or when the cue level is
+    unknown), the expected echo is `fallback_ratio` times the threshold.
+    """
+
+    def __init__(self, margin: float = 1.5, fallback_ratio: float = 3.0, percentile: float = 0.8,
+                 adapt_rate: float = 8.0, min_seconds: float = 0.5):
+        self.margin = margin
+        self.percentile = percentile
+        self.fallback_ratio = fallback_ratio
+        self.adapt_rate = adapt_rate
+        self.min_seconds = min_seconds
+        self._log_coupling: Optional[float] = None
+        self._heard = 0.0
+
+    @property
+    def coupling(self) -> Optional[float]:
+        """Learned echo RMS per unit of cue RMS, None until trusted."""
+        if self._log_coupling is None or self._heard < self.min_seconds:
+            return None
+        return math.exp(self._log_coupling)
+
+    def echo(self, reference: float, threshold: float) -> float:
+        """Highest echo RMS expected for a frame captured while the cue is at `reference`."""
+        if reference <= 0:
+            return 0.0
+        coupling = self.coupling
+        if coupling is None or math.isinf(reference):
+            return threshold * self.fallback_ratio
+        return self.margin * coupling * reference
+
+    def residual(self, rms: float, reference: float, threshold: float) -> float:
+        """RMS left in a frame once the expected echo is taken away (power subtraction)."""
+        echo = self.echo(reference, threshold)
+        return math.sqrt(max(0.0, rms * rms - echo * echo))
+
+    def update(self, rms: float, reference: float, seconds: float):
+        """Feeds one frame captured while the cue was at `reference`."""
+        if reference <= 0 or math.isinf(reference):
+            return
+        value = math.log((rms + 1.0) / (reference + 1.0))
+        self._heard += seconds
+        if self._log_coupling is None:
+            self._log_coupling = value
+            return
+        step = self.adapt_rate * seconds
+        if value > self._log_coupling:
+            self._log_coupling += min(value - self._log_coupling, step * self.percentile)
+        else:
+            self._log_coupling -= min(self._log_coupling - value, step * (1.0 - self.percentile))
+
+
+class MicrophoneStream:
+    """
+    Long-lived capture session over the default (or given) input device.
+
+    The device is opened once by a background thread that keeps writing frames
+    into an AudioRingBuffer holding the last `buffer_seconds` of audio.
+    Consumers pull frames with `read`, which advances a read cursor over that
+    buffer, so nothing said between two listen calls is lost and the cursor
+    can be moved back (`seek`) to replay recent audio. The device is only
+    reopened after a read error or when `notify_device_change` is called.
+    The capture thread also keeps `noise_floor` up to date from every frame.
+    """
+
+    def __init__(self, device_index: Optional[int] = None, chunk_size: int = 1024,
+                 buffer_seconds: float = 10.0, reopen_delay: float = 1.0):
+        self.device_index = device_index
+        self.chunk_size = chunk_size
+        self.buffer_seconds = buffer_seconds
+        self.reopen_delay = reopen_delay
+
+        self.sample_rate: int = 0
+        self.sample_width: int = 0
+
+        self.noise_floor = NoiseFloorEstimator()
+        self.echo_gate = EchoGate()
+        self._buffer: Optional[AudioRingBuffer] = None
+        self._cursor = 0
+        self._opened = threading.Event()
+        self._running = False
+        self._reopen = False
+        self._echo_reference: Optional[Callable[[], Optional[float]]] = None
+        self._on_speech: Optional[Callable[[], None]] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def seconds_per_frame(self) -> float:
+        return self.chunk_size / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.sample_width
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.chunk_size * self.sample_width
+
+    @property
+    def position(self) -> int:
+        """Absolute offset (in bytes) of the newest captured audio."""
+        return self._buffer.end if self._buffer else 0
+
+    def clock(self) -> float:
+        """Time base for timing decisions about what was heard (wall clock here)."""
+        return time.time()
+
+    def tell(self) -> int:
+        """Absolute offset (in bytes) of the read cursor."""
+        return self._cursor
+
+    def seek(self, offset: int):
+        """
+        Moves the read cursor to an absolute offset, clamped to the audio
+        still held in the buffer.
+        """
+        if not self._buffer:
+            return
+        self._cursor = min(max(offset, self._buffer.start), self._buffer.end)
+
+    def set_echo_reference(self, reference: Optional[Callable[[], Optional[float]]],
+                           on_speech: Optional[Callable[[], None]] = None):
+        """
+        Gates the echo of a sound being played (the notification cue) out of
+        the captured audio, see EchoGate. Frames with speech on top of the
+        echo are kept as captured; the others have the echo ducked.
+
+        Args:
+            reference (callable or None): Returns the RMS of what is being
+                played right now, or None once it stopped (the gate is then
+                dropped). None removes the gate.
+            on_speech (callable, optional): Called once, from the capture
+                thread, on the first frame with speech over the echo (the
+                user talking over the cue).
+        """
+        self._on_speech = on_speech if reference else None
+        self._echo_reference = reference
+
+    def start(self, wait_seconds: float = 5.0) -> bool:
+        """
+        Starts the capture thread and waits until the device is open.
+
+        Returns:
+            bool: True if the device was opened within wait_seconds
+        """
+        if self._running:
+            return self._opened.is_set()
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="microphone-stream", daemon=True)
+        self._thread.start()
+        return self._opened.wait(wait_seconds)
+
+    def stop(self):
+        """Stops the capture thread, releases the device and drops the buffer."""
+        self._running = False
+        if self._buffer:
+            self._buffer.close()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        # Um buffer fechado não recebe mais áudio: start() aloca outro
+        self._buffer = None
+        self._opened.clear()
+
+    def reopen(self):
+        """Requests the capture thread to close and reopen the device."""
+        self._reopen = True
+
+    def read(self, timeout: Optional[float] = None) -> Optional[bytes]:
+        """
+        Returns the next frame after the read cursor, waiting up to timeout
+        seconds for it. If the cursor fell out of the buffer window, reading
+        resumes from the oldest audio still available.
+
+        Returns:
+            bytes or None: Raw PCM frame, or None if nothing arrived in time
+        """
+        if not self._opened.wait(timeout) or not self._buffer:
+            return None
+        buffer = self._buffer
+        offset = max(self._cursor, buffer.start)
+        frame = buffer.wait_read(offset, self.frame_bytes, timeout)
+        if frame is None:
+            return None
+        self._cursor = offset + len(frame)
+        return frame
+
+    def clear(self):
+        """Skips every buffered frame, moving the read cursor to the newest audio."""
+        self._cursor = self.position
+
+    def as_source(self, stall_timeout: float = 5.0) -> "StreamAudioSource":
+        """
+        Wraps this stream as a speech_recognition AudioSource, so an
+        sr.Recognizer can listen on it without opening the device again.
+        """
+        return StreamAudioSource(self, stall_timeout)
+
+    def _allocate_buffer(self):
+        capacity = int(self.buffer_seconds * self.bytes_per_second)
+        capacity -= capacity % self.frame_bytes
+        if self._buffer and self._buffer.capacity == capacity:
+            return
+        if self._buffer:
+            self._buffer.close()
+        self._buffer = AudioRingBuffer(capacity)
+        self._cursor = 0
+
+    def _open_source(self):
+        """Opens the capture device; returns a context manager yielding an sr.AudioSource."""
+        return sr.Microphone(device_index=self.device_index, chunk_size=self.chunk_size)
+
+    def _run(self):
+        while self._running:
+            try:
+                with self._open_source() as source:
+                    self.sample_rate = source.SAMPLE_RATE
+                    self.sample_width = source.SAMPLE_WIDTH
+                    self._allocate_buffer()
+                    buffer = self._buffer
+                    noise_floor = self.noise_floor
+                    echo_gate = self.echo_gate
+                    width = self.sample_width
+                    seconds = self.seconds_per_frame
+                    self._reopen = False
+                    _device_changed.clear()
+                    self._opened.set()
+                    logger.info(
+                        f"Microfone aberto para captura contínua ({self.sample_rate} Hz)")
+
+                    while self._running and not self._reopen and not _device_changed.is_set():
+                        frame = source.stream.read(self.chunk_size)
+                        rms = audioop.rms(frame, width)
+                        reference = self._echo_reference
+                        level = reference() if reference else None
+                        if level is not None:
+                            # O eco do cue não alimenta o piso de ruído
+                            threshold = noise_floor.threshold
+                            residual = echo_gate.residual(rms, level, threshold)
+                            echo_gate.update(rms, level, seconds)
+                            if residual > threshold:
+                                on_speech, self._on_speech = self._on_speech, None
+                                if on_speech:
+                                    on_speech()
+                                buffer.write(frame)
+                            else:
+                                buffer.write(audioop.mul(frame, width, residual / rms) if rms else frame)
+                            continue
+                        if reference and self._echo_reference is reference:
+                            self._echo_reference = None
+                            self._on_speech = None
+                        buffer.write(frame)
+                        noise_floor.update(rms, seconds)
+
+                    if self._running:
+                        logger.info(
+                            "Dispositivo de entrada alterado, reabrindo microfone...")
+            except Exception as e:
+                logger.exception(f"Erro na captura do microfone: {e}")
+                time.sleep(self.reopen_delay)
+
+
+class _StreamReader:
+    def __init__(self, stream: MicrophoneStream, stall_timeout: float):
+        self._stream = stream
+        self._stall_timeout = stall_timeout
+
+    def read(self, size: int) -> bytes:
+        frame = self._stream.read(timeout=self._stall_timeout)
+        if frame is None:
+            raise OSError(
+                f"Nenhum áudio recebido do microfone em {self._stall_timeout} segundos")
+        return frame
+
+
+class StreamAudioSource(sr.AudioSource):
+    """
+    AudioSource backed by a MicrophoneStream buffer instead of a device.
+    Used directly (no `with` block) since the stream owns the device.
+    """
+
+    def __init__(self, stream: MicrophoneStream, stall_timeout: float = 5.0):
+        self.SAMPLE_RATE = stream.sample_rate
+        self.SAMPLE_WIDTH = stream.sample_width
+        self.CHUNK = stream.chunk_size
+        self.stream = _StreamReader(stream, stall_timeout)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
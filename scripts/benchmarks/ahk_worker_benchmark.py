@@ -0,0 +1,145 @@
+"""
+Benchmark do worker AHK: tempo de N comandos com um processo por comando
+(como o exec_ahk_command fazia), com um processo só para o lote todo
+(batch.exe) e com o pool de workers de longa duração, comando a comando e
+em lote.
+
+Sem --binaries, usa substitutos em Python (este mesmo arquivo com --serve e
+--batch) que falam o protocolo do modules/worker.ahk e do modules/batch.ahk
+e simulam o custo de subir o interpretador e carregar o lib/
+(--startup-ms) e o de cada ação (--action-ms); roda em qualquer sistema.
+Também mata o worker no meio para mostrar o reinício automático. Com
+--binaries (Windows), usa max.exe, batch.exe e worker.exe de verdade.
+
+Uso:
+    python benchmarks/ahk_worker_benchmark.py [--commands 6] [--startup-ms 150] [--action-ms 20]
+    python benchmarks/ahk_worker_benchmark.py --binaries ../app/src-tauri/resources/binaries --app notepad
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_action(action: dict, action_ms: float) -> dict:
+    time.sleep(action_ms / 1000)
+    return {"script": action.get("script"), "exit_code": 0,
+            "output": f"{action.get('script')} executed successfully.", "ms": action_ms}
+
+
+def serve(startup_ms: float, action_ms: float):
+    """Worker substituto: mesmo protocolo do modules/worker.ahk."""
+    time.sleep(startup_ms / 1000)
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        if request.get("script") == "ping":
+            response = {"id": request.get("id"), "exit_code": 0, "output": "pong"}
+        elif request.get("script") == "batch":
+            results = [run_action(action, action_ms) for action in request.get("actions", [])]
+            response = {"id": request.get("id"), "exit_code": 0, "output": "", "results": results}
+        else:
+            response = {"id": request.get("id"), **run_action(request, action_ms)}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+
+
+def batch(startup_ms: float, action_ms: float):
+    """batch.exe substituto: lista de ações no stdin, lista de resultados no stdout."""
+    time.sleep(startup_ms / 1000)
+    actions = json.loads(sys.stdin.read())
+    print(json.dumps([run_action(action, action_ms) for action in actions]))
+
+
+def once(startup_ms: float, action_ms: float, script: str):
+    """Um processo por comando, como os módulos compilados."""
+    time.sleep((startup_ms + action_ms) / 1000)
+    print(f"{script} executed successfully.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=6)
+    parser.add_argument("--startup-ms", type=float, default=150)
+    parser.add_argument("--action-ms", type=float, default=20)
+    parser.add_argument("--binaries", help="Diretório com max.exe, batch.exe e worker.exe compilados")
+    parser.add_argument("--app", default="notepad", help="App usado no max com --binaries")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--batch", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--once", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.startup_ms, args.action_ms)
+    if args.batch:
+        return batch(args.startup_ms, args.action_ms)
+    if args.once:
+        return once(args.startup_ms, args.action_ms, args.once)
+
+    import helpers  # noqa: F401  (inicializa helpers antes de utils)
+    from helpers.ahk_worker import AhkWorkerPool
+
+    timing = ["--startup-ms", str(args.startup_ms), "--action-ms", str(args.action_ms)]
+    if args.binaries:
+        one_shot = [os.path.join(args.binaries, "max.exe"), "--app", args.app]
+        batch_exe = [os.path.join(args.binaries, "batch.exe")]
+        worker = [os.path.join(args.binaries, "worker.exe")]
+        script, params = "max", ["--app", args.app]
+    else:
+        me = os.path.abspath(__file__)
+        one_shot = [sys.executable, me, "--once", "max"] + timing
+        batch_exe = [sys.executable, me, "--batch"] + timing
+        worker = [sys.executable, me, "--serve"] + timing
+        script, params = "max", ["--app", args.app]
+    actions = [{"script": script, "params": params}] * args.commands
+
+    started = time.perf_counter()
+    for _ in range(args.commands):
+        subprocess.run(one_shot, capture_output=True, text=True)
+    spawn = time.perf_counter() - started
+    print(f"Um processo por comando: {args.commands} comandos em {spawn * 1000:.0f} ms "
+          f"({spawn * 1000 / args.commands:.1f} ms/comando)")
+
+    started = time.perf_counter()
+    result = subprocess.run(batch_exe, input=json.dumps(actions), capture_output=True, text=True)
+    single = time.perf_counter() - started
+    print(f"Um processo para o lote: {len(json.loads(result.stdout))} comandos em "
+          f"{single * 1000:.0f} ms ({single * 1000 / args.commands:.1f} ms/comando)")
+
+    pool = AhkWorkerPool(worker, size=1)
+    started = time.perf_counter()
+    pool.start()
+    boot = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(args.commands):
+        code, output = pool.run(script, params)
+    warm = time.perf_counter() - started
+    print(f"Worker: início {boot * 1000:.0f} ms (uma vez), {args.commands} comandos em "
+          f"{warm * 1000:.0f} ms ({warm * 1000 / args.commands:.1f} ms/comando) -> {code} {output!r}")
+    started = time.perf_counter()
+    results = pool.run_batch(actions)
+    warm_batch = time.perf_counter() - started
+    print(f"Worker em lote: {len(results)} comandos em {warm_batch * 1000:.0f} ms "
+          f"({warm_batch * 1000 / args.commands:.1f} ms/comando)")
+
+    # Reinício automático: o próximo comando sobe um worker novo
+    worker_process = pool._workers[0]._process
+    worker_process.kill()
+    worker_process.wait()
+    started = time.perf_counter()
+    code, output = pool.run(script, params)
+    print(f"Depois de matar o worker: {code} {output!r} em "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms "
+          f"(reinícios: {pool._workers[0].restarts}); health check: {pool.health_check()}")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Micro-benchmark do IntentParser: tempo de parse por pedido e taxa de acerto
+do caminho rápido num conjunto de pedidos típicos (os que não casam vão
+para o LLM).
+
+Uso:
+    python benchmarks/intent_parser_benchmark.py [--iterations 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import helpers  # noqa: E402,F401  (inicializa helpers antes de utils)
+from intent_parser import IntentParser  # noqa: E402
+
+# (pedido, ferramenta esperada ou None se deve ir para o LLM)
+REQUESTS = [
+    ("abrir chrome", "launch_app"),
+    ("abre o spotify", "launch_app"),
+    ("por favor abre o discord", "launch_app"),
+    ("fechar discord", "close_app"),
+    ("fecha o chrome", "close_app"),
+    ("maximizar spotify", "max_app"),
+    ("maximiza a janela do chrome", "max_app"),
+    ("minimiza o discord", "min_app"),
+    ("move o chrome para a esquerda", "move_window"),
+    ("coloca o spotify na direita no monitor 2", "move_window"),
+    ("joga o discord pro monitor dois", "move_window"),
+    ("aumenta o volume", "update_app_volume"),
+    ("abaixa o volume do spotify em 10", "update_app_volume"),
+    ("abre o chrome e o spotify", None),
+    ("abre o chrome no perfil trabalho com o gmail", None),
+    ("coloca o chrome e o vscode lado a lado", None),
+    ("desliga o segundo monitor", None),
+    ("executa o plano modo trabalho", None),
+    ("diminui o volume para 20", None),
+    ("que horas sao", None),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    intent_parser = IntentParser({})
+    wrong = []
+    for text, expected in REQUESTS:
+        intent = intent_parser.parse(text)
+        tool = intent.tool if intent else None
+        if tool != expected:
+            wrong.append((text, expected, tool))
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        for text, _ in REQUESTS:
+            intent_parser.parse(text)
+    per_request_us = (time.perf_counter() - start) / \
+        (args.iterations * len(REQUESTS)) * 1e6
+
+    expected_hits = sum(1 for _, expected in REQUESTS if expected)
+    print(f"Pedidos: {len(REQUESTS)}  resolvidos sem LLM (esperado): {expected_hits}")
+    print(f"Parse: {per_request_us:.1f} us por pedido")
+    for text, expected, tool in wrong:
+        print(f"  divergente: '{text}' esperado={expected} obtido={tool}")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
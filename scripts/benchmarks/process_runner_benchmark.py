@@ -0,0 +1,80 @@
+"""
+Benchmark do ProcessRunner: N comandos curtos com subprocess.run(shell=True)
+(como o exec_ahk_command fazia) e com o runner, sem shell; depois um
+comando que trava, encerrado no prazo, e N comandos em paralelo pela API
+asyncio, limitados a --concurrency ao mesmo tempo. Mostra o tempo de spawn
+e de saída que o runner registra em cada chamada.
+
+O comando de teste é este mesmo arquivo com --child, que dorme --work-ms e
+sai; roda em qualquer sistema.
+
+Uso:
+    python benchmarks/process_runner_benchmark.py [--commands 20] [--work-ms 20] [--concurrency 4]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=20)
+    parser.add_argument("--work-ms", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        time.sleep(args.work_ms / 1000)
+        print("ok")
+        return
+
+    import helpers  # noqa: F401  (inicializa helpers antes de utils)
+    from helpers.process_runner import ProcessRunner
+
+    child = [sys.executable, os.path.abspath(__file__), "--child", "--work-ms", str(args.work_ms)]
+
+    started = time.perf_counter()
+    for _ in range(args.commands):
+        subprocess.run(subprocess.list2cmdline(child) if os.name == "nt" else " ".join(child),
+                       shell=True, capture_output=True, text=True)
+    shell = time.perf_counter() - started
+    print(f"subprocess.run com shell: {args.commands} comandos em {shell * 1000:.0f} ms "
+          f"({shell * 1000 / args.commands:.1f} ms/comando)")
+
+    runner = ProcessRunner(max_concurrency=args.concurrency, default_timeout=10)
+    started = time.perf_counter()
+    for _ in range(args.commands):
+        result = runner.run(child)
+    direct = time.perf_counter() - started
+    print(f"ProcessRunner sem shell: {args.commands} comandos em {direct * 1000:.0f} ms "
+          f"({direct * 1000 / args.commands:.1f} ms/comando) -> {result.returncode} {result.stdout.strip()!r}; "
+          f"{runner.stats()}")
+
+    hung = [sys.executable, os.path.abspath(__file__), "--child", "--work-ms", "60000"]
+    started = time.perf_counter()
+    result = runner.run(hung, timeout=0.5)
+    print(f"Comando travado com prazo de 0,5 s: encerrado={result.timed_out} em "
+          f"{(time.perf_counter() - started) * 1000:.0f} ms")
+
+    async def parallel():
+        return await asyncio.gather(*(runner.run_async(child) for _ in range(args.commands)))
+
+    started = time.perf_counter()
+    results = asyncio.run(parallel())
+    concurrent = time.perf_counter() - started
+    print(f"asyncio com até {args.concurrency} ao mesmo tempo: {len(results)} comandos em "
+          f"{concurrent * 1000:.0f} ms ({sum(r.ok for r in results)} ok, "
+          f"maior espera na fila {max(r.queue_ms for r in results):.0f} ms)")
+    print(f"Estatísticas: {runner.stats()}")
+
+
+if __name__ == "__main__":
+    main()
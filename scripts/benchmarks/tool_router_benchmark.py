@@ -0,0 +1,97 @@
+"""
+Benchmark do roteamento de ferramentas: tokens de schema por pedido com
+todas as ferramentas e docstrings completas (antes) e com só as ferramentas
+do grupo do pedido em schema compacto (depois).
+
+Com --ollama, manda cada pedido ao modelo nas duas configurações e mede
+tokens de prompt processados (prompt_eval_count) e tempo até o primeiro
+token. Sem --ollama, só conta os tokens estimados dos schemas.
+
+Uso:
+    python benchmarks/tool_router_benchmark.py [--ollama] [--model llama3.1:8b] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import helpers  # noqa: E402,F401  (inicializa helpers antes de utils)
+from executor import system_prompt, tools  # noqa: E402
+from tool_router import ToolRouter, schema_tokens  # noqa: E402
+
+REQUESTS = [
+    "abre o chrome e o spotify",
+    "coloca o chrome e o vscode lado a lado",
+    "abre o chrome no perfil trabalho com o gmail",
+    "abaixa o volume do spotify em 10",
+    "troca o microfone para o headset",
+    "desliga o segundo monitor",
+    "desliga o computador",
+    "que horas sao",
+]
+
+
+def measure(llm, prompt, bound_tools, request, repeat):
+    """Mediana de (tokens de prompt processados, ms até o primeiro token)."""
+    chain = prompt | llm.bind_tools(bound_tools)
+    tokens, first_token = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        first = None
+        metadata = {}
+        for chunk in chain.stream({"input": request}):
+            if first is None:
+                first = time.perf_counter() - started
+            metadata.update(chunk.response_metadata or {})
+        tokens.append(metadata.get("prompt_eval_count") or 0)
+        first_token.append((first or 0) * 1000)
+    return statistics.median(tokens), statistics.median(first_token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ollama", action="store_true",
+                        help="Mede no Ollama local (precisa do modelo baixado)")
+    parser.add_argument("--model", default="llama3.1:8b")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    router = ToolRouter(tools, compact=True)
+    full = schema_tokens(tools)
+    print(f"Schemas completos: {len(tools)} ferramentas, ~{full} tokens")
+
+    if args.ollama:
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_ollama import ChatOllama
+
+        llm = ChatOllama(model=args.model, temperature=0.0, keep_alive=-1)
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", system_prompt.replace("{", "{{").replace("}", "}}")),
+            ("user", "{input}")])
+        # Carrega o modelo e o prefixo antes de medir
+        measure(llm, prompt, tools, "ok", 1)
+
+    saved = []
+    for request in REQUESTS:
+        selected = router.select(request)
+        routed = router.tokens(selected)
+        saved.append(full - routed)
+        groups = ",".join(sorted(router.groups_for(request))) or "todas"
+        line = (f"{request:<45} [{groups:<13}] {len(selected):>2} ferramentas  "
+                f"schema ~{full:>4} -> ~{routed:>4} tokens")
+        if args.ollama:
+            before = measure(llm, prompt, tools, request, args.repeat)
+            after = measure(llm, prompt, selected, request, args.repeat)
+            line += (f"  | prompt {before[0]:.0f} -> {after[0]:.0f} tokens, "
+                     f"1º token {before[1]:.0f} -> {after[1]:.0f} ms")
+        print(line)
+    print(f"Economia média: ~{statistics.mean(saved):.0f} tokens de schema por pedido")
+
+
+if __name__ == "__main__":
+    main()
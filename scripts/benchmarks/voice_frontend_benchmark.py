@@ -0,0 +1,279 @@
+"""
+Benchmark do front end de voz (captura -> VAD -> reconhecimento -> wake
+phrase -> solicitação) sobre áudio gravado, sem microfone nem rede.
+
+Roda o VoicePipeline do main.py: o Assistant lê de um ReplayStream em vez do
+sr.Microphone, o reconhecimento é feito pelo ScriptedBackend, que devolve as
+transcrições rotuladas do corpus, e as solicitações vão para um executor que
+só as anota. Mede latência da wake phrase (fim da fala -> detecção), disparos
+falsos, wake phrases perdidas, acerto da solicitação e tempo por estágio.
+Sai com código 1 se alguma wake phrase for perdida, houver disparo falso ou
+alguma solicitação vier errada.
+
+Sem --corpus, gera um corpus sintético (tons com envelope de sílabas) num
+diretório temporário. Formato do corpus: ver replay.ReplayCorpus.
+
+Uso:
+    python benchmarks/voice_frontend_benchmark.py [--corpus DIR|WAV] [--speed 4]
+"""
+
+import argparse
+import collections
+import json
+import math
+import os
+import random
+import statistics
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import helpers  # noqa: E402,F401  (inicializa helpers antes de utils)
+from assistant import Assistant  # noqa: E402
+from pipeline import VoicePipeline  # noqa: E402
+from replay import ReplayCorpus, ReplayStream, ScriptedBackend  # noqa: E402
+from utils import normalize_text  # noqa: E402
+
+SAMPLE_RATE = 16000
+WAKE_PHRASE = "ola jarvis"
+COMMANDS = ["abre o chrome", "fecha o spotify", "maximiza o discord",
+            "aumenta o volume", "move o chrome para a esquerda"]
+CHATTER = ["vamos almocar mais tarde", "a reuniao foi adiada", "olha isso aqui",
+           "o jogo comeca as oito", "ola tudo bem"]
+
+
+def synth_speech(rng, seconds):
+    """Tom vozeado com envelope de sílabas: passa pelo VAD como fala."""
+    pitch = rng.uniform(100, 220)
+    formant = rng.uniform(600, 900)
+    samples = []
+    count = int(seconds * SAMPLE_RATE)
+    syllable = rng.uniform(0.15, 0.25)
+    for i in range(count):
+        t = i / SAMPLE_RATE
+        envelope = 0.35 + 0.65 * abs(math.sin(math.pi * t / syllable))
+        value = sum(math.sin(2 * math.pi * pitch * h * t) / h for h in (1, 2, 3))
+        value += 0.8 * math.sin(2 * math.pi * formant * t)
+        samples.append(int(5000 * envelope * value) + rng.randint(-40, 40))
+    return samples
+
+
+def synth_noise(rng, seconds, amplitude=60):
+    return [rng.randint(-amplitude, amplitude) for _ in range(int(seconds * SAMPLE_RATE))]
+
+
+def write_wav(path, samples):
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(b"".join(struct.pack("<h", max(-32768, min(32767, s)))
+                                 for s in samples))
+
+
+def make_synthetic_corpus(directory, files, seed):
+    """
+    Cada arquivo alterna: wake + comando na mesma frase, wake seguida do
+    comando após uma pausa, conversa sem wake phrase e só ruído.
+    """
+    rng = random.Random(seed)
+    for index in range(files):
+        samples = synth_noise(rng, 1.0)
+        utterances = []
+        kind = index % 4
+        command = rng.choice(COMMANDS)
+
+        def add(text, wake=False, command_text=""):
+            start = len(samples) / SAMPLE_RATE
+            samples.extend(synth_speech(rng, 0.3 + 0.09 * len(text.split()) * 3))
+            utterances.append({"start": round(start, 3), "end": round(len(samples) / SAMPLE_RATE, 3),
+                               "text": text, "wake": wake, "command": command_text})
+
+        if kind == 0:
+            add(f"{WAKE_PHRASE} {command}", wake=True, command_text=command)
+        elif kind == 1:
+            add(WAKE_PHRASE, wake=True, command_text=command)
+            samples.extend(synth_noise(rng, 1.2))
+            add(command)
+        elif kind == 2:
+            add(rng.choice(CHATTER))
+        samples.extend(synth_noise(rng, 2.0 if kind != 3 else 4.0))
+
+        name = os.path.join(directory, f"{index:03d}")
+        write_wav(name + ".wav", samples)
+        if utterances:
+            with open(name + ".json", "w", encoding="utf-8") as f:
+                json.dump({"utterances": utterances}, f, ensure_ascii=False, indent=2)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MeasuredAssistant(Assistant):
+    """
+    Assistant que anota cada wake phrase detectada (hora e até onde o áudio
+    tinha sido lido quando o segmento dela foi capturado).
+
+    Cada estágio do pipeline tem uma thread só e as filas são FIFO, então a
+    posição de leitura acompanha o segmento em ordem: captura -> texto ->
+    detecção (textos consumidos como pedido são pulados).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wakes = []
+        self._captured = collections.deque()
+        self._recognized = collections.deque()
+
+    def capture_segment(self, *args, **kwargs):
+        audio = super().capture_segment(*args, **kwargs)
+        if audio is not None:
+            self._captured.append(self._stream.tell())
+        return audio
+
+    def transcribe(self, audio):
+        read_to = self._captured.popleft() if self._captured else 0
+        text = super().transcribe(audio)
+        if text:
+            self._recognized.append((normalize_text(text), read_to))
+        return text
+
+    def detect_wake(self, chunk):
+        read_to = 0
+        while self._recognized:
+            text, position = self._recognized.popleft()
+            if text == normalize_text(chunk or ""):
+                read_to = position
+                break
+        wake = super().detect_wake(chunk)
+        if wake:
+            self.wakes.append((time.perf_counter(), chunk, read_to))
+        return wake
+
+
+class RecordingExecutor:
+    """Recebe as solicitações do pipeline no lugar do Executor."""
+
+    def __init__(self):
+        self.requests = []
+
+    def run(self, data):
+        self.requests.append((time.perf_counter(), data.get("input", "")))
+
+
+def run(corpus, args):
+    stream = ReplayStream(corpus, speed=args.speed)
+    backend = ScriptedBackend(corpus, latency=args.asr_latency)
+    assistant = MeasuredAssistant(wake_phrase=args.wake_phrase, backend=backend, stream=stream)
+    executor = RecordingExecutor()
+    # O mesmo pipeline do main.py, sem o cue sonoro
+    pipeline = VoicePipeline(assistant, executor, stats_interval=3600)
+
+    started = time.perf_counter()
+    threading.Thread(target=pipeline.run, name="benchmark-pipeline", daemon=True).start()
+    while not (stream.finished.is_set() and stream.tell() >= stream.end_offset):
+        time.sleep(0.02)
+    # Espera as filas esvaziarem e o último item sair dos estágios
+    grace = max(0.3, 2 * args.asr_latency)
+    while True:
+        if not any(pipeline.stats()["queues"].values()):
+            time.sleep(grace)
+            if not any(pipeline.stats()["queues"].values()):
+                break
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - started
+    pipeline.stop()
+    # Deixa a captura em andamento expirar (timeout de 1 s de áudio) antes de fechar o stream
+    time.sleep(1.2 / args.speed if args.speed > 0 else 0.1)
+    stream.stop()
+
+    wakes = [u for u in corpus.utterances if u.wake]
+    matched = {}
+    latencies = []
+    audio_latencies = []
+    false_triggers = []
+    max_lag = 5 * corpus.bytes_per_second
+    for detected_at, text, segment_end in assistant.wakes:
+        candidates = [i for i, u in enumerate(wakes) if i not in matched
+                      and u.end_offset <= segment_end + corpus.bytes_per_second // 10
+                      and segment_end - u.end_offset < max_lag]
+        if not candidates:
+            false_triggers.append(text)
+            continue
+        index = candidates[-1]
+        matched[index] = detected_at
+        utterance = wakes[index]
+        # Latência em tempo de áudio (reprodutível em qualquer speed) e em tempo de relógio
+        audio_latencies.append((segment_end - utterance.end_offset) / corpus.bytes_per_second * 1000)
+        written_at = stream.written_at(utterance.end_offset)
+        if written_at is not None:
+            latencies.append((detected_at - written_at) * 1000)
+
+    # Cada solicitação executada pertence à última wake phrase detectada antes dela
+    requests = {}
+    for requested_at, request in executor.requests:
+        owners = [i for i, at in matched.items() if at <= requested_at and i not in requests]
+        if owners:
+            requests[max(owners, key=lambda i: matched[i])] = request
+    expected = [i for i, u in enumerate(wakes) if u.command]
+    wrong = [(wakes[i], requests.get(i)) for i in expected
+             if normalize_text(requests.get(i) or "") != normalize_text(wakes[i].command)]
+
+    hours = corpus.duration / 3600
+    missed = [wakes[i] for i in range(len(wakes)) if i not in matched]
+    print(f"Corpus: {len(corpus.files)} arquivos, {corpus.duration:.1f} s de áudio, "
+          f"replay em {elapsed:.2f} s (speed={args.speed})")
+    print(f"Wake phrases: {len(wakes)}  detectadas: {len(matched)}  perdidas: {len(missed)}")
+    print(f"Disparos falsos: {len(false_triggers)} ({len(false_triggers) / hours:.1f}/h)")
+    for label, values in (("áudio", audio_latencies), ("relógio", latencies)):
+        if values:
+            print(f"Latência da wake phrase ({label}): média={statistics.mean(values):.0f} ms  "
+                  f"p95={percentile(values, 0.95):.0f} ms  máx={max(values):.0f} ms")
+    print(f"Solicitações corretas: {len(expected) - len(wrong)}/{len(expected)}")
+    print("Estágios do pipeline:")
+    for name, stage in pipeline.stats()["stages"].items():
+        print(f"  {name:<12} n={stage['count']:<4} média={stage['avg_ms']:8.1f} ms  "
+              f"espera={stage['avg_wait_ms']:8.1f} ms  máx={stage['max_ms']:8.1f} ms")
+    print(f"Estatísticas do assistente: {assistant.stats()}")
+    for utterance in missed:
+        print(f"  perdida: {utterance.file} {utterance.start:.2f}s '{utterance.text}'")
+    for text in false_triggers:
+        print(f"  disparo falso: '{text}'")
+    for utterance, request in wrong:
+        print(f"  solicitação errada: {utterance.file} esperado '{utterance.command}', "
+              f"executado '{request}'")
+    return not missed and not false_triggers and not wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Arquivo WAV ou diretório com WAVs + sidecars .json")
+    parser.add_argument("--wake-phrase", default=WAKE_PHRASE)
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 = tempo real, 0 = o mais rápido possível")
+    parser.add_argument("--asr-latency", type=float, default=0.0,
+                        help="Atraso fixo (s) por chamada do reconhecedor simulado")
+    parser.add_argument("--files", type=int, default=8,
+                        help="Arquivos do corpus sintético")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.corpus:
+        ok = run(ReplayCorpus(args.corpus), args)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            make_synthetic_corpus(directory, args.files, args.seed)
+            ok = run(ReplayCorpus(directory), args)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
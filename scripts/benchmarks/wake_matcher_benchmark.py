@@ -0,0 +1,152 @@
+"""
+Micro-benchmark do WakeMatcher contra o check_wake original (baseline) e
+contra a mesma busca em difflib puro.
+
+Mede o custo por chunk conforme o tamanho do buffer e o número de wake
+phrases crescem. Confere que o matcher dispara exatamente nos mesmos
+buffers que o baseline (fuzzy só nas últimas janelas de tokens e no sufixo;
+as janelas em qualquer posição só localizam a frase depois do disparo) e
+que dá o mesmo span da mesma busca feita só com difflib (o prefiltro LCS
+não muda nada).
+
+Uso:
+    python benchmarks/wake_matcher_benchmark.py [--iterations 200]
+"""
+
+import argparse
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import helpers  # noqa: E402,F401  (inicializa helpers antes de utils)
+from wake_matcher import WakeMatcher, DEFAULT_THRESHOLD  # noqa: E402
+
+PHRASES = [
+    "ola jarvis", "ei jarvis", "oi computador", "ola sexta feira",
+    "e ai jarvis", "bom dia jarvis", "ola assistente", "ei neuro desk",
+]
+WORDS = [
+    "abre", "o", "spotify", "fecha", "chrome", "maximiza", "discord", "a",
+    "janela", "para", "esquerda", "volume", "reuniao", "amanha", "vamos",
+    "jarbas", "ola", "oi", "computador", "la", "de", "que", "isso",
+]
+
+
+def baseline_find(phrases, buffer, threshold=DEFAULT_THRESHOLD):
+    """check_wake original, repetido para cada frase: substring exata, depois difflib no fim do buffer."""
+    for phrase in phrases:
+        if phrase in buffer:
+            return True
+    for phrase in phrases:
+        count = len(phrase.split())
+        tokens = buffer.split()
+        candidates = []
+        if len(tokens) >= count:
+            candidates.append(" ".join(tokens[-count:]))
+        if len(tokens) >= count + 1:
+            candidates.append(" ".join(tokens[-(count + 1):]))
+        suffix = buffer[-(len(phrase) + 8):]
+        if suffix:
+            if len(suffix) >= len(phrase):
+                for i in range(0, len(suffix) - len(phrase) + 1):
+                    candidates.append(suffix[i:i + len(phrase)])
+            else:
+                candidates.append(suffix)
+        for candidate in candidates:
+            if difflib.SequenceMatcher(None, phrase, candidate).ratio() >= threshold:
+                return True
+    return False
+
+
+def difflib_find(phrases, buffer, threshold=DEFAULT_THRESHOLD):
+    """Mesma busca do WakeMatcher (decisão do baseline, depois localização), só com difflib."""
+    for phrase in phrases:
+        index = buffer.find(phrase)
+        if index >= 0:
+            return phrase, index, index + len(phrase)
+
+    spans = []
+    pos = 0
+    for token in buffer.split():
+        start = buffer.index(token, pos)
+        spans.append((start, start + len(token)))
+        pos = start + len(token)
+
+    def ratio(phrase, start, end):
+        return difflib.SequenceMatcher(None, phrase, buffer[start:end]).ratio()
+
+    for phrase in phrases:
+        count = len(phrase.split())
+        candidates = []
+        for c in (count, count + 1):
+            if len(spans) >= c:
+                candidates.append((spans[-c][0], spans[-1][1]))
+        suffix_start = max(0, len(buffer) - (len(phrase) + 8))
+        if len(buffer) - suffix_start >= len(phrase):
+            for i in range(suffix_start, len(buffer) - len(phrase) + 1):
+                candidates.append((i, i + len(phrase)))
+        else:
+            candidates.append((suffix_start, len(buffer)))
+        for start, end in candidates:
+            if ratio(phrase, start, end) >= threshold:
+                best, best_ratio = (start, end), 0.0
+                for i in range(len(spans)):
+                    for c in (count, count + 1):
+                        if i + c <= len(spans):
+                            value = ratio(phrase, spans[i][0], spans[i + c - 1][1])
+                            if value >= threshold and value > best_ratio:
+                                best, best_ratio = (spans[i][0], spans[i + c - 1][1]), value
+                return (phrase,) + best
+    return None
+
+
+def make_buffer(rng, length):
+    words = []
+    while len(" ".join(words)) < length:
+        words.append(rng.choice(WORDS))
+    return " ".join(words)[:length].strip()
+
+
+def bench(fn, buffers, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for buffer in buffers:
+            fn(buffer)
+    return (time.perf_counter() - start) / (iterations * len(buffers)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'buffer':>6} {'frases':>6} {'baseline (us)':>14} {'difflib (us)':>13} "
+          f"{'matcher (us)':>13} {'x baseline':>10} {'disparos':>9}")
+    for length in (20, 40, 80, 120):
+        buffers = [make_buffer(rng, length) for _ in range(50)]
+        for count in (1, 2, 4, 8):
+            phrases = PHRASES[:count]
+            matcher = WakeMatcher(phrases)
+
+            hits = 0
+            for buffer in buffers:
+                found = matcher.find(buffer)
+                assert found == difflib_find(phrases, buffer), buffer
+                assert (found is not None) == baseline_find(phrases, buffer), buffer
+                hits += found is not None
+
+            baseline_us = bench(lambda b: baseline_find(phrases, b), buffers, args.iterations)
+            difflib_us = bench(lambda b: difflib_find(phrases, b), buffers, args.iterations)
+            matcher_us = bench(matcher.find, buffers, args.iterations)
+            print(f"{length:>6} {count:>6} {baseline_us:>14.1f} {difflib_us:>13.1f} {matcher_us:>13.1f} "
+                  f"{baseline_us / matcher_us:>9.1f}x {hits:>6}/{len(buffers)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -223,7 +223,7 @@ def build_python_executable():
         'speech_recognition', 'pyaudio', 'tqdm',
         'langchain', 'langchain_core', 'langchain_openai', 'langchain_ollama',
         'langgraph', 'langsmith', 'tiktoken', 'openai',
-        'playsound'
+        'playsound', 'miniaudio'
     ]
     for mod in third_party_mods:
         hidden_imports += ['--hidden-import', mod]
@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+from helpers import get_logger
+from utils import normalize_text
+import hashlib
+import json
+import os
+import threading
+
+logger = get_logger(__name__)
+
+# Chaves do settings.json que mudam sozinhas e não afetam as respostas do agente
+_VOLATILE_SETTINGS = {"last_boot_time"}
+
+
+def compute_fingerprint(settings: Dict[str, Any], tools: Iterable[Any], system_prompt: str) -> str:
+    """
+    Hash of everything that shapes the agent's tool calls: settings, the
+    tool names/descriptions/argument schemas and the system prompt.
+
+    Args:
+        settings (Dict[str, Any]): Loaded settings.json.
+        tools (Iterable): LangChain tools bound to the agent.
+        system_prompt (str): Formatted system prompt.
+
+    Returns:
+        str: Hex digest; a different value invalidates the command cache
+    """
+    stable_settings = {k: v for k, v in (settings or {}).items()
+                       if k not in _VOLATILE_SETTINGS}
+    tool_schemas = [{"name": t.name, "description": t.description, "args": t.args}
+                    for t in tools]
+    payload = json.dumps({"settings": stable_settings, "tools": tool_schemas,
+                          "prompt": system_prompt}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CommandCache:
+    """
+    Persistent LRU cache from a normalized request to the tool calls the
+    agent made for it.
+
+    Entries are stored as [{"name": tool, "args": {...}}, ...] in a JSON file
+    together with the fingerprint they were produced under. If the
+    fingerprint changes (settings.json, tool set or system prompt), the file
+    is discarded on load. Only runs judged successful should be stored.
+    """
+
+    def __init__(self, path: str, fingerprint: str, max_entries: int = 256):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._load()
+
+    @staticmethod
+    def key(request: str) -> str:
+        return " ".join(normalize_text(request).split())
+
+    def get(self, request: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns:
+            list or None: Cached tool calls for the request, or None on a miss
+        """
+        key = self.key(request)
+        with self._lock:
+            calls = self._entries.get(key)
+            if calls is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return [dict(call) for call in calls]
+
+    def put(self, request: str, tool_calls: List[Dict[str, Any]]):
+        """Stores the tool calls of a successful run, evicting the least recently used entry."""
+        key = self.key(request)
+        if not key or not tool_calls:
+            return
+        with self._lock:
+            self._entries[key] = [{"name": c["name"], "args": c["args"]} for c in tool_calls]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save_locked()
+
+    def invalidate(self, request: str):
+        """Drops a cached entry (e.g. when replaying it failed)."""
+        with self._lock:
+            if self._entries.pop(self.key(request), None) is not None:
+                self._save_locked()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("fingerprint") != self.fingerprint:
+                logger.info(
+                    "Configurações, ferramentas ou prompt mudaram; cache de comandos descartado")
+                return
+            for key, calls in data.get("entries", [])[-self.max_entries:]:
+                self._entries[key] = calls
+            logger.debug(f"Cache de comandos carregado: {len(self._entries)} entradas")
+        except Exception as e:
+            logger.warning(f"Falha ao carregar cache de comandos: {e}")
+
+    def _save_locked(self):
+        try:
+            data = {"fingerprint": self.fingerprint,
+                    "entries": [[k, v] for k, v in self._entries.items()]}
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Falha ao salvar cache de comandos: {e}")
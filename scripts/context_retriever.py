@@ -0,0 +1,132 @@
+from typing import Any, Dict, List, Optional, Tuple
+from helpers import get_logger
+from utils import get_custom_apps_paths, get_execution_plans_str, normalize_text
+from rapidfuzz import fuzz
+import threading
+
+logger = get_logger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), enough for budgeting."""
+    return (len(text) + 3) // 4
+
+
+class ContextRetriever:
+    """
+    Picks the custom apps and execution plans relevant to a request, so
+    the prompt carries only those instead of every entry in settings.json.
+
+    Entries are scored by fuzzy matching their names against the words of
+    the request (see _score). Only entries scoring at least `min_score` are
+    kept, best first, up to `top_k_apps` / `top_k_plans` and a combined
+    `token_budget`. The output uses the same format as
+    utils.get_custom_apps_paths / get_execution_plans_str.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None, top_k_apps: int = 5,
+                 top_k_plans: int = 3, token_budget: int = 400, min_score: float = 80):
+        settings = settings or {}
+        self.top_k_apps = top_k_apps
+        self.top_k_plans = top_k_plans
+        self.token_budget = token_budget
+        self.min_score = min_score
+
+        self._apps = [(normalize_text(app.get("name", "")), app)
+                      for app in settings.get("custom_apps", []) or []]
+        self._plans = []
+        for plan in settings.get("execution_plans", []) or []:
+            self._plans.append((normalize_text(plan.get("name", "")), plan))
+
+        self.full_tokens = estimate_tokens(get_custom_apps_paths(settings)) + \
+            estimate_tokens(get_execution_plans_str(settings))
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "tokens": 0}
+
+    def retrieve(self, request: str) -> Dict[str, str]:
+        """
+        Args:
+            request (str): User request.
+
+        Returns:
+            dict: app_paths_str and execution_plans_str for the prompt
+        """
+        return self.format(*self.select(request))
+
+    def select(self, request: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Returns:
+            tuple: (custom apps, execution plans) relevant to the request,
+            within the token budget
+        """
+        text = normalize_text(request)
+        apps = self._top([(self._score(name, text, single_token=True), app)
+                          for name, app in self._apps], self.top_k_apps)
+        plans = self._top([(self._score(name, text), plan)
+                           for name, plan in self._plans], self.top_k_plans)
+
+        # Planos primeiro: um plano citado pelo nome vale mais que um app
+        selected_apps: List[Dict[str, Any]] = []
+        selected_plans: List[Dict[str, Any]] = []
+        used = 0
+        for kind, entry in [("plan", p) for p in plans] + [("app", a) for a in apps]:
+            if kind == "plan":
+                cost = estimate_tokens(get_execution_plans_str({"execution_plans": [entry]}))
+            else:
+                cost = estimate_tokens(get_custom_apps_paths({"custom_apps": [entry]}))
+            if used + cost > self.token_budget:
+                continue
+            used += cost
+            (selected_plans if kind == "plan" else selected_apps).append(entry)
+        return selected_apps, selected_plans
+
+    def format(self, apps: List[Dict[str, Any]], plans: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Formats selected entries for the prompt and records the tokens used."""
+        context = {
+            "app_paths_str": get_custom_apps_paths({"custom_apps": apps}),
+            "execution_plans_str": get_execution_plans_str({"execution_plans": plans}),
+        }
+        tokens = estimate_tokens(context["app_paths_str"]) + \
+            estimate_tokens(context["execution_plans_str"])
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["tokens"] += tokens
+        logger.debug(
+            f"Contexto do prompt: {len(apps)}/{len(self._apps)} apps, "
+            f"{len(plans)}/{len(self._plans)} planos, ~{tokens} tokens "
+            f"(~{max(0, self.full_tokens - tokens)} economizados)")
+        return context
+
+    def stats(self) -> Dict[str, float]:
+        """Average context tokens per request and tokens saved versus the full lists."""
+        with self._lock:
+            requests = self._counters["requests"] or 1
+            average = self._counters["tokens"] / requests
+        return {"requests": self._counters["requests"],
+                "avg_tokens": round(average, 1),
+                "avg_tokens_saved": round(max(0.0, self.full_tokens - average), 1)}
+
+    def _top(self, scored: List[Tuple[float, Dict[str, Any]]], k: int) -> List[Dict[str, Any]]:
+        scored = [item for item in scored if item[0] >= self.min_score]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [entry for _, entry in scored[:k]]
+
+    @staticmethod
+    def _score(name: str, text: str, single_token: bool = False) -> float:
+        """
+        0-100 match of an entry name against the request: the whole name in
+        the request, or how well each name token matches some request
+        token. With `single_token`, one distinctive name token is enough
+        ("obs" -> "OBS Studio"), scored a bit lower.
+        """
+        if not name or not text:
+            return 0.0
+        if f" {name} " in f" {text} ":
+            return 100.0
+        words = text.split()
+        best = [max(fuzz.ratio(token, word) for word in words) for token in name.split()]
+        score = sum(best) / len(best)
+        if single_token:
+            distinctive = [b for token, b in zip(name.split(), best) if len(token) >= 3]
+            score = max([score] + [b - 10 for b in distinctive])
+        return score
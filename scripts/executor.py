@@ -1,7 +1,17 @@
-from typing import Dict
+from typing import Any, Dict, List, Optional
+import os
+import time
 from langchain_core.messages import AIMessage
 from utils import get_custom_apps_paths, get_execution_plans_str
-from helpers import get_settings, validate_agent_output, get_root_path
+from helpers import get_settings, validate_agent_output, validate_tool_results, get_root_path, get_logger
+from intent_parser import IntentParser
+from command_cache import CommandCache, compute_fingerprint
+from intent_index import IntentIndex
+from tool_call_stream import stream_tool_calls
+from tool_scheduler import ToolScheduler
+from context_retriever import ContextRetriever
+from tool_router import ToolRouter
+from plan_runner import PlanRunner
 from tools import (
     launch_app,
     move_window,
@@ -14,10 +24,12 @@ from tools import (
     min_app,
     max_app,
     install_requirements,
-    set_audio_input_device
+    set_audio_input_device,
+    ahk_command,
+    run_ahk_batch
 )
-from langchain_ollama import ChatOllama
-from langchain_openai import ChatOpenAI
+from langchain_ollama import ChatOllama, OllamaEmbeddings
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain.agents import create_tool_calling_agent
 from langchain.agents import AgentExecutor
@@ -39,19 +51,25 @@ tools = [
 
 root_path = get_root_path()
 settings = get_settings()
+logger = get_logger(__name__)
+tools_by_name = {tool.name: tool for tool in tools}
 app_paths_str = get_custom_apps_paths(settings)
 execution_plans_str = get_execution_plans_str(settings)
 
 with open(root_path + "prompts/agent_executor.md", encoding="utf-8") as f:
-    system_prompt = f.read().format(app_paths_str=app_paths_str,
-                                    execution_plans_str=execution_plans_str)
+    system_template = f.read()
+system_prompt = system_template.format(app_paths_str=app_paths_str,
+                                       execution_plans_str=execution_plans_str)
 
 
 class Executor():
     def __init__(self, mode: str = "auto"):
 
+        # Só o fim do system prompt (apps e planos do pedido) e o pedido mudam
+        # entre uma chamada e outra: as instruções e os schemas das ferramentas
+        # formam um prefixo fixo, que o Ollama reaproveita do cache
         prompt = ChatPromptTemplate.from_messages([
-            ("system", system_prompt),
+            ("system", system_template),
             ("user", "{input}"),
             ("placeholder", "{agent_scratchpad}")
         ])
@@ -71,6 +89,9 @@ class Executor():
             llm = ChatOllama(
                 model=model,
                 temperature=0.0,
+                # Mantém o modelo (e o prefixo já processado) carregado entre comandos
+                keep_alive=(settings or {}).get("ollama_keep_alive", -1),
+                num_ctx=(settings or {}).get("ollama_num_ctx"),
             )
 
         if (mode == "auto"):
@@ -85,20 +106,346 @@ class Executor():
 
         self.executor = executor
         self.mode = mode
+        self.provider = provider
+        self.model = model
+        self._prompt = prompt
+        self._llm = llm
+        # Só os apps e planos relevantes para o pedido entram no prompt
+        self.context_retriever = ContextRetriever(
+            settings,
+            top_k_apps=(settings or {}).get("prompt_top_k_apps", 5),
+            top_k_plans=(settings or {}).get("prompt_top_k_plans", 3),
+            token_budget=(settings or {}).get("prompt_context_budget", 400),
+        ) if (settings or {}).get("prompt_retrieval", True) else None
+        # No modo manual, cada pedido recebe só as ferramentas do(s) grupo(s) que cita
+        self.tool_router = ToolRouter(
+            tools, settings,
+            compact=(settings or {}).get("compact_tool_schemas", True),
+        ) if mode != "auto" and (settings or {}).get("tool_routing", True) else None
+        self._chains: Dict[frozenset, Any] = {}
+        # No modo manual, executa cada ferramenta assim que o modelo termina de gerá-la
+        self.stream_tool_calls = mode != "auto" and (
+            settings or {}).get("stream_tool_calls", True)
+        # Chamadas em apps/janelas diferentes rodam em paralelo; no mesmo alvo, em ordem
+        # Chamadas que rodariam em sequência de qualquer jeito vão num lote só para o AHK
+        batching = (settings or {}).get("ahk_batch", True)
+        self.tool_scheduler = ToolScheduler(
+            lambda call: tools_by_name[call["name"]].invoke(call["args"]),
+            max_workers=(settings or {}).get("tool_workers", 4),
+            invoke_batch=run_ahk_batch if batching else None,
+            can_batch=lambda call: ahk_command(call) is not None)
+        # Planos de execução rodam direto nas ferramentas, sem o LLM
+        self.plan_runner = PlanRunner(settings, self.tool_scheduler)
+        # Comandos simples e inequívocos vão direto para a ferramenta, sem o LLM
+        self.intent_parser = IntentParser(
+            settings) if (settings or {}).get("intent_fast_path", True) else None
+
+        # Pedidos já resolvidos pelo LLM são repetidos direto do cache
+        fingerprint = compute_fingerprint(settings, tools, system_prompt)
+        cache_size = (settings or {}).get("command_cache_size", 256)
+        self.command_cache = CommandCache(
+            os.path.join(root_path, '.command_cache.json'),
+            fingerprint, max_entries=cache_size) if cache_size else None
+
+        # Paráfrases de pedidos já resolvidos reaproveitam o plano pelo vizinho mais próximo
+        self.intent_index = None
+        if (settings or {}).get("intent_index", True):
+            embedding_model = (settings or {}).get("embedding_model")
+            if provider == "openai":
+                embedding_model = embedding_model or "text-embedding-3-small"
+                embeddings = OpenAIEmbeddings(
+                    model=embedding_model,
+                    api_key=(settings or {}).get("openai_api_key"),
+                    base_url=(settings or {}).get("openai_base_url"),
+                )
+            else:
+                embedding_model = embedding_model or "nomic-embed-text"
+                embeddings = OllamaEmbeddings(model=embedding_model)
+            self.intent_index = IntentIndex(
+                os.path.join(root_path, '.intent_index.npz'),
+                f"{fingerprint}:{embedding_model}",
+                embeddings.embed_query,
+                threshold=(settings or {}).get("intent_similarity_threshold", 0.9))
 
     def run(self, data: Dict[str, str]):
-        response = self.executor.invoke(data)
-        if (self.mode == "auto"):
+        request = data.get('input', '')
+        plan = self.plan_runner.find(request)
+        if plan is not None:
+            self.run_plan(plan)
+            return
+        if self.intent_parser and self._run_fast_path(request):
+            return
+        if self.command_cache and self._run_cached(request):
+            return
+        vector = None
+        if self.intent_index is not None:
+            handled, vector = self._run_indexed(request)
+            if handled:
+                return
+
+        data, chain = self._prepare(data)
+        succeeded = False
+        tool_calls: List[Dict[str, Any]] = []
+        if self.stream_tool_calls:
+            succeeded, tool_calls = self._run_streaming(chain, data)
+        elif (self.mode == "auto"):
+            response = self.executor.invoke(data)
             if (isinstance(response, dict)):
-                validate_agent_output(response)
+                succeeded = validate_agent_output(response)
+                tool_calls = [{"name": action.tool, "args": action.tool_input}
+                              for action, _ in response.get('intermediate_steps', [])]
         else:
+            response = chain.invoke(data)
             if isinstance(response, AIMessage) and response.tool_calls:
                 tools_calls = response.tool_calls
-                tools_by_name = {tool.name: tool for tool in tools}
-                results = []
-                for call in tools_calls:
-                    tool_fn = tools_by_name[call["name"]]
-                    result = tool_fn.invoke(call["args"])
-                    results.append(
-                        {"tool_call_id": call["id"], "output": result})
+                results = [{"tool_call_id": call["id"], "output": result}
+                           for call, result in zip(tools_calls, self.tool_scheduler.run(tools_calls))]
                 print(results)
+                succeeded = validate_tool_results(r["output"] for r in results)
+                tool_calls = [{"name": call["name"], "args": call["args"]}
+                              for call in tools_calls]
+
+        if succeeded and tool_calls:
+            if self.command_cache:
+                self.command_cache.put(request, tool_calls)
+            if self.intent_index is not None and vector is not None:
+                self.intent_index.add(request, vector, tool_calls)
+
+    def warm_up(self) -> Optional[Dict[str, float]]:
+        """
+        Loads the Ollama model and processes the static prompt prefix
+        (system prompt + tool schemas) before the first command, then
+        repeats the call to measure the warm latency.
+
+        With tool routing, each request binds a subset of the tools, and so
+        has its own prefix: the common subsets (see
+        ToolRouter.common_selections) are each sent once, window tools last
+        so theirs is the prefix left in Ollama's cache, and that last one is
+        repeated for the warm measurement.
+
+        Returns:
+            dict or None: cold_ms, warm_ms and prompt tokens, or None if
+            skipped or failed
+        """
+        if self.provider != "ollama":
+            logger.debug("Aquecimento do modelo ignorado: provedor não é Ollama")
+            return None
+
+        # Mesmo prompt e mesmas ferramentas dos comandos reais, gerando só 1 token;
+        # as demais opções têm que ser as mesmas ou o Ollama recarrega o modelo
+        options = {"temperature": self._llm.temperature, "num_predict": 1}
+        if self._llm.num_ctx:
+            options["num_ctx"] = self._llm.num_ctx
+        selections = self.tool_router.common_selections() if self.tool_router else [tools]
+        chains = [self._prompt | self._llm.bind_tools(selected, options=options)
+                  for selected in selections]
+        timings = []
+        try:
+            data = self._prepare({"input": "ok"})[0]
+            for chain in chains + chains[-1:]:
+                started = time.perf_counter()
+                response = chain.invoke(data)
+                timings.append((time.perf_counter() - started,
+                                getattr(response, "response_metadata", {}) or {}))
+        except Exception as e:
+            logger.warning(f"Falha ao aquecer o modelo {self.model}: {e}")
+            return None
+
+        (cold, cold_meta), (warm, warm_meta) = timings[0], timings[-1]
+        report = {
+            "cold_ms": round(cold * 1000),
+            "warm_ms": round(warm * 1000),
+            "load_ms": round((cold_meta.get("load_duration") or 0) / 1e6),
+            "prompt_tokens": cold_meta.get("prompt_eval_count") or 0,
+            "warm_prompt_tokens": warm_meta.get("prompt_eval_count") or 0,
+        }
+        logger.info(
+            f"Modelo {self.model} aquecido: frio {report['cold_ms']} ms "
+            f"(carga {report['load_ms']} ms, {report['prompt_tokens']} tokens de prompt), "
+            f"quente {report['warm_ms']} ms ({report['warm_prompt_tokens']} tokens processados)")
+        return report
+
+    def _prepare(self, data: Dict[str, str]):
+        """
+        Adds the app list and execution plans the prompt needs for this
+        request and picks the runnable bound to the tools it needs.
+
+        Returns:
+            tuple: (prompt inputs, runnable to invoke or stream)
+        """
+        request = data.get("input", "")
+        plans: List[Dict[str, Any]] = []
+        if self.context_retriever is None:
+            context = {"app_paths_str": app_paths_str,
+                       "execution_plans_str": execution_plans_str}
+        else:
+            apps, plans = self.context_retriever.select(request)
+            context = self.context_retriever.format(apps, plans)
+        data = {**data, **context}
+
+        if self.tool_router is None:
+            return data, self.executor
+        selected = self.tool_router.select(request, plans)
+        key = frozenset(t.name for t in selected)
+        if key not in self._chains:
+            self._chains[key] = self._prompt | self._llm.bind_tools(selected)
+        logger.debug(
+            f"Ferramentas: {len(selected)}/{len(tools)} "
+            f"(~{self.tool_router.tokens(selected)} de ~{self.tool_router.full_tokens} tokens de schema)")
+        return data, self._chains[key]
+
+    def _run_streaming(self, chain: Any, data: Dict[str, str]):
+        """
+        Streams the model response and runs each tool call as soon as its
+        arguments are complete, in the order the model emitted them.
+
+        Returns:
+            tuple: (succeeded, tool calls made)
+        """
+        outcome = stream_tool_calls(
+            chain.stream(data), self.tool_scheduler.batch())
+        calls, timings = outcome["calls"], outcome["timings"]
+        results = [{"tool_call_id": call["id"], "output": result}
+                   for call, result in zip(calls, outcome["results"])]
+        logger.debug(f"Resultados das ferramentas: {results}")
+
+        first_token, first_action = timings["first_token"], timings["first_action"]
+        if "prompt_eval_count" in outcome["metadata"]:
+            # Poucos tokens aqui = prefixo fixo veio do cache do Ollama
+            logger.debug(
+                f"Prompt: {outcome['metadata']['prompt_eval_count']} tokens processados em "
+                f"{(outcome['metadata'].get('prompt_eval_duration') or 0) / 1e6:.0f} ms")
+        if first_action is not None:
+            logger.info(
+                f"Primeira ação em {first_action * 1000:.0f} ms "
+                f"(primeiro token em {first_token * 1000:.0f} ms, "
+                f"+{(first_action - first_token) * 1000:.0f} ms até a ação); "
+                f"{len(calls)} ferramenta(s), total {timings['total'] * 1000:.0f} ms")
+        elif first_token is not None:
+            logger.info(
+                f"Resposta sem ferramentas: primeiro token em {first_token * 1000:.0f} ms, "
+                f"total {timings['total'] * 1000:.0f} ms")
+
+        if not calls:
+            return False, []
+        succeeded = validate_tool_results(r["output"] for r in results)
+        return succeeded, [{"name": call["name"], "args": call["args"]} for call in calls]
+
+    def run_plan(self, plan: Dict[str, Any]) -> bool:
+        """
+        Runs an execution plan from settings.json without the LLM.
+
+        Returns:
+            bool: True if every action succeeded
+        """
+        return self.plan_runner.run(plan)
+
+    def _run_fast_path(self, request: str) -> bool:
+        """
+        Runs the request through the intent parser and, on a match, calls
+        the tool directly.
+
+        Returns:
+            bool: True if the request was handled without the LLM; False
+            if no rule matched or the tool call failed
+        """
+        started = time.perf_counter()
+        intent = self.intent_parser.parse(request)
+        parsed = time.perf_counter()
+        if intent is None:
+            return False
+
+        result = tools_by_name[intent.tool].invoke(intent.args)
+        finished = time.perf_counter()
+        if not validate_tool_results([result]):
+            # Regra casou mas a ação falhou (app com outro nome, etc.): deixa o LLM resolver
+            logger.warning(
+                f"Comando sem LLM falhou ({intent.rule}): {intent.tool}({intent.args}) -> {result}, "
+                f"consultando o LLM")
+            return False
+
+        stats = self.intent_parser.stats()
+        logger.info(
+            f"Comando resolvido sem LLM ({intent.rule}): {intent.tool}({intent.args}) -> {result} "
+            f"[parse {(parsed - started) * 1000:.2f} ms, execução {(finished - parsed) * 1000:.0f} ms, "
+            f"taxa de acerto {stats['hit_rate']:.0%} em {stats['requests']} pedidos]")
+        return True
+
+    def _run_cached(self, request: str) -> bool:
+        """
+        Replays the tool calls cached for this request, if any. A failed
+        replay drops the entry; it falls through to the LLM only when none
+        of the calls succeeded, so no action runs twice.
+
+        Returns:
+            bool: True if the request was handled from the cache
+        """
+        calls = self.command_cache.get(request)
+        if calls is None:
+            return False
+
+        started = time.perf_counter()
+        results = self.tool_scheduler.run(calls)
+        if not validate_tool_results(results):
+            # Algo mudou no sistema (app removido, etc.): descarta a entrada
+            self.command_cache.invalidate(request)
+            failed = [call['name'] for call, result in zip(calls, results)
+                      if not validate_tool_results([result])]
+            if len(failed) < len(calls):
+                # Parte das ações já rodou: o LLM as repetiria
+                logger.warning(
+                    f"Comando em cache falhou em parte para '{request}' ({failed}), "
+                    f"sem consultar o LLM para não repetir as ações que já rodaram")
+                return True
+            logger.warning(
+                f"Comando em cache falhou para '{request}', consultando o LLM")
+            return False
+
+        logger.info(
+            f"Comando repetido do cache: {[call['name'] for call in calls]} "
+            f"[{(time.perf_counter() - started) * 1000:.0f} ms, {self.command_cache.stats()}]")
+        return True
+
+    def _run_indexed(self, request: str):
+        """
+        Reuses the plan of the most similar request already handled, if any.
+        A failed reuse falls through to the LLM only when none of the calls
+        succeeded, so no action runs twice.
+
+        Returns:
+            tuple: (handled, embedding of the request or None)
+        """
+        started = time.perf_counter()
+        vector = self.intent_index.embed(request)
+        if vector is None:
+            return False, None
+        embedded = time.perf_counter()
+        match = self.intent_index.lookup(request, vector)
+        looked_up = time.perf_counter()
+        if match is None:
+            return False, vector
+
+        calls, score, matched_request = match
+        results = self.tool_scheduler.run(calls)
+        if not validate_tool_results(results):
+            failed = [call['name'] for call, result in zip(calls, results)
+                      if not validate_tool_results([result])]
+            if len(failed) < len(calls):
+                # Parte das ações já rodou: o LLM as repetiria
+                logger.warning(
+                    f"Plano reaproveitado de '{matched_request}' falhou em parte para '{request}' "
+                    f"({failed}), sem consultar o LLM para não repetir as ações que já rodaram")
+                return True, vector
+            logger.warning(
+                f"Plano reaproveitado de '{matched_request}' falhou para '{request}', consultando o LLM")
+            return False, vector
+
+        logger.info(
+            f"Plano reaproveitado de '{matched_request}' (similaridade {score:.3f}): "
+            f"{[call['name'] for call in calls]} [embedding {(embedded - started) * 1000:.0f} ms, "
+            f"busca {(looked_up - embedded) * 1000:.1f} ms em {len(self.intent_index)} pedidos]")
+        # A paráfrase vira uma entrada exata também
+        if self.command_cache:
+            self.command_cache.put(request, calls)
+        self.intent_index.add(request, vector, calls)
+        return True, vector
@@ -12,9 +12,12 @@ from .logging_config import setup_logging, get_logger
 from .auth_validator import validate_script_access
 from .validate_user_enviroment import validate_user_environment
 from .run_startup_plans import run_startup_plans
-from .exec_ahk_command import exec_ahk_command
-from .validate_agent_output import validate_agent_output
+from .exec_ahk_command import exec_ahk_command, exec_ahk_batch
+from .ahk_worker import get_ahk_worker_pool
+from .process_runner import ProcessRunner, get_process_runner
+from .validate_agent_output import validate_agent_output, validate_tool_results
 from .find_best_exe import find_best_exe
+from .exe_alias_cache import get_exe_alias_cache
 from .ollama_manager import OllamaManager
 
 __all__ = [
@@ -26,8 +29,14 @@ __all__ = [
     'validate_user_environment',
     'run_startup_plans',
     'exec_ahk_command',
+    'exec_ahk_batch',
+    'get_ahk_worker_pool',
+    'ProcessRunner',
+    'get_process_runner',
     'validate_agent_output',
+    'validate_tool_results',
     'find_best_exe',
+    'get_exe_alias_cache',
     'OllamaManager'
 ]
 
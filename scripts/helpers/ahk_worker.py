@@ -0,0 +1,385 @@
+from .logging_config import get_logger
+from .get_settings import get_settings
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import itertools
+import json
+import queue
+import subprocess
+import threading
+import time
+
+logger = get_logger(__name__)
+
+# Tempo sem tentar subir o worker de novo depois de uma falha ao iniciar
+START_RETRY_SECONDS = 60
+
+
+class WorkerError(Exception):
+    """The worker failed while (possibly) running the command."""
+
+
+class WorkerUnavailable(WorkerError):
+    """The worker could not be started; the command was not sent."""
+
+
+class AhkWorker:
+    """
+    One long-lived AutoHotkey worker process (modules/worker.ahk).
+
+    Commands go to the worker's stdin and answers come back on its stdout,
+    one JSON object per line:
+
+        -> {"id": 1, "script": "max", "params": ["--app", "chrome"]}
+        <- {"id": 1, "exit_code": 0, "output": "App maximized successfully."}
+
+    The script "ping" answers "pong" and is used as health check; "batch"
+    runs a list of commands in one request (see request_batch). Any
+    command that speaks this protocol can stand in for the worker (e.g. a
+    Python script on Linux). A worker that died or stopped answering is
+    killed and started again on the next request.
+    """
+
+    def __init__(self, command: Sequence[str], cwd: Optional[str] = None,
+                 start_timeout: float = 10.0):
+        self.command = [str(part) for part in command]
+        self.cwd = cwd
+        self.start_timeout = start_timeout
+        self.restarts = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """
+        Starts the worker process and waits for it to answer a ping.
+
+        Raises:
+            WorkerUnavailable: If the process cannot be started or does not answer
+        """
+        with self._lock:
+            self._start()
+
+    def request(self, script: str, params: Sequence[Any] = (),
+                timeout: Optional[float] = None) -> Tuple[int, str]:
+        """
+        Runs one command on the worker.
+
+        Args:
+            script (str): Action name ("max", "move_window", ...).
+            params (Sequence): Command line style arguments (["--app", "chrome"]).
+            timeout (float, optional): Seconds to wait for the answer.
+
+        Returns:
+            tuple: (exit code, output)
+
+        Raises:
+            WorkerUnavailable: If the worker could not be started; the command was not sent
+            WorkerError: If the worker died or timed out while running the command
+        """
+        with self._lock:
+            response = self._request(
+                {"script": script, "params": [str(p) for p in params]}, timeout)
+        return int(response.get("exit_code", 1)), str(response.get("output") or "")
+
+    def request_batch(self, actions: Sequence[Dict[str, Any]],
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Runs several commands in order in a single request.
+
+        Args:
+            actions (Sequence[dict]): Commands as {"script", "params"}.
+            timeout (float, optional): Seconds to wait for the whole batch.
+
+        Returns:
+            list: One {"script", "exit_code", "output", "ms"} per command
+
+        Raises:
+            WorkerUnavailable: If the worker could not be started; nothing was sent
+            WorkerError: If the worker died or timed out while running the batch
+        """
+        payload = {"script": "batch", "actions": [
+            {"script": a["script"], "params": [str(p) for p in a.get("params", [])]}
+            for a in actions]}
+        with self._lock:
+            response = self._request(payload, timeout)
+        results = response.get("results")
+        if not isinstance(results, list) or len(results) != len(actions):
+            raise WorkerError(f"resposta de lote inválida: {str(response)[:200]}")
+        return results
+
+    def ping(self, timeout: float = 5.0) -> bool:
+        """Health check: True if the worker answers in time. Restarts it otherwise."""
+        try:
+            code, output = self.request("ping", timeout=timeout)
+            return code == 0 and output == "pong"
+        except WorkerError as e:
+            logger.warning(f"Worker AHK não respondeu ao ping: {e}")
+            return False
+
+    def stop(self):
+        with self._lock:
+            self._kill()
+
+    def _start(self):
+        if self.alive:
+            return
+        self._kill()
+        try:
+            process = subprocess.Popen(
+                self.command, cwd=self.cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL, text=True, encoding="utf-8", bufsize=1)
+        except OSError as e:
+            raise WorkerUnavailable(f"falha ao iniciar {self.command[0]}: {e}") from e
+        self._process = process
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read, args=(process, self._responses),
+                         name="ahk-worker-reader", daemon=True).start()
+        try:
+            self._exchange({"script": "ping", "params": []}, self.start_timeout)
+        except (WorkerError, BrokenPipeError) as e:
+            self._kill()
+            raise WorkerUnavailable(f"worker não respondeu ao iniciar: {e}") from e
+
+    def _request(self, payload: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        if not self.alive:
+            if self._process is not None:
+                self.restarts += 1
+                logger.warning(
+                    f"Worker AHK encerrou (código {self._process.returncode}), reiniciando")
+            self._start()
+        try:
+            return self._exchange(payload, timeout)
+        except BrokenPipeError:
+            # O worker morreu antes de receber o comando: é seguro mandar de novo
+            self.restarts += 1
+            self._start()
+            try:
+                return self._exchange(payload, timeout)
+            except BrokenPipeError as e:
+                raise WorkerUnavailable(f"worker não aceitou '{payload['script']}': {e}") from e
+
+    def _exchange(self, payload: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+        request_id = next(self._ids)
+        script = payload["script"]
+        line = json.dumps({"id": request_id, **payload}, ensure_ascii=False)
+        try:
+            self._process.stdin.write(line + "\n")
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self._kill()
+            raise BrokenPipeError(str(e)) from e
+
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                response = self._responses.get(timeout=remaining)
+            except queue.Empty:
+                self._kill()
+                raise WorkerError(f"'{script}' excedeu {timeout:g} s")
+            if response is None:
+                self._kill()
+                raise WorkerError(f"worker encerrou durante '{script}'")
+            # Respostas de comandos que já expiraram são descartadas
+            if response.get("id") == request_id:
+                return response
+
+    @staticmethod
+    def _read(process: subprocess.Popen, responses: "queue.Queue"):
+        for line in process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                responses.put(json.loads(line))
+            except json.JSONDecodeError:
+                logger.warning(f"Resposta inválida do worker AHK: {line[:200]}")
+        responses.put(None)
+
+    def _kill(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        if process.poll() is None:
+            process.kill()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+
+
+class AhkWorkerPool:
+    """
+    A few AhkWorker processes, so tool calls the scheduler runs in parallel
+    do not queue behind a single worker. Workers start on first use (or on
+    `start`) and `health_check` pings the idle ones, restarting any that
+    stopped answering.
+    """
+
+    def __init__(self, command: Sequence[str], size: int = 4, cwd: Optional[str] = None,
+                 request_timeout: Optional[float] = 60):
+        self.request_timeout = request_timeout
+        self._workers = [AhkWorker(command, cwd) for _ in range(max(1, size))]
+        self._idle: "queue.Queue[AhkWorker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._failed_at: Optional[float] = None
+        self._monitor: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+    @property
+    def available(self) -> bool:
+        """False for a while after a worker failed to start."""
+        return self._failed_at is None or time.monotonic() - self._failed_at >= START_RETRY_SECONDS
+
+    def run(self, script: str, params: Sequence[Any] = (),
+            timeout: Optional[float] = None) -> Tuple[int, str]:
+        """
+        Runs one command on the first idle worker.
+
+        Returns:
+            tuple: (exit code, output)
+
+        Raises:
+            WorkerUnavailable: If no worker could be started; the command was not sent
+            WorkerError: If the worker died or timed out while running the command
+        """
+        if not self.available:
+            raise WorkerUnavailable("worker AHK indisponível")
+        worker = self._idle.get()
+        try:
+            return worker.request(script, params, timeout or self.request_timeout)
+        except WorkerUnavailable:
+            self._failed_at = time.monotonic()
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def run_batch(self, actions: Sequence[Dict[str, Any]],
+                  timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Runs several commands in order on one worker, in a single request.
+
+        Returns:
+            list: One {"script", "exit_code", "output", "ms"} per command
+
+        Raises:
+            WorkerUnavailable: If no worker could be started; nothing was sent
+            WorkerError: If the worker died or timed out while running the batch
+        """
+        if not self.available:
+            raise WorkerUnavailable("worker AHK indisponível")
+        worker = self._idle.get()
+        try:
+            return worker.request_batch(actions, timeout or self.request_timeout)
+        except WorkerUnavailable:
+            self._failed_at = time.monotonic()
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def start(self):
+        """Starts every worker now instead of on the first command."""
+        for worker in self._workers:
+            try:
+                worker.start()
+            except WorkerUnavailable as e:
+                self._failed_at = time.monotonic()
+                logger.warning(f"Worker AHK indisponível, usando um processo por comando: {e}")
+                return
+        self._failed_at = None
+        logger.info(f"{len(self._workers)} workers AHK prontos")
+
+    def health_check(self) -> Dict[str, int]:
+        """
+        Pings the idle workers (busy ones are skipped), restarting the
+        ones that do not answer.
+
+        Returns:
+            dict: healthy, restarted and busy worker counts
+        """
+        status = {"healthy": 0, "restarted": 0, "busy": 0}
+        checked = []
+        for _ in self._workers:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            checked.append(worker)
+        status["busy"] = len(self._workers) - len(checked)
+        try:
+            for worker in checked:
+                if worker.alive and worker.ping():
+                    status["healthy"] += 1
+                    continue
+                try:
+                    worker.start()
+                    status["restarted"] += 1
+                except WorkerUnavailable as e:
+                    self._failed_at = time.monotonic()
+                    logger.warning(f"Falha ao reiniciar worker AHK: {e}")
+        finally:
+            for worker in checked:
+                self._idle.put(worker)
+        if status["restarted"]:
+            logger.info(f"Health check dos workers AHK: {status}")
+        return status
+
+    def start_monitor(self, interval: float = 30.0):
+        """Starts the workers and health-checks them every `interval` seconds in the background."""
+        if self._monitor is not None:
+            return
+
+        def monitor():
+            self.start()
+            while not self._closed.wait(interval):
+                if self.available:
+                    self.health_check()
+
+        self._monitor = threading.Thread(target=monitor, name="ahk-worker-health", daemon=True)
+        self._monitor.start()
+
+    def close(self):
+        self._closed.set()
+        for worker in self._workers:
+            worker.stop()
+
+
+_pool: Optional[AhkWorkerPool] = None
+_pool_checked = False
+_pool_lock = threading.Lock()
+
+
+def get_ahk_worker_pool(modules_dir: Path) -> Optional[AhkWorkerPool]:
+    """
+    Shared worker pool for the binaries in `modules_dir`.
+
+    Returns:
+        AhkWorkerPool or None: None if the worker is disabled in the settings
+        ("ahk_worker") or worker.exe is missing; commands then run one process each
+    """
+    global _pool, _pool_checked
+    with _pool_lock:
+        if _pool_checked:
+            return _pool
+        _pool_checked = True
+        settings = get_settings() or {}
+        worker_exe = Path(modules_dir) / "worker.exe"
+        if not settings.get("ahk_worker", True) or not worker_exe.exists():
+            return None
+        _pool = AhkWorkerPool(
+            [str(worker_exe)],
+            size=settings.get("ahk_workers", settings.get("tool_workers", 4)),
+            request_timeout=settings.get("ahk_worker_timeout", 60))
+        _pool.start_monitor(settings.get("ahk_worker_health_interval", 30))
+        return _pool
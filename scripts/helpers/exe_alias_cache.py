@@ -0,0 +1,124 @@
+from .logging_config import get_logger
+from .config import get_root_path
+from .get_settings import get_settings
+from collections import OrderedDict
+from typing import Dict, Optional
+from utils import normalize_text
+import json
+import os
+import threading
+
+logger = get_logger(__name__)
+
+
+class ExeAliasCache:
+    """
+    Persistent map from an app name as the user asked for it ("vs code") to
+    the executable find_best_exe resolved it to, so a name that once needed
+    the full-disk search goes straight to the exe next time.
+
+    Entries are checked with a single stat when read and dropped if the exe
+    no longer exists. The file is a JSON list of [alias, path] pairs, least
+    recently used first.
+    """
+
+    def __init__(self, path: str, max_entries: int = 512):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._load()
+
+    @staticmethod
+    def key(app_name: str) -> str:
+        return " ".join(normalize_text(app_name.replace(".exe", "")).split())
+
+    def get(self, app_name: str) -> Optional[str]:
+        """
+        Returns:
+            str or None: Cached exe path for the app name, or None on a miss
+            or if the exe is gone (the entry is then evicted)
+        """
+        key = self.key(app_name)
+        with self._lock:
+            exe = self._entries.get(key)
+            if exe is None:
+                self._misses += 1
+                return None
+            if not os.path.isfile(exe):
+                logger.info(f"Exe em cache para '{app_name}' não existe mais: {exe}")
+                del self._entries[key]
+                self._misses += 1
+                self._save_locked()
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return exe
+
+    def put(self, app_name: str, exe: str):
+        """Stores the exe an app name resolved to, evicting the least recently used entry."""
+        key = self.key(app_name)
+        if not key or not exe:
+            return
+        with self._lock:
+            if self._entries.get(key) == exe:
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = exe
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save_locked()
+
+    def invalidate(self, app_name: str):
+        with self._lock:
+            if self._entries.pop(self.key(app_name), None) is not None:
+                self._save_locked()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self._hits, "misses": self._misses}
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, exe in data[-self.max_entries:]:
+                self._entries[key] = exe
+            logger.debug(f"Cache de executáveis carregado: {len(self._entries)} entradas")
+        except Exception as e:
+            logger.warning(f"Falha ao carregar cache de executáveis: {e}")
+
+    def _save_locked(self):
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump([[k, v] for k, v in self._entries.items()], f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Falha ao salvar cache de executáveis: {e}")
+
+
+_cache: Optional[ExeAliasCache] = None
+_cache_checked = False
+_cache_lock = threading.Lock()
+
+
+def get_exe_alias_cache() -> Optional[ExeAliasCache]:
+    """
+    Shared alias cache, stored next to the other caches in the root path.
+
+    Returns:
+        ExeAliasCache or None: None if disabled in the settings ("exe_alias_cache")
+    """
+    global _cache, _cache_checked
+    with _cache_lock:
+        if not _cache_checked:
+            _cache_checked = True
+            if (get_settings() or {}).get("exe_alias_cache", True):
+                _cache = ExeAliasCache(os.path.join(get_root_path(), ".exe_aliases.json"))
+        return _cache
@@ -1,10 +1,231 @@
 from .logging_config import get_logger
+from .get_settings import get_settings
 from pathlib import Path
-import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import time
 from .find_best_exe import find_best_exe
+from .exe_alias_cache import get_exe_alias_cache
+from .ahk_worker import WorkerError, WorkerUnavailable, get_ahk_worker_pool
+from .process_runner import get_process_runner
 
 logger = get_logger(__name__)
 
+# Tempo máximo (s) de cada módulo antes de ser encerrado; os que esperam
+# janelas ou rodam o SoundVolumeView levam mais. "ahk_command_timeouts"
+# nas configurações sobrescreve por módulo.
+SCRIPT_TIMEOUTS = {
+    "launch_app": 30,
+    "launch_chrome": 30,
+    "split_screen": 20,
+    "update_app_volume": 20,
+    "set_input_device": 20,
+    "monitor_control": 20,
+}
+DEFAULT_SCRIPT_TIMEOUT = 15
+
+# Código de saída de um módulo encerrado por tempo (como o `timeout` do coreutils)
+TIMEOUT_EXIT_CODE = 124
+
+_timeouts: Optional[Dict[str, float]] = None
+
+# Módulos que abrem o app com Run e aceitam o caminho do exe em --app
+ALIAS_SCRIPTS = {"launch_app"}
+
+
+def script_timeout(script: str) -> float:
+    """Deadline in seconds for one run of the module `script` ("max", "max.exe", ...)."""
+    global _timeouts
+    if _timeouts is None:
+        _timeouts = {**SCRIPT_TIMEOUTS, **((get_settings() or {}).get("ahk_command_timeouts") or {})}
+    return float(_timeouts.get(Path(script).stem, DEFAULT_SCRIPT_TIMEOUT))
+
+
+def _run_script(call_params: list, modules_dir: Path):
+    """
+    Runs a module on the AHK worker pool when available, otherwise as its
+    own process (no shell), killed if it outlives its deadline.
+
+    Returns:
+        tuple: (return code, stdout); TIMEOUT_EXIT_CODE if it timed out
+    """
+    script = Path(call_params[0]).stem
+    timeout = script_timeout(script)
+    pool = get_ahk_worker_pool(modules_dir)
+    if pool is not None:
+        try:
+            return pool.run(script, call_params[1:], timeout)
+        except WorkerUnavailable as e:
+            logger.warning(f"Worker AHK indisponível ({e}), executando {script} em processo próprio")
+        except WorkerError as e:
+            # O comando pode ter rodado em parte: não repete em outro processo
+            return 1, f"Erro ao executar {script} no worker AHK: {e}"
+    result = get_process_runner().run(call_params, timeout=timeout)
+    if result.timed_out:
+        return TIMEOUT_EXIT_CODE, f"Erro: {script} excedeu {timeout:g} s e foi encerrado"
+    return result.returncode, result.stdout
+
+
+def _with_cached_exe(script: str, call_params: list) -> Tuple[list, Optional[str]]:
+    """
+    Swaps the --app name for the exe it was resolved to before, if the
+    alias cache has it, so known names skip the find_best_exe search. Only
+    for the modules that Run the app (ALIAS_SCRIPTS): the others find the
+    window by title or process name, which a full exe path does not match.
+
+    Returns:
+        tuple: (call params, app name that was swapped or None)
+    """
+    cache = get_exe_alias_cache()
+    if (cache is None or Path(script).stem not in ALIAS_SCRIPTS
+            or "--app" not in call_params[:-1]):
+        return call_params, None
+    index = call_params.index("--app") + 1
+    app_name = call_params[index]
+    exe = cache.get(app_name)
+    if exe is None or exe == app_name:
+        return call_params, None
+    logger.info(f"Usando exe em cache para '{app_name}': {exe}")
+    call_params = list(call_params)
+    call_params[index] = exe
+    return call_params, app_name
+
+
+def _retry_with_best_exe(call_params: list, app_name: str, modules_dir: Path):
+    """
+    Runs the module again with --app pointing to the best matching exe,
+    remembering the exe in the alias cache if that works.
+
+    Returns:
+        tuple: (return code, stdout)
+    """
+    logger.info(
+        f"Falha ao executar app do caminho simples, tentando com exe melhorado.")
+    improved_exe = find_best_exe(app_name, verbose=False)
+    if (not improved_exe):
+        error_msg = f"Falha ao encontrar exe melhorado para {app_name}, execução do app falhou completamente."
+        logger.error(error_msg)
+        return 1, error_msg
+
+    call_params = list(call_params)
+    call_params[call_params.index('--app') + 1] = str(improved_exe)
+    logger.info(f"Executando comando: {' '.join(call_params)}")
+    returncode, output = _run_script(call_params, modules_dir)
+    cache = get_exe_alias_cache()
+    if returncode == 0 and cache is not None:
+        cache.put(app_name, str(improved_exe))
+    return returncode, output
+
+
+def _retry_without_cached_exe(call_params: list, app_name: str, modules_dir: Path):
+    """
+    The exe cached for `app_name` failed (moved, uninstalled, new versioned
+    path): drops it from the alias cache and tries once more through the
+    find_best_exe fallback with the original name.
+
+    Returns:
+        tuple: (return code, stdout)
+    """
+    logger.info(f"Exe em cache para '{app_name}' falhou, descartando e buscando de novo")
+    cache = get_exe_alias_cache()
+    if cache is not None:
+        cache.invalidate(app_name)
+    return _retry_with_best_exe(call_params, app_name, modules_dir)
+
+
+def _run_batch(actions: List[Dict[str, Any]], modules_dir: Path) -> Optional[List[Dict[str, Any]]]:
+    """
+    Runs the actions in order in one invocation: one request to the worker
+    pool or, without it, one batch.exe process.
+
+    Returns:
+        list or None: One {"script", "exit_code", "output"} per action, or
+        None if neither the worker nor batch.exe is available
+    """
+    def failed(message: str, code: int = 1) -> List[Dict[str, Any]]:
+        return [{"script": a["script"], "exit_code": code, "output": message} for a in actions]
+
+    timeout = sum(script_timeout(a["script"]) for a in actions)
+    pool = get_ahk_worker_pool(modules_dir)
+    if pool is not None:
+        try:
+            return pool.run_batch(actions, timeout)
+        except WorkerUnavailable as e:
+            logger.warning(f"Worker AHK indisponível ({e}), executando o lote em processo próprio")
+        except WorkerError as e:
+            # Parte do lote pode ter rodado: não repete em outro processo
+            return failed(f"Erro ao executar lote no worker AHK: {e}")
+
+    batch_exe = modules_dir / "batch.exe"
+    if not batch_exe.exists():
+        return None
+    result = get_process_runner().run(
+        [batch_exe], timeout=timeout, input=json.dumps(actions, ensure_ascii=False))
+    if result.timed_out:
+        return failed(f"Erro: lote excedeu {timeout:g} s e foi encerrado", TIMEOUT_EXIT_CODE)
+    try:
+        results = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        return failed(f"Saída inválida do batch.exe (código {result.returncode}): {result.stdout[:200]}")
+    if not isinstance(results, list) or len(results) != len(actions):
+        return failed(f"Saída inválida do batch.exe: {result.stdout[:200]}")
+    return results
+
+
+def exec_ahk_batch(cmds: List[dict], modules_dir: Path) -> List[Dict[str, Any]]:
+    """
+    Execute several AutoHotkey commands in order with a single invocation
+    (one worker request or one batch.exe process) instead of one process
+    per command. A failed command does not stop the ones after it.
+
+    Args:
+        cmds (List[dict]): Commands as {"script": "max.exe", "params": [...]}
+        modules_dir (Path): Path to modules directory
+
+    Returns:
+        List[dict]: One {"script", "exit_code", "output"} per command, in order
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(cmds)
+    actions, positions = [], []
+    for index, cmd in enumerate(cmds):
+        script_name = cmd.get("script", "")
+        if not script_name or not (modules_dir / script_name).exists():
+            error_msg = (f"Script não encontrado: {modules_dir / script_name}" if script_name
+                         else "Comando está faltando nome do script")
+            logger.error(error_msg)
+            results[index] = {"script": script_name, "exit_code": 2, "output": error_msg}
+            continue
+        params, cached_for = _with_cached_exe(
+            script_name, [str(p) for p in cmd.get("params", [])])
+        actions.append({"script": Path(script_name).stem, "params": params})
+        positions.append((index, cached_for))
+
+    started = time.perf_counter()
+    batch_results = _run_batch(actions, modules_dir) if actions else []
+    if batch_results is None:
+        # Binários antigos, sem worker.exe nem batch.exe
+        batch_results = []
+        for action in actions:
+            code, output = _run_script(
+                [str(modules_dir / f"{action['script']}.exe")] + action["params"], modules_dir)
+            batch_results.append({"script": action["script"], "exit_code": code, "output": output})
+    logger.info(
+        f"Lote de {len(actions)} comandos executado em {(time.perf_counter() - started) * 1000:.0f} ms: "
+        + ", ".join(f"{r.get('script')}={r.get('exit_code')}" for r in batch_results))
+
+    for (index, cached_for), action, result in zip(positions, actions, batch_results):
+        code, output = int(result.get("exit_code", 1)), str(result.get("output") or "")
+        params = action["params"]
+        if code not in (0, TIMEOUT_EXIT_CODE) and "--app" in params[:-1]:
+            call_params = [str(modules_dir / f"{action['script']}.exe")] + params
+            if cached_for:
+                code, output = _retry_without_cached_exe(call_params, cached_for, modules_dir)
+            else:
+                code, output = _retry_with_best_exe(
+                    call_params, params[params.index("--app") + 1], modules_dir)
+        results[index] = {"script": cmds[index].get("script", ""), "exit_code": code, "output": output}
+    return results
+
 
 def exec_ahk_command(cmd: dict, modules_dir: Path):
     """
@@ -36,28 +257,20 @@ def exec_ahk_command(cmd: dict, modules_dir: Path):
             logger.error(error_msg)
             return error_msg
 
-        call_params = [str(script_path)] + [str(p) for p in params]
+        call_params, cached_for = _with_cached_exe(
+            script_name, [str(script_path)] + [str(p) for p in params])
         logger.info(f"Executando comando: {' '.join(call_params)}")
-        result = subprocess.run(call_params, shell=True,
-                                capture_output=True, text=True)
-
-        if (result.returncode != 0 and app_name):
-            logger.info(
-                f"Falha ao executar app do caminho simples, tentando com exe melhorado.")
-            improved_exe = find_best_exe(app_name, verbose=False)
-            if (not improved_exe):
-                error_msg = f"Falha ao encontrar exe melhorado para {app_name}, execução do app falhou completamente."
-                logger.error(error_msg)
-                return error_msg
-
-            call_params[call_params.index('--app') + 1] = str(improved_exe)
-            logger.info(f"Executando comando: {' '.join(call_params)}")
-            result = subprocess.run(call_params, shell=True,
-                                    capture_output=True, text=True)
-            return result.stdout
+        returncode, output = _run_script(call_params, modules_dir)
+
+        # Um módulo que travou não é repetido com outro exe; o exe em cache
+        # que falhou sai do cache antes da busca
+        if returncode not in (0, TIMEOUT_EXIT_CODE) and app_name:
+            if cached_for:
+                return _retry_without_cached_exe(call_params, cached_for, modules_dir)[1]
+            return _retry_with_best_exe(call_params, app_name, modules_dir)[1]
 
         logger.info(f"Comando executado com sucesso: {script_name}")
-        return result.stdout
+        return output
 
     except Exception as e:
         logger.exception(f"Erro ao executar comando {cmd}: {e}")
@@ -22,12 +22,40 @@ def get_settings() -> Dict[str, Any]:
 
     default_settings = {
         "wake_phrase": "ola jarvis",
+        "wake_aliases": [],
         "execution_plans": [],
         "chrome_profiles": [],
         "llm_provider": "ollama",
         "llm_model": None,
         "openai_api_key": None,
-        "openai_base_url": None
+        "openai_base_url": None,
+        "asr_backend": "google",
+        "asr_model_path": None,
+        "intent_fast_path": True,
+        "command_cache_size": 256,
+        "intent_index": True,
+        "embedding_model": "",
+        "intent_similarity_threshold": 0.9,
+        "stream_tool_calls": True,
+        "tool_workers": 4,
+        "ollama_keep_alive": -1,
+        "prompt_retrieval": True,
+        "prompt_top_k_apps": 5,
+        "prompt_top_k_plans": 3,
+        "prompt_context_budget": 400,
+        "tool_routing": True,
+        "compact_tool_schemas": True,
+        "plan_timeout": 120,
+        "plan_step_timeout": 30,
+        "ahk_worker": True,
+        "ahk_workers": 4,
+        "ahk_worker_timeout": 60,
+        "ahk_worker_health_interval": 30,
+        "ahk_batch": True,
+        "process_concurrency": 4,
+        "process_timeout": 30,
+        "ahk_command_timeouts": {},
+        "exe_alias_cache": True
     }
 
     try:
@@ -11,6 +11,7 @@ logger = get_logger(__name__)
 
 OLLAMA_URL = "http://localhost:11434"
 REQUIRED_MODEL = "llama3.1:8b"
+EMBEDDING_MODEL = "nomic-embed-text"
 DOWNLOAD_TIMEOUT = 1800
 SERVICE_TIMEOUT = 60
 
@@ -22,10 +23,14 @@ class OllamaManager:
         self.system = platform.system().lower()
         self.architecture = platform.machine().lower()
 
-    def ensure_ollama_ready(self) -> bool:
+    def ensure_ollama_ready(self, embedding_model: str = None) -> bool:
         """
         Garante que o Ollama esteja instalado, rodando e com o modelo necessário.
 
+        Args:
+            embedding_model: Modelo de embedding do índice de intenções, se
+                habilitado. Falha no download dele não impede o uso.
+
         Returns:
             bool: True se tudo estiver configurado corretamente
         """
@@ -53,6 +58,13 @@ class OllamaManager:
                         f"Falha no download do modelo {REQUIRED_MODEL}")
                     return False
 
+            if embedding_model and not self._is_model_available(embedding_model):
+                logger.info(
+                    f"Modelo de embedding {embedding_model} não encontrado. Iniciando download...")
+                if not self._pull_model(embedding_model):
+                    logger.warning(
+                        f"Falha no download do modelo {embedding_model}; índice de intenções ficará inativo")
+
             logger.info("Ollama configurado e pronto para uso!")
             return True
 
@@ -249,15 +261,18 @@ class OllamaManager:
             return False
 
 
-def ensure_ollama_ready() -> bool:
+def ensure_ollama_ready(embedding_model: str = None) -> bool:
     """
     Função de conveniência para garantir que o Ollama esteja pronto.
 
+    Args:
+        embedding_model: Modelo de embedding a baixar também, se houver
+
     Returns:
         bool: True se o Ollama estiver configurado e pronto para uso
     """
     manager = OllamaManager()
-    return manager.ensure_ollama_ready()
+    return manager.ensure_ollama_ready(embedding_model)
 
 
 def wait_for_ollama_service(timeout: float = 60.0, check_interval: float = 0.5, url: str = OLLAMA_URL) -> bool:
@@ -0,0 +1,243 @@
+from .logging_config import get_logger
+from .get_settings import get_settings
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Sequence
+import asyncio
+import os
+import statistics
+import subprocess
+import threading
+import time
+
+logger = get_logger(__name__)
+
+# Sem janela de console para cada processo no Windows
+_CREATION_FLAGS = getattr(subprocess, "CREATE_NO_WINDOW", 0) if os.name == "nt" else 0
+
+# Quanto esperar pela saída de um processo depois de matá-lo
+_DRAIN_SECONDS = 1.0
+
+
+@dataclass
+class ProcessResult:
+    """Outcome of one process run; `returncode` is None when it was killed on timeout."""
+    args: List[str]
+    returncode: Optional[int]
+    stdout: str = ""
+    stderr: str = ""
+    timed_out: bool = False
+    queue_ms: float = 0.0
+    spawn_ms: float = 0.0
+    exit_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+
+@dataclass
+class ProcessTiming:
+    """Latency record kept for every call (see ProcessRunner.records)."""
+    name: str
+    returncode: Optional[int]
+    timed_out: bool
+    queue_ms: float
+    spawn_ms: float
+    exit_ms: float
+    at: float
+
+
+class ProcessRunner:
+    """
+    Runs external programs without a shell, with a deadline per call and a
+    bound on how many run at once.
+
+    A process that outlives its timeout is killed and reported with
+    `timed_out` set, so a hung script cannot block its caller. `run` is the
+    blocking API and `run_async` the asyncio one; both share the same
+    concurrency limit. Every call records how long it waited for a slot,
+    how long the spawn took and how long until the process exited.
+    """
+
+    def __init__(self, max_concurrency: int = 4, default_timeout: Optional[float] = 30,
+                 history: int = 500):
+        self.max_concurrency = max(1, max_concurrency)
+        self.default_timeout = default_timeout
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._records: Deque[ProcessTiming] = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def run(self, args: Sequence[Any], timeout: Optional[float] = None,
+            input: Optional[str] = None, cwd: Optional[str] = None) -> ProcessResult:
+        """
+        Runs a program and waits for it.
+
+        Args:
+            args (Sequence): Program and arguments; no shell is involved.
+            timeout (float, optional): Seconds before the process is killed
+                (default_timeout when omitted).
+            input (str, optional): Text written to the process's stdin.
+            cwd (str, optional): Working directory.
+
+        Returns:
+            ProcessResult: Exit code, output and timings. A program that
+            cannot be started yields returncode -1 and the error in stderr.
+        """
+        args = [str(arg) for arg in args]
+        timeout = self.default_timeout if timeout is None else timeout
+        requested = time.perf_counter()
+        with self._slots:
+            started = time.perf_counter()
+            try:
+                process = subprocess.Popen(
+                    args, cwd=cwd, stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                    encoding="utf-8", errors="replace", creationflags=_CREATION_FLAGS)
+            except OSError as e:
+                return self._finish(ProcessResult(args, -1, stderr=str(e),
+                                                  queue_ms=(started - requested) * 1000))
+            spawned = time.perf_counter()
+            timed_out = False
+            try:
+                stdout, stderr = process.communicate(input, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                stdout, stderr = self._kill(process)
+            exited = time.perf_counter()
+        return self._finish(ProcessResult(
+            args, None if timed_out else process.returncode, stdout or "", stderr or "",
+            timed_out, (started - requested) * 1000, (spawned - started) * 1000,
+            (exited - spawned) * 1000))
+
+    async def run_async(self, args: Sequence[Any], timeout: Optional[float] = None,
+                        input: Optional[str] = None, cwd: Optional[str] = None) -> ProcessResult:
+        """
+        asyncio version of `run`: the event loop keeps running while the
+        process does. Cancelling the task kills the process.
+        """
+        args = [str(arg) for arg in args]
+        timeout = self.default_timeout if timeout is None else timeout
+        requested = time.perf_counter()
+        await self._acquire_async()
+        try:
+            started = time.perf_counter()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *args, cwd=cwd,
+                    stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                    stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=_CREATION_FLAGS)
+            except OSError as e:
+                return self._finish(ProcessResult(args, -1, stderr=str(e),
+                                                  queue_ms=(started - requested) * 1000))
+            spawned = time.perf_counter()
+            timed_out = False
+            data = input.encode("utf-8") if input is not None else None
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(data), timeout)
+            except asyncio.TimeoutError:
+                timed_out = True
+                process.kill()
+                try:
+                    stdout, stderr = await asyncio.wait_for(process.communicate(), _DRAIN_SECONDS)
+                except asyncio.TimeoutError:
+                    # Um filho do processo ainda segura os pipes: fecha sem a saída
+                    stdout, stderr = b"", b""
+                    transport = getattr(process, "_transport", None)
+                    if transport is not None:
+                        transport.close()
+                    await process.wait()
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                raise
+            exited = time.perf_counter()
+        finally:
+            self._slots.release()
+        return self._finish(ProcessResult(
+            args, None if timed_out else process.returncode,
+            (stdout or b"").decode("utf-8", errors="replace"),
+            (stderr or b"").decode("utf-8", errors="replace"),
+            timed_out, (started - requested) * 1000, (spawned - started) * 1000,
+            (exited - spawned) * 1000))
+
+    def records(self) -> List[ProcessTiming]:
+        """Latency records of the most recent calls, oldest first."""
+        with self._lock:
+            return list(self._records)
+
+    def stats(self) -> Dict[str, Any]:
+        """Call count, timeouts and median / p95 spawn and exit latency in ms."""
+        records = self.records()
+
+        def summary(values: List[float]) -> Dict[str, float]:
+            if not values:
+                return {"p50": 0.0, "p95": 0.0}
+            ordered = sorted(values)
+            return {"p50": round(statistics.median(ordered), 1),
+                    "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1)}
+
+        return {"calls": len(records),
+                "timeouts": sum(1 for r in records if r.timed_out),
+                "spawn_ms": summary([r.spawn_ms for r in records]),
+                "exit_ms": summary([r.exit_ms for r in records])}
+
+    @staticmethod
+    def _kill(process: subprocess.Popen):
+        process.kill()
+        try:
+            return process.communicate(timeout=_DRAIN_SECONDS)
+        except subprocess.TimeoutExpired:
+            # Um filho do processo (RunWait, por exemplo) ainda segura os pipes: desiste da saída
+            for pipe in (process.stdout, process.stderr):
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+            process.wait()
+            return "", ""
+
+    async def _acquire_async(self):
+        if self._slots.acquire(blocking=False):
+            return
+        loop = asyncio.get_running_loop()
+        waiting = loop.run_in_executor(None, self._slots.acquire)
+        try:
+            await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            # A vaga ainda pode chegar depois do cancelamento: devolve assim que chegar
+            waiting.add_done_callback(lambda _: self._slots.release())
+            raise
+
+    def _finish(self, result: ProcessResult) -> ProcessResult:
+        name = Path(result.args[0]).name if result.args else ""
+        with self._lock:
+            self._records.append(ProcessTiming(
+                name, result.returncode, result.timed_out, result.queue_ms,
+                result.spawn_ms, result.exit_ms, time.time()))
+        if result.timed_out:
+            logger.warning(
+                f"{name} excedeu o tempo limite e foi encerrado "
+                f"(spawn {result.spawn_ms:.1f} ms, {result.exit_ms:.0f} ms rodando)")
+        else:
+            logger.debug(
+                f"{name}: código {result.returncode}, fila {result.queue_ms:.1f} ms, "
+                f"spawn {result.spawn_ms:.1f} ms, saída {result.exit_ms:.0f} ms")
+        return result
+
+
+_runner: Optional[ProcessRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_process_runner() -> ProcessRunner:
+    """Shared ProcessRunner, sized by "process_concurrency" in the settings."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            settings = get_settings() or {}
+            _runner = ProcessRunner(
+                max_concurrency=settings.get("process_concurrency", 4),
+                default_timeout=settings.get("process_timeout", 30))
+        return _runner
@@ -36,5 +36,4 @@ def run_startup_plans(executor):
     for plan in startup_plans:
         logger.info(
             f"Executando plano de execução de inicialização: {plan.get('name')}")
-        user_request = f'Execute action plan named "{plan['name']}"'
-        executor.run(data={'input': user_request})
+        executor.run_plan(plan)
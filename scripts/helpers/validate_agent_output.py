@@ -1,12 +1,44 @@
-from typing import Any
+from typing import Any, Iterable
 from helpers.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Mensagens de sucesso impressas pelos módulos AHK (ver modules/*.ahk)
+_SUCCESS_MARKERS = ("successfully", "successful", "sucesso", "set input device to")
 
-def validate_agent_output(result: dict[str, Any]):
+
+def validate_tool_results(results: Iterable[Any]) -> bool:
+    """
+    Checks whether every tool call reported success.
+
+    Args:
+        results (Iterable[Any]): Tool outputs (the strings returned by exec_ahk_command).
+
+    Returns:
+        bool: True if there was at least one result and all of them carry a
+            success message
+    """
+    results = list(results)
+    if not results:
+        return False
+    for result in results:
+        text = str(result or "").lower()
+        if not any(marker in text for marker in _SUCCESS_MARKERS):
+            return False
+    return True
+
+
+def validate_agent_output(result: dict[str, Any]) -> bool:
+    """
+    Logs the agent's steps and warns about repeated tool calls or early stops.
+
+    Returns:
+        bool: True if the agent finished normally, without repeated calls,
+            and every tool call succeeded
+    """
     steps = result.get('intermediate_steps', [])
     seen = set()
+    ok = True
 
     for step in steps:
         log_str = step[0].log.replace(
@@ -16,14 +48,18 @@ def validate_agent_output(result: dict[str, Any]):
         if tool_call in seen:
             logger.warning(
                 f"Chamada de ferramenta repetida detectada: {tool_call}")
+            ok = False
         else:
             seen.add(tool_call)
     if 'output' in result:
         if 'Agent stopped due to max iterations' in result['output']:
             logger.warning(
                 "Agente parou devido ao máximo de iterações - considere aumentar max_iterations")
+            ok = False
         elif 'Agent stopped due to' in result['output']:
             logger.warning(
                 f"Agente parou cedo: {result['output']}")
+            ok = False
         else:
             logger.info("Agente completou tarefa com sucesso")
+    return ok and validate_tool_results(step[1] for step in steps)
@@ -1,6 +1,6 @@
 from .logging_config import get_logger
 from .get_settings import get_settings
-from .ollama_manager import ensure_ollama_ready
+from .ollama_manager import ensure_ollama_ready, EMBEDDING_MODEL
 from pathlib import Path
 from utils import get_root_path
 import speech_recognition as sr
@@ -43,7 +43,11 @@ def validate_user_environment() -> bool:
         settings = get_settings()
         provider = (settings or {}).get("llm_provider", "ollama").lower()
         if provider == "ollama":
-            if not ensure_ollama_ready():
+            embedding_model = None
+            if (settings or {}).get("intent_index", True):
+                embedding_model = (settings or {}).get(
+                    "embedding_model") or EMBEDDING_MODEL
+            if not ensure_ollama_ready(embedding_model):
                 logger.error("Falha ao configurar Ollama e modelo necessário")
                 return False
         else:
@@ -0,0 +1,260 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from helpers import get_logger
+from utils import normalize_text
+import numpy as np
+import json
+import os
+import threading
+import time
+
+logger = get_logger(__name__)
+
+# Palavras que não identificam o alvo do pedido (artigos, preposições,
+# cortesia e verbos de comando); o resto precisa bater entre os dois pedidos
+_STOPWORDS = {
+    "o", "a", "os", "as", "um", "uma", "do", "da", "dos", "das", "de", "no",
+    "na", "nos", "nas", "em", "para", "pra", "pro", "por", "favor", "me",
+    "mim", "pode", "poderia", "voce", "quero", "que", "agora", "ai", "la",
+    "janela", "aplicativo", "app", "programa", "ola", "jarvis",
+}
+# Radicais dos verbos de comando, pela ação que pedem; dois pedidos só
+# compartilham um plano se pedirem as mesmas ações ("abre" x "fecha")
+_ACTION_STEMS = {
+    "open": ("abr", "inici", "execut", "lanc", "rod", "carreg", "entr", "acess",
+             "mostr", "traz"),
+    "close": ("fech", "encerr", "finaliz"),
+    "max": ("maximiz",),
+    "min": ("minimiz",),
+    "move": ("mov", "coloc", "jog", "mand", "pass", "bot", "deix"),
+    "volume_up": ("aument", "sob"),
+    "volume_down": ("diminu", "abaix", "baix", "reduz"),
+    "on": ("lig", "ativ"),
+    "off": ("deslig", "desativ"),
+}
+_VERB_STEMS = tuple(stem for stems in _ACTION_STEMS.values() for stem in stems)
+
+# Linhas acrescentadas à matriz de vetores de cada vez
+_GROW_ROWS = 1024
+# Segundos entre um pedido novo e a gravação do índice em disco
+_SAVE_DELAY = 2.0
+
+
+def content_tokens(text: str) -> frozenset:
+    """Tokens of a request that name what it acts on (apps, sides, monitors...)."""
+    return frozenset(
+        token for token in normalize_text(text).split()
+        if token not in _STOPWORDS and not token.startswith(_VERB_STEMS))
+
+
+def action_classes(text: str) -> frozenset:
+    """Actions a request asks for ("open", "close", "volume_up", ...), from its command verbs."""
+    actions = set()
+    for token in normalize_text(text).split():
+        for action, stems in _ACTION_STEMS.items():
+            if token.startswith(stems):
+                actions.add(action)
+                break
+    return frozenset(actions)
+
+
+def guard_key(text: str) -> Tuple[frozenset, frozenset]:
+    """What two requests must share for one to reuse the other's plan: targets and actions."""
+    return content_tokens(text), action_classes(text)
+
+
+class IntentIndex:
+    """
+    Nearest-neighbor index over embeddings of requests that the agent
+    already handled successfully, used to reuse a tool plan for paraphrases
+    ("inicia spotify" -> plan of "abre o spotify pra mim").
+
+    Vectors are L2-normalized and kept in a float32 matrix in memory, so a
+    lookup is one matrix-vector product plus argmax (a few ms for tens of
+    thousands of rows); on disk they are stored as float16 in an .npz file
+    together with the requests, their plans and the fingerprint they were
+    built under (a different fingerprint discards the file).
+
+    Embeddings are similar for requests with the same shape but a different
+    target ("abre o chrome" vs "abre o spotify") or the opposite action
+    ("abre o spotify" vs "fecha o spotify"), so a neighbor is only reused
+    when the similarity passes `threshold` AND both requests have the same
+    content tokens and action classes (see guard_key).
+
+    The matrix grows in chunks and each request maps to its row, so adding
+    one is O(1) amortized; the file is rewritten in the background a moment
+    after the last change instead of on the request path.
+    """
+
+    EMBED_RETRY_SECONDS = 300
+
+    def __init__(self, path: str, fingerprint: str, embed: Callable[[str], List[float]],
+                 threshold: float = 0.9, max_entries: int = 20000, top_k: int = 5):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.top_k = top_k
+        self._embed = embed
+        self._embed_retry_at = 0.0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer: Optional[threading.Timer] = None
+        # Só as primeiras len(self._requests) linhas de _vectors estão em uso
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._requests: List[str] = []
+        self._plans: List[List[Dict[str, Any]]] = []
+        self._guards: List[Tuple[frozenset, frozenset]] = []
+        self._rows: Dict[str, int] = {}
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def embed(self, request: str) -> Optional[np.ndarray]:
+        """
+        Returns:
+            np.ndarray or None: L2-normalized embedding, or None if the
+            embedding model is unavailable
+        """
+        if time.time() < self._embed_retry_at:
+            return None
+        try:
+            vector = np.asarray(self._embed(normalize_text(request)), dtype=np.float32)
+        except Exception as e:
+            # Sem o modelo de embedding (Ollama fora do ar, modelo não baixado) não insiste a cada pedido
+            self._embed_retry_at = time.time() + self.EMBED_RETRY_SECONDS
+            logger.warning(
+                f"Falha ao gerar embedding do pedido: {e}. Nova tentativa em {self.EMBED_RETRY_SECONDS} s")
+            return None
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def lookup(self, request: str, vector: np.ndarray) -> Optional[Tuple[List[Dict[str, Any]], float, str]]:
+        """
+        Finds a stored request similar enough to reuse its plan.
+
+        Args:
+            request (str): Incoming request.
+            vector (np.ndarray): Its embedding, from `embed`.
+
+        Returns:
+            tuple or None: (tool calls, similarity, matched request), or None
+        """
+        guard = guard_key(request)
+        with self._lock:
+            if not self._requests or self._vectors.shape[1] != vector.shape[0]:
+                return None
+            scores = self._vectors[:len(self._requests)] @ vector
+            k = min(self.top_k, len(scores))
+            candidates = np.argpartition(-scores, k - 1)[:k]
+            for index in candidates[np.argsort(-scores[candidates])]:
+                score = float(scores[index])
+                if score < self.threshold:
+                    break
+                if self._guards[index] == guard:
+                    return [dict(call) for call in self._plans[index]], score, self._requests[index]
+        return None
+
+    def add(self, request: str, vector: np.ndarray, tool_calls: List[Dict[str, Any]]):
+        """Stores a successful request with its plan, replacing an identical request."""
+        key = " ".join(normalize_text(request).split())
+        if not key or not tool_calls or vector is None:
+            return
+        plan = [{"name": c["name"], "args": c["args"]} for c in tool_calls]
+        with self._lock:
+            if self._requests and self._vectors.shape[1] != vector.shape[0]:
+                # Modelo de embedding mudou de dimensão: recomeça o índice
+                self._clear_locked()
+            index = self._rows.get(key)
+            if index is not None:
+                self._vectors[index] = vector
+                self._plans[index] = plan
+            else:
+                if len(self._requests) >= self.max_entries:
+                    self._evict_locked()
+                index = len(self._requests)
+                if index >= self._vectors.shape[0]:
+                    grown = np.zeros((index + _GROW_ROWS, vector.shape[0]), dtype=np.float32)
+                    if index:
+                        grown[:index] = self._vectors[:index]
+                    self._vectors = grown
+                self._vectors[index] = vector
+                self._requests.append(key)
+                self._plans.append(plan)
+                self._guards.append(guard_key(key))
+                self._rows[key] = index
+            self._schedule_save_locked()
+
+    def flush(self):
+        """Writes pending changes to disk now (normally done in the background)."""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self._save()
+
+    def _evict_locked(self):
+        # Descarta os 10% mais antigos de uma vez, para não deslocar a matriz a cada pedido
+        drop = max(1, self.max_entries // 10)
+        count = len(self._requests)
+        self._vectors[:count - drop] = self._vectors[drop:count]
+        del self._requests[:drop]
+        del self._plans[:drop]
+        del self._guards[:drop]
+        self._rows = {key: index for index, key in enumerate(self._requests)}
+
+    def _clear_locked(self):
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._requests, self._plans, self._guards = [], [], []
+        self._rows = {}
+
+    def _schedule_save_locked(self):
+        if self._save_timer is not None:
+            return
+        # Timer não-daemon: um pedido recém-gravado ainda vai para o disco se o app fechar
+        self._save_timer = threading.Timer(_SAVE_DELAY, self._save_from_timer)
+        self._save_timer.start()
+
+    def _save_from_timer(self):
+        with self._lock:
+            self._save_timer = None
+        self._save()
+
+    def _load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            started = time.perf_counter()
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(data["meta"].tobytes().decode("utf-8"))
+                if meta.get("fingerprint") != self.fingerprint:
+                    logger.info(
+                        "Configurações, ferramentas ou modelo mudaram; índice de intenções descartado")
+                    return
+                self._vectors = data["vectors"].astype(np.float32)
+            self._requests = meta["requests"]
+            self._plans = meta["plans"]
+            self._guards = [guard_key(r) for r in self._requests]
+            self._rows = {key: index for index, key in enumerate(self._requests)}
+            logger.debug(
+                f"Índice de intenções carregado: {len(self._requests)} pedidos em "
+                f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        except Exception as e:
+            logger.warning(f"Falha ao carregar índice de intenções: {e}")
+            self._clear_locked()
+
+    def _save(self):
+        # Copia o estado sob o lock e grava fora dele: lookups não esperam o disco
+        with self._lock:
+            count = len(self._requests)
+            vectors = self._vectors[:count].astype(np.float16)
+            requests, plans = list(self._requests), list(self._plans)
+        try:
+            meta = json.dumps({"fingerprint": self.fingerprint, "requests": requests,
+                               "plans": plans}, ensure_ascii=False).encode("utf-8")
+            with self._save_lock:
+                temp_path = self.path + ".tmp.npz"
+                np.savez(temp_path, vectors=vectors, meta=np.frombuffer(meta, dtype=np.uint8))
+                os.replace(temp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Falha ao salvar índice de intenções: {e}")
@@ -0,0 +1,198 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from helpers import get_logger
+from utils import normalize_text
+from rapidfuzz import fuzz
+import re
+import threading
+import time
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class Intent:
+    """A command resolved without the LLM: which tool to call and with what."""
+    tool: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    rule: str = ""
+
+
+_POLITE_PREFIX = re.compile(
+    r"^(?:(?:por favor|porfavor|pode|poderia|voce pode|voce poderia|"
+    r"quero que voce|quero que|eu quero que|da pra|consegue|me)\s+)+")
+_POLITE_SUFFIX = re.compile(r"\s+(?:por favor|pra mim|para mim|agora)$")
+
+# Artigos e "janela do" no início do nome do app
+_APP_PREFIX = re.compile(
+    r"^(?:(?:o|a|os|as|do|da|no|na|aplicativo|app|programa|janela)\s+)+")
+
+# Qualquer um destes dentro do nome do app indica pedido composto ou com contexto: vai para o LLM
+_AMBIGUOUS_WORDS = {
+    "e", "depois", "entao", "tambem", "com", "mais", "todos", "todas",
+    "tudo", "plano", "se", "quando", "nao", "ou", "isso", "aquilo",
+}
+
+_NUMBER_WORDS = {
+    "um": 1, "uma": 1, "primeiro": 1, "primeira": 1, "dois": 2, "duas": 2,
+    "segundo": 2, "segunda": 2, "tres": 3, "terceiro": 3, "terceira": 3,
+    "quatro": 4, "cinco": 5, "dez": 10, "quinze": 15, "vinte": 20,
+    "trinta": 30, "quarenta": 40, "cinquenta": 50, "cem": 100,
+}
+
+_POSITIONS = {
+    "esquerda": "Left", "direita": "Right", "cima": "Top", "topo": "Top",
+    "baixo": "Bottom", "tela cheia": "Maximized",
+}
+
+_APP = r"(?P<app>[a-z0-9][a-z0-9 ]{0,40}?)"
+_NUMBER = r"(?:\d{1,3}|" + "|".join(_NUMBER_WORDS) + r")"
+_MONITOR = rf"(?:\s+(?:no|na|para o|para a|pro|pra)\s+(?:monitor|tela)\s+(?P<monitor>{_NUMBER}))?"
+
+_RULES: List[Tuple[str, str, "re.Pattern[str]"]] = [
+    ("launch", "launch_app", re.compile(
+        rf"^(?:abr(?:e|ir|a)|inici(?:a|ar|e)|execut(?:a|ar|e)|lanc(?:a|ar|e)|rod(?:a|ar|e))\s+{_APP}$")),
+    ("close", "close_app", re.compile(
+        rf"^(?:fech(?:a|ar|e)|encerr(?:a|ar|e)|finaliz(?:a|ar|e))\s+{_APP}$")),
+    ("maximize", "max_app", re.compile(
+        rf"^maximiz(?:a|ar|e)\s+{_APP}$")),
+    ("minimize", "min_app", re.compile(
+        rf"^minimiz(?:a|ar|e)\s+{_APP}$")),
+    ("move", "move_window", re.compile(
+        rf"^(?:mov(?:e|er|a)|coloc(?:a|ar|que)|jog(?:a|ar|ue)|mand(?:a|ar|e)|pass(?:a|ar|e))\s+{_APP}"
+        rf"\s+(?:para|pra|pro|a|na|no)\s+(?:a\s+|o\s+)?(?P<position>esquerda|direita|cima|topo|baixo|tela cheia)"
+        rf"{_MONITOR}$")),
+    ("move_monitor", "move_window", re.compile(
+        rf"^(?:mov(?:e|er|a)|coloc(?:a|ar|que)|jog(?:a|ar|ue)|mand(?:a|ar|e)|pass(?:a|ar|e))\s+{_APP}"
+        rf"\s+(?:para o|para a|pro|pra|no|na)\s+(?:monitor|tela)\s+(?P<monitor>{_NUMBER})$")),
+    ("volume", "update_app_volume", re.compile(
+        rf"^(?P<direction>aument(?:a|ar|e)|sob(?:e|ir|a)|diminu(?:i|ir|a)|abaix(?:a|ar|e)|baix(?:a|ar|e)|reduz(?:ir)?)"
+        rf"\s+(?:o\s+)?(?:volume|som)(?:\s+(?:do|da|de)\s+{_APP})?"
+        # Só "em N" (variação); "para N" é volume absoluto, que a ferramenta não faz
+        rf"(?:\s+em\s+(?P<value>{_NUMBER})(?:\s+por\s*cento)?)?$")),
+]
+
+_VOLUME_UP = ("aument", "sob")
+
+
+class IntentParser:
+    """
+    Rule-based parser for the most common single-action voice commands
+    (abrir/fechar/maximizar/minimizar/mover/volume), in Portuguese.
+
+    Each rule is an anchored regex over the normalized request, so a command
+    only matches when the whole sentence fits the shape. Polite prefixes
+    ("por favor", "pode", ...) and articles are stripped; custom apps from
+    settings.json are resolved to their exe path the same way the LLM
+    prompt asks for. Compound requests ("abre o chrome e o spotify"),
+    execution plan names and anything else outside the grammar return None
+    and go to the LLM.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]] = None):
+        settings = settings or {}
+        self._custom_apps = {
+            normalize_text(app.get("name", "")): app.get("exe_path", "")
+            for app in settings.get("custom_apps", []) or []
+            if app.get("name") and app.get("exe_path")
+        }
+        self._plan_names = {
+            normalize_text(plan.get("name", ""))
+            for plan in settings.get("execution_plans", []) or []
+            if plan.get("name")
+        }
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {
+            "requests": 0, "hits": 0, "parse_seconds": 0.0}
+
+    def parse(self, text: str) -> Optional[Intent]:
+        """
+        Args:
+            text (str): User request as recognized.
+
+        Returns:
+            Intent or None: The tool call, or None if the request must go to the LLM
+        """
+        started = time.perf_counter()
+        intent = self._parse(text)
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["parse_seconds"] += time.perf_counter() - started
+            if intent:
+                self._counters["hits"] += 1
+        return intent
+
+    def stats(self) -> Dict[str, float]:
+        """Requests seen, fast-path hit rate and average parse time."""
+        with self._lock:
+            counters = dict(self._counters)
+        requests = counters["requests"] or 1
+        return {
+            "requests": int(counters["requests"]),
+            "hits": int(counters["hits"]),
+            "hit_rate": round(counters["hits"] / requests, 3),
+            "avg_parse_ms": round(counters["parse_seconds"] / requests * 1000, 3),
+        }
+
+    def _parse(self, text: str) -> Optional[Intent]:
+        normalized = " ".join(normalize_text(text).split())
+        normalized = _POLITE_PREFIX.sub("", normalized)
+        normalized = _POLITE_SUFFIX.sub("", normalized)
+        if not normalized or normalized in self._plan_names:
+            return None
+
+        for rule, tool, pattern in _RULES:
+            match = pattern.match(normalized)
+            if not match:
+                continue
+            groups = match.groupdict()
+            app = self._clean_app(groups.get("app"))
+            if groups.get("app") and app is None:
+                return None
+
+            if tool == "update_app_volume":
+                action = "aumentar" if groups["direction"].startswith(
+                    _VOLUME_UP) else "diminuir"
+                args: Dict[str, Any] = {"action": action}
+                if groups.get("value"):
+                    args["value"] = self._number(groups["value"])
+                if app:
+                    args["app"] = app
+                return Intent(tool, args, rule)
+
+            if tool == "move_window":
+                args = {"app": app,
+                        "position": _POSITIONS.get(groups.get("position") or "", "Maximized")}
+                if groups.get("monitor"):
+                    args["monitor_index"] = self._number(groups["monitor"])
+                return Intent(tool, args, rule)
+
+            if tool == "launch_app":
+                return Intent(tool, {"app_name_or_exe": self._resolve_custom_app(app)}, rule)
+
+            return Intent(tool, {"app": app}, rule)
+        return None
+
+    def _clean_app(self, app: Optional[str]) -> Optional[str]:
+        if not app:
+            return None
+        app = _APP_PREFIX.sub("", app.strip())
+        tokens = app.split()
+        if not tokens or len(tokens) > 3 or _AMBIGUOUS_WORDS.intersection(tokens):
+            return None
+        if app in self._plan_names:
+            return None
+        return app
+
+    def _resolve_custom_app(self, app: str) -> str:
+        if app in self._custom_apps:
+            return self._custom_apps[app]
+        best = max(self._custom_apps, default=None,
+                   key=lambda name: fuzz.ratio(app, name))
+        if best is not None and fuzz.ratio(app, best) >= 90:
+            return self._custom_apps[best]
+        return app
+
+    @staticmethod
+    def _number(value: str) -> int:
+        return int(value) if value.isdigit() else _NUMBER_WORDS[value]
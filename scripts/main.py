@@ -1,8 +1,11 @@
 from assistant import Assistant
 from executor import Executor
-from utils import initiate_shutdown, shutdown_listener, normalize_text
-from helpers import get_settings, validate_user_environment, validate_script_access, setup_logging, get_logger, run_startup_plans, get_root_path
-from playsound import playsound
+from speech_backends import create_recognizer_backend
+from pipeline import VoicePipeline
+from notification_cue import NotificationCue
+from utils import initiate_shutdown, shutdown_listener
+from helpers import get_settings, validate_user_environment, validate_script_access, setup_logging, get_logger, run_startup_plans, get_root_path, get_ahk_worker_pool
+from pathlib import Path
 import os
 import threading
 from health_check import start_health_server
@@ -33,8 +36,16 @@ def main():
 
     try:
         settings = get_settings()
-        assistant = Assistant(wake_phrase=settings['wake_phrase'])
+        assistant = Assistant(wake_phrase=settings['wake_phrase'],
+                              wake_aliases=settings.get('wake_aliases'),
+                              backend=create_recognizer_backend(settings))
         executor = Executor(mode="manual")
+        # Carrega o modelo enquanto o resto sobe, para o primeiro comando não pagar isso
+        threading.Thread(target=executor.warm_up,
+                         name="llm-warm-up", daemon=True).start()
+        # Sobe os workers AHK em segundo plano; as ferramentas passam a usá-los
+        get_ahk_worker_pool(Path(root_path + "binaries"))
+        cue = NotificationCue(root_path + "assets/notification.mp3")
 
         logger.info("OS Assistant inicializado com sucesso", update_health_check=({
             "status": "running", "message": "OS Assistant está rodando e escutando pela frase de ativação"
@@ -51,44 +62,20 @@ def main():
 
     run_startup_plans(executor)
 
-    while True:
-        try:
-            captured_text = assistant.listen()
-            if not captured_text:
-                continue
+    pipeline = VoicePipeline(
+        assistant, executor,
+        cue=cue,
+        request_timeout=10)
 
-            normalized_text = normalize_text(captured_text)
-
-            if normalized_text == "encerrar":
-                logger.info("Comando de saída recebido. Encerrando.", update_health_check=(
-                    {"status": "offline"}))
-                break
-
-            if assistant.check_wake(normalized_text):
-                logger.info(
-                    "Frase de ativação detectada! Processando solicitação do usuário.")
-                playsound(root_path + "assets/notification.mp3")
-
-                user_request = assistant.listen_with_timeout(
-                    timeout_seconds=10)
-
-                if not user_request:
-                    logger.debug(
-                        "Nenhuma solicitação do usuário detectada em 10 segundos, retornando à escuta da frase de ativação...")
-                    continue
-
-                logger.info(f"Solicitação do usuário: {user_request}")
-                executor.run(data={'input': user_request})
-
-            else:
-                logger.debug("Escutando pela frase de ativação...")
-
-        except KeyboardInterrupt:
-            logger.info("Interrompido pelo usuário. Encerrando.")
-            break
-        except Exception as e:
-            logger.exception(f"Erro inesperado no loop principal: {e}", update_health_check=(
-                {"status": "offline"}))
+    try:
+        pipeline.run()
+    except KeyboardInterrupt:
+        logger.info("Interrompido pelo usuário. Encerrando.")
+        pipeline.stop()
+    except Exception as e:
+        logger.exception(f"Erro inesperado no loop principal: {e}", update_health_check=(
+            {"status": "offline"}))
+        pipeline.stop()
 
 
 if __name__ == "__main__":
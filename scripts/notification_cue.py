@@ -0,0 +1,222 @@
+from typing import Callable, Optional
+from helpers import get_logger
+import audioop
+import math
+import os
+import threading
+import time
+import wave
+
+logger = get_logger(__name__)
+
+
+class NotificationCue:
+    """
+    Short sound played after the wake phrase, decoded once and played
+    without blocking.
+
+    The file is decoded to PCM when the cue is created (WAV with the
+    standard library, MP3 and others with miniaudio) and played on a
+    background thread through a PyAudio output stream that is opened with
+    the cue and stays open between plays. `play` returns immediately, so
+    request capture runs in parallel with the cue, and `cancel` cuts it
+    short (e.g. when the user starts talking over it). `level` reports how
+    loud the cue is right now, so capture can tell its echo from speech.
+
+    If the file cannot be decoded (miniaudio not installed), falls back to
+    playsound on a background thread.
+    """
+
+    CHUNK_SECONDS = 0.02
+    # Atraso máximo esperado entre escrever um bloco e ele sair na caixa de som
+    OUTPUT_LATENCY = 0.25
+
+    def __init__(self, path: str):
+        self.path = path
+        self.pcm: Optional[bytes] = None
+        self.sample_rate = 0
+        self.channels = 0
+        self.sample_width = 2
+        # Cada play tem seu próprio evento: cancelar um não afeta o seguinte
+        self._cancel = threading.Event()
+        self._cancel.set()
+        self._state_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._audio = None
+        self._stream = None
+        self._levels = []
+        self._started_at = 0.0
+        self._written = 0
+
+        started = time.perf_counter()
+        try:
+            self._decode()
+            logger.debug(
+                f"Som de notificação decodificado em {(time.perf_counter() - started) * 1000:.0f} ms "
+                f"({self.duration:.2f} s, {self.sample_rate} Hz)")
+        except ImportError:
+            logger.warning(
+                "miniaudio não instalado; o som de notificação será tocado via playsound")
+        except Exception as e:
+            logger.exception(f"Erro ao decodificar som de notificação: {e}")
+
+        if self.pcm is not None:
+            chunk = self._chunk_bytes()
+            self._levels = [audioop.rms(self.pcm[start:start + chunk], self.sample_width)
+                            for start in range(0, len(self.pcm), chunk)]
+            # Abre a saída já na inicialização para o primeiro play não pagar esse custo
+            try:
+                self._open_stream()
+            except Exception as e:
+                logger.warning(f"Não foi possível abrir a saída de áudio agora: {e}")
+
+    @property
+    def duration(self) -> float:
+        if not self.pcm:
+            return 0.0
+        return len(self.pcm) / (self.sample_rate * self.channels * self.sample_width)
+
+    @property
+    def is_playing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def level(self) -> Optional[float]:
+        """
+        RMS energy of the cue currently coming out of the speaker, taken as
+        the loudest chunk written within the last OUTPUT_LATENCY seconds.
+
+        Returns:
+            float or None: 0.0 before the first chunk is written, inf while
+            playing through playsound (level unknown), None once the cue is
+            no longer playing (and its last chunk had time to come out)
+        """
+        if self.pcm is None:
+            thread = self._thread
+            return math.inf if thread is not None and thread.is_alive() else None
+        with self._state_lock:
+            started, written, thread = self._started_at, self._written, self._thread
+        if not started:
+            return None if thread is None or not thread.is_alive() else 0.0
+        elapsed = time.perf_counter() - started
+        first = max(0, int((elapsed - self.OUTPUT_LATENCY) / self.CHUNK_SECONDS))
+        last = min(written, int(elapsed / self.CHUNK_SECONDS) + 1)
+        if first >= written:
+            return None if not thread.is_alive() else 0.0
+        return float(max(self._levels[first:last] or self._levels[first:first + 1]))
+
+    def play(self, on_finished: Optional[Callable[[], None]] = None):
+        """
+        Starts playing the cue and returns immediately. A cue already
+        playing is cancelled first.
+
+        Args:
+            on_finished (callable, optional): Called from the playback thread
+                when the cue ends or is cancelled.
+        """
+        cancel = threading.Event()
+        thread = threading.Thread(
+            target=self._play, args=(cancel, on_finished), name="notification-cue", daemon=True)
+        with self._state_lock:
+            # O play anterior para no próximo bloco e libera a saída para este
+            self._cancel.set()
+            self._cancel = cancel
+            self._thread = thread
+            self._started_at = 0.0
+            self._written = 0
+        thread.start()
+
+    def cancel(self, wait: bool = True):
+        """
+        Stops the cue being played, if any.
+
+        Args:
+            wait (bool): Wait for the playback thread to finish. Pass False
+                from latency-sensitive threads (e.g. audio capture).
+        """
+        with self._state_lock:
+            self._cancel.set()
+            thread = self._thread
+        if wait and thread and thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+    def close(self):
+        self.cancel()
+        with self._lock:
+            self._close_stream()
+            if self._audio is not None:
+                self._audio.terminate()
+                self._audio = None
+
+    def _decode(self):
+        if os.path.splitext(self.path)[1].lower() == ".wav":
+            with wave.open(self.path, "rb") as wav:
+                self.sample_rate = wav.getframerate()
+                self.channels = wav.getnchannels()
+                self.sample_width = wav.getsampwidth()
+                self.pcm = wav.readframes(wav.getnframes())
+            return
+
+        import miniaudio
+
+        info = miniaudio.get_file_info(self.path)
+        decoded = miniaudio.decode_file(
+            self.path, output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=info.nchannels, sample_rate=info.sample_rate)
+        self.sample_rate = decoded.sample_rate
+        self.channels = decoded.nchannels
+        self.sample_width = 2
+        self.pcm = decoded.samples.tobytes()
+
+    def _play(self, cancel: threading.Event, on_finished: Optional[Callable[[], None]]):
+        try:
+            if self.pcm is None:
+                from playsound import playsound
+                playsound(self.path)
+                return
+
+            with self._lock:
+                stream = self._open_stream()
+                chunk = self._chunk_bytes()
+                # Escreve em blocos curtos para o cancelamento ter efeito rápido
+                for index, start in enumerate(range(0, len(self.pcm), chunk)):
+                    if cancel.is_set():
+                        break
+                    with self._state_lock:
+                        if self._cancel is cancel:
+                            if not index:
+                                self._started_at = time.perf_counter()
+                            self._written = index + 1
+                    stream.write(self.pcm[start:start + chunk])
+        except Exception as e:
+            logger.exception(f"Erro ao tocar som de notificação: {e}")
+            # Reabre o dispositivo de saída no próximo play
+            with self._lock:
+                self._close_stream()
+        finally:
+            if on_finished:
+                on_finished()
+
+    def _chunk_bytes(self) -> int:
+        return int(self.sample_rate * self.CHUNK_SECONDS) * self.channels * self.sample_width
+
+    def _close_stream(self):
+        if self._stream is None:
+            return
+        try:
+            self._stream.close()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar saída de áudio: {e}")
+        finally:
+            self._stream = None
+
+    def _open_stream(self):
+        if self._stream is None:
+            import pyaudio
+
+            if self._audio is None:
+                self._audio = pyaudio.PyAudio()
+            self._stream = self._audio.open(
+                format=self._audio.get_format_from_width(self.sample_width),
+                channels=self.channels, rate=self.sample_rate, output=True)
+        return self._stream
@@ -0,0 +1,222 @@
+from typing import Any, Dict, Optional
+from helpers import get_logger
+from notification_cue import NotificationCue
+from utils import normalize_text
+import queue
+import threading
+import time
+
+logger = get_logger(__name__)
+
+
+class StageStats:
+    """Counters and latency figures for one pipeline stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._count = 0
+        self._wait_total = 0.0
+        self._busy_total = 0.0
+        self._busy_last = 0.0
+        self._busy_max = 0.0
+
+    def record(self, wait_seconds: float, busy_seconds: float):
+        """
+        Args:
+            wait_seconds (float): Time the item spent queued before this stage.
+            busy_seconds (float): Time this stage spent processing the item.
+        """
+        with self._lock:
+            self._count += 1
+            self._wait_total += wait_seconds
+            self._busy_total += busy_seconds
+            self._busy_last = busy_seconds
+            self._busy_max = max(self._busy_max, busy_seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            count = self._count or 1
+            return {
+                "count": self._count,
+                "avg_wait_ms": round(self._wait_total / count * 1000, 1),
+                "avg_ms": round(self._busy_total / count * 1000, 1),
+                "last_ms": round(self._busy_last * 1000, 1),
+                "max_ms": round(self._busy_max * 1000, 1),
+            }
+
+
+class VoicePipeline:
+    """
+    Staged voice loop: capture -> recognition -> wake detection -> command.
+
+    Each stage runs on its own worker thread, connected by bounded queues.
+    Capture keeps segmenting audio while an earlier phrase is being
+    recognized or a command is executing. When a downstream stage falls
+    behind, the queues fill up and the upstream workers block (backpressure);
+    the microphone itself never stops, and the capture cursor just lags
+    inside the ring buffer. Because capture never pauses, a request said
+    after the wake phrase is simply the next segment, and one said in the
+    same breath is taken from the text after the match (WakeMatch.command),
+    so there is no offset to rewind the capture to.
+
+    Queue depths and per-stage latency are available from `stats()` and are
+    logged every `stats_interval` seconds.
+    """
+
+    def __init__(self, assistant, executor, cue: Optional[NotificationCue] = None,
+                 request_timeout: float = 10.0, queue_size: int = 4, stats_interval: float = 60.0):
+        self.assistant = assistant
+        self.executor = executor
+        self.cue = cue
+        self.request_timeout = request_timeout
+        self.stats_interval = stats_interval
+
+        self._segments: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._texts: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._commands: queue.Queue = queue.Queue(maxsize=2)
+        self._stop = threading.Event()
+        self._awaiting_request_until = 0.0
+        self._stages = {name: StageStats(name) for name in (
+            "capture", "recognition", "wake", "command")}
+
+    def run(self):
+        """Starts every stage and blocks until `stop` is called (e.g. by "encerrar")."""
+        workers = [
+            ("capture", self._capture_worker),
+            ("recognition", self._recognition_worker),
+            ("wake", self._wake_worker),
+            ("command", self._command_worker),
+        ]
+        for name, target in workers:
+            threading.Thread(target=target, name=f"pipeline-{name}",
+                             daemon=True).start()
+
+        while not self._stop.wait(self.stats_interval):
+            logger.debug(f"Estatísticas do pipeline: {self.stats()}")
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depths and per-stage latency snapshot."""
+        return {
+            "queues": {
+                "segments": self._segments.qsize(),
+                "texts": self._texts.qsize(),
+                "commands": self._commands.qsize(),
+            },
+            "capture_lag_s": round(self.assistant.capture_lag(), 2),
+            "stages": {name: stage.snapshot() for name, stage in self._stages.items()},
+        }
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue):
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return None
+
+    def _capture_worker(self):
+        while not self._stop.is_set():
+            audio = self.assistant.capture_segment(
+                timeout=1, phrase_time_limit=self.request_timeout)
+            if audio is None:
+                continue
+            # Na captura, "espera" é o atraso do cursor em relação ao áudio ao
+            # vivo e "processamento" é a duração da frase capturada
+            duration = len(audio.frame_data) / \
+                (audio.sample_rate * audio.sample_width)
+            self._stages["capture"].record(
+                self.assistant.capture_lag(), duration)
+            self._put(self._segments, (audio, time.perf_counter()))
+
+    def _recognition_worker(self):
+        while not self._stop.is_set():
+            item = self._get(self._segments)
+            if item is None:
+                break
+            audio, queued_at = item
+            started = time.perf_counter()
+            try:
+                text = self.assistant.transcribe(audio)
+            except Exception as e:
+                logger.exception(f"Erro no estágio de reconhecimento: {e}")
+                text = None
+            self._stages["recognition"].record(
+                started - queued_at, time.perf_counter() - started)
+            if text:
+                self._put(self._texts, (text, time.perf_counter()))
+
+    def _wake_worker(self):
+        while not self._stop.is_set():
+            item = self._get(self._texts)
+            if item is None:
+                break
+            text, queued_at = item
+            started = time.perf_counter()
+            try:
+                self._handle_text(text)
+            except Exception as e:
+                logger.exception(f"Erro no estágio de ativação: {e}")
+            self._stages["wake"].record(
+                started - queued_at, time.perf_counter() - started)
+
+    def _handle_text(self, text: str):
+        normalized_text = normalize_text(text)
+
+        if normalized_text == "encerrar":
+            logger.info("Comando de saída recebido. Encerrando.", update_health_check=(
+                {"status": "offline"}))
+            self.stop()
+            return
+
+        if time.time() < self._awaiting_request_until:
+            self._awaiting_request_until = 0.0
+            self._put(self._commands, (text, time.perf_counter()))
+            return
+
+        wake = self.assistant.detect_wake(normalized_text)
+        if not wake:
+            logger.debug("Escutando pela frase de ativação...")
+            return
+
+        logger.info(
+            "Frase de ativação detectada! Processando solicitação do usuário.")
+        if wake.command:
+            # Comando dito junto com a wake phrase: não espera uma segunda frase
+            self._put(self._commands, (wake.command, time.perf_counter()))
+            return
+
+        self._awaiting_request_until = time.time() + self.request_timeout
+        if self.cue:
+            # O cue toca em paralelo com a captura, que descarta só o eco dele;
+            # se o usuário falar por cima, ele é cortado
+            self.cue.play()
+            self.assistant.set_echo_reference(
+                self.cue.level, on_speech=lambda: self.cue.cancel(wait=False))
+
+    def _command_worker(self):
+        while not self._stop.is_set():
+            item = self._get(self._commands)
+            if item is None:
+                break
+            request, queued_at = item
+            started = time.perf_counter()
+            logger.info(f"Solicitação do usuário: {request}")
+            try:
+                self.executor.run(data={'input': request})
+            except Exception as e:
+                logger.exception(f"Erro ao executar solicitação: {e}")
+            self._stages["command"].record(
+                started - queued_at, time.perf_counter() - started)
@@ -0,0 +1,280 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from helpers import get_logger
+from utils import normalize_text
+from tool_scheduler import call_targets, calls_conflict
+import hashlib
+import json
+import threading
+
+logger = get_logger(__name__)
+
+# action_type da interface -> ferramenta
+_ACTION_TOOLS = {
+    "max": "max_app",
+    "min": "min_app",
+}
+
+
+def plan_action_call(action: Dict[str, Any],
+                     custom_apps: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Maps one execution plan action (settings.json) onto a tool call.
+
+    Args:
+        action (dict): Action with action_type, target, position,
+            monitor_index, volume_change, second_app and monitor_action.
+        custom_apps (dict, optional): Normalized custom app name -> exe path,
+            used to launch custom apps by name.
+
+    Returns:
+        tuple: (tool name, tool arguments)
+
+    Raises:
+        ValueError: If the action type is unknown or a required field is missing
+    """
+    action_type = action.get("action_type") or ""
+    tool = _ACTION_TOOLS.get(action_type, action_type)
+    target = action.get("target") or ""
+    monitor = action.get("monitor_index")
+
+    def require(value: Any, field: str) -> Any:
+        if value in (None, ""):
+            raise ValueError(f"ação {action_type} sem '{field}'")
+        return value
+
+    if tool == "launch_app":
+        target = require(target, "target")
+        return tool, {"app_name_or_exe": (custom_apps or {}).get(normalize_text(target), target)}
+    if tool == "move_window":
+        return tool, {"app": require(target, "target"),
+                      "position": action.get("position") or "Maximized",
+                      "monitor_index": monitor if monitor is not None else 1}
+    if tool == "split_screen":
+        # "left"/"right" é o formato do exemplo do README; a interface grava target/second_app
+        return tool, {"left": require(target or action.get("left"), "target"),
+                      "right": require(action.get("second_app") or action.get("right"), "second_app"),
+                      "monitor": monitor if monitor is not None else 1}
+    if tool in ("close_app", "max_app", "min_app"):
+        return tool, {"app": require(target, "target")}
+    if tool == "update_app_volume":
+        change = int(action.get("volume_change") or 5)
+        args: Dict[str, Any] = {"action": "aumentar" if change >= 0 else "diminuir",
+                                "value": abs(change)}
+        if target:
+            args["app"] = target
+        return tool, args
+    if tool == "monitor_control":
+        return tool, {"action": require(action.get("monitor_action"), "monitor_action"),
+                      "monitor": require(monitor, "monitor_index")}
+    if tool == "launch_chrome":
+        args = {}
+        if target or action.get("profile"):
+            args["profile"] = target or action["profile"]
+        if action.get("tabs"):
+            tabs = action["tabs"]
+            args["tabs"] = str(tabs) if isinstance(tabs, list) else tabs
+        return tool, args
+    if tool == "shutdown":
+        return tool, {}
+    raise ValueError(f"tipo de ação desconhecido: '{action_type}'")
+
+
+@dataclass
+class PlanStep:
+    """
+    One action of a compiled plan; `depends` holds step numbers (1-based).
+    `own_timeout` is set when the action has its own timeout_seconds.
+    """
+    number: int
+    tool: str
+    args: Dict[str, Any]
+    depends: FrozenSet[int] = frozenset()
+    timeout: Optional[float] = None
+    error: Optional[str] = None
+    own_timeout: bool = False
+
+    @property
+    def call(self) -> Dict[str, Any]:
+        return {"name": self.tool, "args": self.args}
+
+
+@dataclass
+class CompiledPlan:
+    """
+    Execution plan as a DAG of steps, in definition order. `chains` groups
+    the steps into straight runs (e.g. launch A -> move A: each step depends
+    only on the one before it, and nothing else needs that one alone) that
+    can go to the tools as one batch; every step is in exactly one chain.
+    A batch only reports when all of it is done, so a chain gets the sum of
+    its steps' timeouts; steps with their own timeout_seconds are kept out
+    of chains so theirs is enforced exactly.
+    """
+    name: str
+    steps: List[PlanStep] = field(default_factory=list)
+    timeout: Optional[float] = None
+    digest: str = ""
+    chains: List[List[int]] = field(default_factory=list)
+
+    def chain_length(self, durations: Dict[int, float]) -> float:
+        """Longest dependency chain, given each step's duration."""
+        finish: Dict[int, float] = {}
+        for step in self.steps:
+            start = max((finish.get(d, 0.0) for d in step.depends), default=0.0)
+            finish[step.number] = start + durations.get(step.number, 0.0)
+        return max(finish.values(), default=0.0)
+
+    @property
+    def width(self) -> int:
+        """Most chains that can run at the same time (chains at the same dependency depth)."""
+        chain_of = {number: index for index, chain in enumerate(self.chains) for number in chain}
+        by_number = {step.number: step for step in self.steps}
+        depth: Dict[int, int] = {}
+        for index, chain in enumerate(self.chains):
+            # As cadeias seguem a ordem de definição: as dependências já têm profundidade
+            depth[index] = max((depth[chain_of[d]] + 1 for d in by_number[chain[0]].depends
+                                if chain_of[d] != index), default=0)
+        levels: Dict[int, int] = {}
+        for level in depth.values():
+            levels[level] = levels.get(level, 0) + 1
+        return max(levels.values(), default=0)
+
+
+def compile_plan(plan: Dict[str, Any], custom_apps: Optional[Dict[str, str]] = None,
+                 step_timeout: Optional[float] = None,
+                 plan_timeout: Optional[float] = None) -> CompiledPlan:
+    """
+    Compiles an execution plan into a DAG.
+
+    A step depends on every earlier step that shares an app/window target
+    with it, on earlier barrier steps (monitor_control, shutdown, ...) and on
+    the steps listed in its `depends_on` (1-based step numbers). Steps with
+    no path between them can run concurrently. Invalid actions are kept as
+    steps with `error` set, so the steps that depend on them are skipped.
+
+    Args:
+        plan (dict): Plan from settings.json (name, actions, timeout_seconds).
+        custom_apps (dict, optional): Normalized custom app name -> exe path.
+        step_timeout (float, optional): Default per-step timeout in seconds.
+        plan_timeout (float, optional): Default timeout for the whole plan.
+
+    Returns:
+        CompiledPlan: Steps in definition order
+
+    Raises:
+        ValueError: If `depends_on` points to a missing step or forms a cycle
+    """
+    actions = plan.get("actions", []) or []
+    steps: List[PlanStep] = []
+    for number, action in enumerate(actions, 1):
+        try:
+            tool, args = plan_action_call(action, custom_apps)
+            error = None
+        except ValueError as e:
+            tool, args, error = action.get("action_type") or "", {}, str(e)
+        steps.append(PlanStep(number, tool, args,
+                              timeout=action.get("timeout_seconds") or step_timeout,
+                              error=error, own_timeout=bool(action.get("timeout_seconds"))))
+
+    depends: Dict[int, set] = {step.number: set() for step in steps}
+    for index, step in enumerate(steps):
+        if step.error:
+            # Não roda: não precisa esperar nem segurar ninguém
+            continue
+        targets = call_targets(step.call)
+        for earlier in steps[:index]:
+            if not earlier.error and calls_conflict(
+                    earlier.call, call_targets(earlier.call), targets, step.call):
+                depends[step.number].add(earlier.number)
+    for index, step in enumerate(steps):
+        for number in actions[index].get("depends_on") or []:
+            if not isinstance(number, int) or number not in depends or number == step.number:
+                raise ValueError(
+                    f"plano '{plan.get('name')}': passo {step.number} depende de passo inválido {number}")
+            depends[step.number].add(number)
+
+    _check_acyclic(plan.get("name", ""), depends)
+    for step in steps:
+        step.depends = frozenset(depends[step.number])
+    return CompiledPlan(plan.get("name", ""), steps,
+                        timeout=plan.get("timeout_seconds") or plan_timeout,
+                        chains=_chains(steps))
+
+
+def _chains(steps: List[PlanStep]) -> List[List[int]]:
+    by_number = {step.number: step for step in steps}
+    dependents: Dict[int, set] = {step.number: set() for step in steps}
+    for step in steps:
+        for dependency in step.depends:
+            dependents[dependency].add(step.number)
+    chain_of: Dict[int, List[int]] = {}
+    chains: List[List[int]] = []
+    for step in steps:
+        previous = next(iter(step.depends)) if len(step.depends) == 1 else None
+        # Entra na cadeia do passo anterior se ninguém mais precisar só dele
+        # (uma barreira depois dos dois, por exemplo, espera a cadeia inteira);
+        # passos com timeout próprio rodam sozinhos para o prazo valer só para eles
+        if (previous is not None and previous < step.number
+                and chain_of[previous][-1] == previous
+                and not step.error and not by_number[previous].error
+                and not step.own_timeout and not by_number[previous].own_timeout
+                and all(step.number in by_number[other].depends
+                        for other in dependents[previous] - {step.number})):
+            chain = chain_of[previous]
+        else:
+            chain = []
+            chains.append(chain)
+        chain.append(step.number)
+        chain_of[step.number] = chain
+    return chains
+
+
+def _check_acyclic(name: str, depends: Dict[int, set]):
+    state: Dict[int, int] = {}
+
+    def visit(number: int):
+        if state.get(number) == 2:
+            return
+        if state.get(number) == 1:
+            raise ValueError(f"plano '{name}': dependências em ciclo no passo {number}")
+        state[number] = 1
+        for dependency in depends[number]:
+            visit(dependency)
+        state[number] = 2
+
+    for number in depends:
+        visit(number)
+
+
+class PlanCompiler:
+    """
+    Compiles plans on first use and keeps the result until the plan
+    definition (or the custom apps it resolves) changes.
+    """
+
+    def __init__(self, custom_apps: Optional[Dict[str, str]] = None,
+                 step_timeout: Optional[float] = None, plan_timeout: Optional[float] = None):
+        self._custom_apps = custom_apps or {}
+        self._step_timeout = step_timeout
+        self._plan_timeout = plan_timeout
+        self._cache: Dict[str, CompiledPlan] = {}
+        self._lock = threading.Lock()
+
+    def compile(self, plan: Dict[str, Any]) -> CompiledPlan:
+        digest = hashlib.sha256(json.dumps(
+            [plan, self._custom_apps, self._step_timeout, self._plan_timeout],
+            sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        with self._lock:
+            compiled = self._cache.get(digest)
+        if compiled is not None:
+            return compiled
+        compiled = compile_plan(plan, self._custom_apps,
+                                self._step_timeout, self._plan_timeout)
+        compiled.digest = digest
+        logger.debug(
+            f"Plano '{compiled.name}' compilado: "
+            + ", ".join(f"{s.number}:{s.tool}<-{sorted(s.depends)}" for s in compiled.steps)
+            + f"; lotes {compiled.chains}")
+        with self._lock:
+            self._cache[digest] = compiled
+        return compiled
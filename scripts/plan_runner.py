@@ -0,0 +1,230 @@
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Dict, List, Optional
+from helpers import get_logger, validate_tool_results
+from utils import normalize_text
+from plan_compiler import CompiledPlan, PlanCompiler, PlanStep
+from tool_scheduler import ToolScheduler
+from rapidfuzz import fuzz
+import re
+import time
+
+logger = get_logger(__name__)
+
+# Intervalo para notar que uma cadeia saiu da fila e começou a contar seu prazo
+_START_POLL_SECONDS = 0.05
+
+# Palavras que podem acompanhar o nome do plano num pedido de voz
+_TRIGGER_WORDS = {
+    "executa", "executar", "execute", "roda", "rodar", "rode", "ativa", "ativar",
+    "ative", "inicia", "iniciar", "inicie", "liga", "ligar", "entra", "entrar",
+    "plano", "modo", "o", "a", "no", "na", "em", "de", "do", "da", "por",
+    "favor", "pode", "me", "pra", "mim", "agora",
+}
+
+# Frase usada para pedir um plano ao LLM (planos de inicialização e versões antigas)
+_NAMED_PLAN = re.compile(r'^execute action plan named\s+"?(?P<name>.+?)"?$', re.IGNORECASE)
+
+class PlanRunner:
+    """
+    Runs execution plans from settings.json by calling the tools directly,
+    without any model call.
+
+    Plans are compiled into a DAG (see plan_compiler): actions on different
+    apps run concurrently on the tool scheduler, actions on the same app, or
+    after a barrier or an explicit `depends_on`, wait for the ones before
+    them, and each straight chain of them runs as one batch. Each step has
+    a timeout and so does the whole plan. The scheduler's pool grows to the
+    plan's width, so a plan wider than `tool_workers` does not run in waves.
+
+    `find` recognizes requests that just name a plan ("modo trabalho",
+    "executa o plano modo trabalho", 'Execute action plan named "..."'),
+    so voice commands for a plan skip the LLM too.
+    """
+
+    def __init__(self, settings: Optional[Dict[str, Any]], scheduler: ToolScheduler):
+        settings = settings or {}
+        self._scheduler = scheduler
+        # Nome do plano sem as palavras de gatilho ("modo trabalho" -> "trabalho")
+        self._plans: Dict[str, Dict[str, Any]] = {}
+        for plan in settings.get("execution_plans", []) or []:
+            name = normalize_text(plan.get("name", ""))
+            if name:
+                self._plans[self._strip(name) or name] = plan
+        custom_apps = {
+            normalize_text(app.get("name", "")): app.get("exe_path", "")
+            for app in settings.get("custom_apps", []) or []
+            if app.get("name") and app.get("exe_path")
+        }
+        self._compiler = PlanCompiler(
+            custom_apps,
+            step_timeout=settings.get("plan_step_timeout", 30),
+            plan_timeout=settings.get("plan_timeout", 120))
+
+    def find(self, request: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            dict or None: The plan the request names, if the request is only
+            that (plus trigger words like "executa o plano")
+        """
+        if not self._plans:
+            return None
+        named = _NAMED_PLAN.match(request.strip())
+        text = normalize_text(named.group("name") if named else request)
+        key = self._strip(text)
+        if not key:
+            return None
+        if key in self._plans:
+            return self._plans[key]
+        # Pequenos erros de reconhecimento no nome do plano
+        best = max(self._plans, key=lambda name: fuzz.ratio(key, name))
+        if len(best) >= 5 and fuzz.ratio(key, best) >= 90:
+            return self._plans[best]
+        return None
+
+    @staticmethod
+    def _strip(text: str) -> str:
+        return " ".join(w for w in text.split() if w not in _TRIGGER_WORDS)
+
+    def compile(self, plan: Dict[str, Any]) -> CompiledPlan:
+        """Compiled DAG of the plan, cached until its definition changes."""
+        return self._compiler.compile(plan)
+
+    def run(self, plan: Dict[str, Any]) -> bool:
+        """
+        Runs the plan, starting each chain of steps (see
+        CompiledPlan.chains) as soon as the steps it depends on have
+        succeeded; a chain goes to the tools as one batch. Steps whose
+        dependencies failed or timed out are skipped. A chain's timeout
+        counts from when it starts running on a worker, not while it waits
+        for one or for its targets; when the plan timeout expires, the
+        chains not started yet are cancelled and abandoned. The scheduler
+        grows to the plan's width so independent chains do not wait for
+        each other. A step whose tool
+        ran but reported no success still counts as a failure, as before,
+        without holding back its dependents. Logs each chain's start offset
+        and duration.
+
+        Returns:
+            bool: True if every step succeeded in time
+        """
+        name = plan.get("name", "")
+        try:
+            compiled = self.compile(plan)
+        except ValueError as e:
+            logger.error(f"Plano '{name}' inválido: {e}")
+            return False
+
+        total = len(compiled.steps)
+        self._scheduler.ensure_workers(compiled.width)
+        steps = {step.number: step for step in compiled.steps}
+        started = time.perf_counter()
+        plan_deadline = started + compiled.timeout if compiled.timeout else None
+        pending = {chain[0]: [steps[n] for n in chain] for chain in compiled.chains}
+        running: Dict[Future, List[PlanStep]] = {}
+        budgets: Dict[int, Optional[float]] = {}
+        # Preenchido pelo worker quando a cadeia começa a rodar
+        starts: Dict[int, float] = {}
+        done: Dict[int, bool] = {}
+        durations: Dict[int, float] = {}
+        offsets: Dict[int, float] = {}
+
+        # done: o passo terminou sem erro (os dependentes podem rodar);
+        # uma saída sem mensagem de sucesso conta como falha, mas não trava os dependentes
+        succeeded = True
+
+        def finish(step, ok: bool, message: str, log=None, ran: Optional[bool] = None):
+            nonlocal succeeded
+            done[step.number] = ok if ran is None else ran
+            succeeded = succeeded and ok
+            (log or (logger.info if ok else logger.warning))(
+                f"[plano {name}] {step.number}/{total} {step.tool}({step.args}) {message}")
+
+        def finish_chain(chain, message: str, log=None):
+            for step in chain:
+                finish(step, False, message, log)
+
+        def deadline(first: int) -> Optional[float]:
+            if budgets[first] is None or first not in starts:
+                return None
+            return starts[first] + budgets[first]
+
+        def on_start(first: int):
+            return lambda: starts.setdefault(first, time.perf_counter())
+
+        while pending or running:
+            now = time.perf_counter()
+            # Dispara as cadeias cujas dependências já terminaram
+            for first, chain in list(pending.items()):
+                head = chain[0]
+                if head.error:
+                    del pending[first]
+                    finish(head, False, f"inválido: {head.error}", logger.error)
+                    continue
+                if not head.depends.issubset(done):
+                    continue
+                del pending[first]
+                failed = sorted(d for d in head.depends if not done[d])
+                if failed:
+                    finish_chain(chain, f"pulado (dependência {failed} falhou)")
+                    continue
+                timeouts = [step.timeout for step in chain]
+                budgets[first] = sum(timeouts) if all(timeouts) else None
+                future = self._scheduler.submit_group([step.call for step in chain], on_start(first))
+                running[future] = chain
+
+            if not running:
+                continue
+            firsts = [chain[0].number for chain in running.values()]
+            limits = [d for d in [plan_deadline] + [deadline(first) for first in firsts]
+                      if d is not None]
+            # O prazo de uma cadeia na fila só começa quando ela sair dela
+            if any(budgets[first] is not None and first not in starts for first in firsts):
+                limits.append(now + _START_POLL_SECONDS)
+            timeout = max(0.0, min(limits) - now) if limits else None
+            finished, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            now = time.perf_counter()
+            for future in finished:
+                chain = running.pop(future)
+                first = chain[0].number
+                offsets[first] = starts.get(first, now) - started
+                # A cadeia roda de uma vez: o tempo todo fica no último passo
+                durations[chain[-1].number] = now - started - offsets[first]
+                timing = (f"[+{offsets[first] * 1000:.0f} ms, {durations[chain[-1].number] * 1000:.0f} ms"
+                          f"{f', lote de {len(chain)}' if len(chain) > 1 else ''}]")
+                try:
+                    results = future.result()
+                except Exception as e:
+                    finish_chain(chain, f"falhou: {e} {timing}", logger.error)
+                    continue
+                for step, result in zip(chain, results):
+                    errored = str(result).startswith("Error:")
+                    finish(step, validate_tool_results([result]), f"-> {result} {timing}",
+                           logger.error if errored else None, ran=not errored)
+
+            for future, chain in list(running.items()):
+                first = chain[0].number
+                limit = deadline(first)
+                if limit is not None and now >= limit:
+                    # A ferramenta continua rodando no worker; só deixa de ser esperada
+                    running.pop(future)
+                    durations[chain[-1].number] = now - starts[first]
+                    finish_chain(chain, f"excedeu {budgets[first]:g} s")
+
+            if plan_deadline is not None and now >= plan_deadline:
+                # Cadeias ainda na fila (ou esperando seus alvos) não chegam a rodar
+                for future in running:
+                    future.cancel()
+                for chain in list(running.values()) + list(pending.values()):
+                    finish_chain(chain, f"abandonado (plano excedeu {compiled.timeout:g} s)")
+                running.clear()
+                pending.clear()
+
+        elapsed = time.perf_counter() - started
+        succeeded = succeeded and len(done) == total
+        logger.info(
+            f"Plano '{name}' executado sem LLM: {total} ações em {len(compiled.chains)} lotes, "
+            f"{elapsed * 1000:.0f} ms (em sequência ~{sum(durations.values()) * 1000:.0f} ms, "
+            f"maior cadeia ~{compiled.chain_length(durations) * 1000:.0f} ms)"
+            f"{'' if succeeded else ' (com falhas)'}")
+        return succeeded
@@ -0,0 +1,308 @@
+import speech_recognition as sr
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from helpers import get_logger
+from audio_stream import MicrophoneStream
+from speech_backends import RecognizerBackend
+import audioop
+import bisect
+import json
+import os
+import threading
+import time
+import wave
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ReplayUtterance:
+    """One labelled utterance of a recording, from its .json sidecar."""
+    text: str
+    start: float
+    end: float
+    wake: bool = False
+    command: str = ""
+    # Preenchidos pelo ReplayCorpus
+    file: str = ""
+    start_offset: int = 0
+    end_offset: int = 0
+    signature: bytes = b""
+
+
+@dataclass
+class ReplayFile:
+    path: str
+    pcm: bytes
+    utterances: List[ReplayUtterance] = field(default_factory=list)
+    offset: int = 0
+
+
+class ReplayCorpus:
+    """
+    Recorded audio used in place of the microphone.
+
+    `path` is a single WAV file or a directory of them (played in name order).
+    Each `name.wav` may have a `name.json` sidecar labelling what is said:
+
+        {"utterances": [
+            {"start": 1.2, "end": 2.0, "text": "ola jarvis", "wake": true,
+             "command": "abre o chrome"},
+            {"start": 2.6, "end": 3.5, "text": "abre o chrome"}
+        ]}
+
+    Files without a sidecar are treated as background noise (nothing should
+    trigger). Audio is converted to mono, 16-bit, `sample_rate` on load, and
+    files are laid out back to back, optionally with `gap_seconds` of digital
+    silence between them (which also drags the noise floor down).
+    """
+
+    SIGNATURE_SECONDS = 0.02
+
+    def __init__(self, path: str, sample_rate: int = 16000, gap_seconds: float = 0.0):
+        self.sample_rate = sample_rate
+        self.sample_width = 2
+        self.gap_bytes = int(gap_seconds * sample_rate) * self.sample_width
+        self.files: List[ReplayFile] = []
+
+        if os.path.isdir(path):
+            paths = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                     if name.lower().endswith(".wav")]
+        else:
+            paths = [path]
+        if not paths:
+            raise ValueError(f"Nenhum arquivo WAV encontrado em {path}")
+
+        offset = 0
+        for wav_path in paths:
+            replay_file = ReplayFile(wav_path, self._load_pcm(wav_path))
+            replay_file.offset = offset
+            replay_file.utterances = self._load_utterances(wav_path, replay_file)
+            self.files.append(replay_file)
+            offset += len(replay_file.pcm) + self.gap_bytes
+
+    @property
+    def bytes_per_second(self) -> int:
+        return self.sample_rate * self.sample_width
+
+    @property
+    def utterances(self) -> List[ReplayUtterance]:
+        return [u for f in self.files for u in f.utterances]
+
+    @property
+    def duration(self) -> float:
+        total = sum(len(f.pcm) + self.gap_bytes for f in self.files)
+        return total / self.bytes_per_second
+
+    def _load_pcm(self, wav_path: str) -> bytes:
+        with wave.open(wav_path, "rb") as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+            rate = wav.getframerate()
+            pcm = wav.readframes(wav.getnframes())
+
+        if width == 1:
+            # WAV de 8 bits é sem sinal
+            pcm = audioop.bias(pcm, 1, -128)
+        if channels == 2:
+            pcm = audioop.tomono(pcm, width, 0.5, 0.5)
+        elif channels != 1:
+            raise ValueError(f"{wav_path}: apenas áudio mono ou estéreo é suportado")
+        if width != 2:
+            pcm = audioop.lin2lin(pcm, width, 2)
+        if rate != self.sample_rate:
+            pcm, _ = audioop.ratecv(pcm, 2, 1, rate, self.sample_rate, None)
+        return pcm
+
+    def _load_utterances(self, wav_path: str, replay_file: ReplayFile) -> List[ReplayUtterance]:
+        sidecar = os.path.splitext(wav_path)[0] + ".json"
+        if not os.path.exists(sidecar):
+            return []
+        with open(sidecar, "r", encoding="utf-8") as f:
+            entries = json.load(f).get("utterances", [])
+
+        utterances = []
+        for entry in entries:
+            utterance = ReplayUtterance(
+                text=entry["text"], start=float(entry["start"]), end=float(entry["end"]),
+                wake=bool(entry.get("wake", False)), command=entry.get("command", ""))
+            utterance.file = os.path.basename(wav_path)
+            utterance.start_offset = replay_file.offset + self._to_bytes(utterance.start)
+            utterance.end_offset = replay_file.offset + self._to_bytes(utterance.end)
+            utterance.signature = self._signature(replay_file.pcm, utterance)
+            utterances.append(utterance)
+        return utterances
+
+    def _to_bytes(self, seconds: float) -> int:
+        return int(seconds * self.sample_rate) * self.sample_width
+
+    def _signature(self, pcm: bytes, utterance: ReplayUtterance) -> bytes:
+        # Trecho curto do meio da fala: aparece byte a byte em qualquer segmento que a contenha
+        size = self._to_bytes(self.SIGNATURE_SECONDS)
+        middle = self._to_bytes((utterance.start + utterance.end) / 2)
+        start = max(0, min(middle - size // 2, len(pcm) - size))
+        return pcm[start:start + size]
+
+
+class _ReplaySource:
+    """Stand-in for sr.Microphone: plays the corpus into the capture loop."""
+
+    def __init__(self, stream: "ReplayStream"):
+        self.SAMPLE_RATE = stream.corpus.sample_rate
+        self.SAMPLE_WIDTH = stream.corpus.sample_width
+        self.stream = self
+        self._replay = stream
+        self._chunks = self._iter_chunks()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+    def _iter_chunks(self):
+        replay = self._replay
+        corpus = replay.corpus
+        frame_bytes = replay.frame_bytes
+        data = bytearray()
+        for replay_file in corpus.files:
+            data += replay_file.pcm
+            data += bytes(corpus.gap_bytes)
+            while len(data) >= frame_bytes:
+                yield bytes(data[:frame_bytes])
+                del data[:frame_bytes]
+        # Silêncio final para fechar a última frase e deixar os timeouts de escuta expirarem
+        tail = bytes(frame_bytes)
+        for _ in range(int(replay.tail_seconds * corpus.bytes_per_second) // frame_bytes + 1):
+            yield tail
+        replay.end_offset = replay.position + frame_bytes
+        replay.finished.set()
+        # Depois do corpus, continua entregando silêncio até o stream ser parado
+        while True:
+            yield tail
+
+    def read(self, size: int) -> bytes:
+        replay = self._replay
+        chunk = next(self._chunks)
+        written = replay.position
+        if replay.speed > 0:
+            due = replay._started_at + written / (replay.corpus.bytes_per_second * replay.speed)
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            # Sem ritmo de tempo real, a escrita fica no máximo max_lead_frames à
+            # frente da leitura, como no microfone: o piso de ruído é atualizado na
+            # escrita e não pode enxergar o áudio que a segmentação ainda não leu
+            limit = min(replay.max_lead_frames * replay.frame_bytes,
+                        replay._buffer.capacity - 2 * replay.frame_bytes)
+            while replay._running and written - replay.tell() > limit:
+                time.sleep(0.001)
+
+        replay._record_write(written + len(chunk))
+        return chunk
+
+
+class ReplayStream(MicrophoneStream):
+    """
+    MicrophoneStream that plays a ReplayCorpus instead of opening a device.
+
+    Frames go through the same capture loop (ring buffer, noise floor,
+    muting), so Assistant cannot tell the difference. `speed` 1.0 replays in
+    real time; higher values replay faster, and 0 replays as fast as the
+    consumer reads, staying at most `max_lead_frames` frames ahead of it. `clock` follows the audio rather than the wall clock, so
+    the wake window and cooldown in Assistant behave the same at any speed.
+
+    `finished` is set once the corpus and `tail_seconds` of trailing silence
+    have been written (up to `end_offset`); after that the stream keeps
+    delivering silence so pending listens time out normally.
+    """
+
+    def __init__(self, corpus: ReplayCorpus, speed: float = 1.0, chunk_size: int = 1024,
+                 buffer_seconds: float = 30.0, tail_seconds: float = 3.0,
+                 max_lead_frames: int = 4):
+        super().__init__(chunk_size=chunk_size, buffer_seconds=buffer_seconds)
+        self.corpus = corpus
+        self.speed = speed
+        self.max_lead_frames = max(1, max_lead_frames)
+        self.tail_seconds = tail_seconds
+        self.finished = threading.Event()
+        self.end_offset: Optional[int] = None
+        self._source: Optional[_ReplaySource] = None
+        self._started_at = 0.0
+        self._write_lock = threading.Lock()
+        self._write_offsets: List[int] = []
+        self._write_times: List[float] = []
+
+    def clock(self) -> float:
+        # Tempo do áudio já lido, não do relógio: janela e cooldown da wake phrase valem em qualquer speed
+        return self.tell() / self.bytes_per_second if self.bytes_per_second else 0.0
+
+    def written_at(self, offset: int) -> Optional[float]:
+        """
+        Returns:
+            float or None: perf_counter() time when the audio at `offset` was
+            captured, or None if it has not been written yet
+        """
+        with self._write_lock:
+            index = bisect.bisect_left(self._write_offsets, offset)
+            if index >= len(self._write_offsets):
+                return None
+            return self._write_times[index]
+
+    def _record_write(self, end_offset: int):
+        with self._write_lock:
+            self._write_offsets.append(end_offset)
+            self._write_times.append(time.perf_counter())
+
+    def _open_source(self):
+        # Reaberturas (ex.: notify_device_change) continuam do ponto em que o replay parou
+        if self._source is None:
+            self._started_at = time.perf_counter()
+            self._source = _ReplaySource(self)
+        return self._source
+
+
+class ScriptedBackend(RecognizerBackend):
+    """
+    Stub recognizer for replay runs: returns the labelled text of every corpus
+    utterance contained in the segment, with no model or network call.
+
+    Utterances are found by their byte signature (a short excerpt of the
+    recording), which reaches the backend unchanged through the ring buffer,
+    so the result does not depend on how the audio was segmented. The corpus
+    must be loaded at the backend's SAMPLE_RATE so the bytes are not resampled.
+    `latency` adds a fixed delay per call to emulate a real engine.
+    """
+
+    name = "scripted"
+
+    def __init__(self, corpus: ReplayCorpus, latency: float = 0.0):
+        super().__init__()
+        if corpus.sample_rate != self.SAMPLE_RATE:
+            raise ValueError(
+                f"O corpus precisa estar em {self.SAMPLE_RATE} Hz para o ScriptedBackend")
+        self.latency = latency
+        self._utterances = [u for u in corpus.utterances if u.signature.strip(b"\0")]
+
+    def match(self, pcm: bytes) -> List[ReplayUtterance]:
+        """Corpus utterances whose signature appears in the raw segment audio."""
+        found: List[Tuple[int, ReplayUtterance]] = []
+        for utterance in self._utterances:
+            index = pcm.find(utterance.signature)
+            # Só vale em fronteira de amostra
+            while index >= 0 and index % 2:
+                index = pcm.find(utterance.signature, index + 1)
+            if index >= 0:
+                found.append((index, utterance))
+        return [u for _, u in sorted(found, key=lambda item: item[0])]
+
+    def recognize(self, audio: sr.AudioData, language: str) -> str:
+        # prepare() já deixou o áudio em 16 kHz, a mesma taxa do corpus: os bytes não mudam
+        text = " ".join(u.text for u in self.match(audio.frame_data))
+        self._record_payload(len(audio.frame_data))
+        if self.latency:
+            time.sleep(self.latency)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
@@ -0,0 +1,142 @@
+from typing import Any, Dict, Iterable, List, Optional, TYPE_CHECKING
+from helpers import get_logger
+import json
+import time
+
+if TYPE_CHECKING:
+    from tool_scheduler import ToolBatch
+
+logger = get_logger(__name__)
+
+
+class ToolCallAssembler:
+    """
+    Rebuilds tool calls from streamed `tool_call_chunks` (LangChain
+    AIMessageChunk) and releases each one as soon as its arguments are
+    complete.
+
+    Providers stream a call's arguments as JSON fragments keyed by the call
+    `index` (OpenAI) or send each call whole in a single chunk (Ollama). A
+    call is complete when its accumulated arguments parse as a JSON object,
+    when a chunk for a later index arrives, or when the stream ends.
+    Calls are always released in index order.
+    """
+
+    def __init__(self):
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._next_index: Optional[int] = None
+        self._last_index = -1
+        self._released = 0
+
+    @property
+    def released(self) -> int:
+        return self._released
+
+    def feed(self, chunks: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Adds the tool call chunks of one message chunk.
+
+        Returns:
+            list: Calls completed by these chunks, as {"name", "args", "id"}
+        """
+        for chunk in chunks or []:
+            index = chunk.get("index")
+            if index is None:
+                # Sem índice o provedor manda a chamada inteira de uma vez
+                index = self._last_index + 1
+            self._last_index = max(self._last_index, index)
+            if self._next_index is None:
+                self._next_index = index
+            call = self._pending.setdefault(
+                index, {"name": "", "args": "", "id": None, "done": False})
+            call["name"] += chunk.get("name") or ""
+            call["args"] += chunk.get("args") or ""
+            call["id"] = call["id"] or chunk.get("id")
+            if self._parse_args(call["args"]) is not None:
+                call["done"] = True
+            # Começou a próxima chamada: as anteriores não recebem mais nada
+            for previous in self._pending:
+                if previous < index:
+                    self._pending[previous]["done"] = True
+        return self._release(final=False)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Releases whatever is left when the stream ends."""
+        return self._release(final=True)
+
+    def _release(self, final: bool) -> List[Dict[str, Any]]:
+        ready = []
+        while self._next_index in self._pending:
+            call = self._pending[self._next_index]
+            if not (call["done"] or final):
+                break
+            del self._pending[self._next_index]
+            self._next_index += 1
+            args = self._parse_args(call["args"])
+            if not call["name"] or args is None:
+                logger.warning(
+                    f"Chamada de ferramenta incompleta descartada: {call['name']}({call['args']})")
+                continue
+            self._released += 1
+            ready.append({"name": call["name"], "args": args, "id": call["id"]})
+        if final and self._pending:
+            # Índices com buraco: libera o resto na ordem
+            self._next_index = min(self._pending)
+            ready += self._release(final=True)
+        return ready
+
+    @staticmethod
+    def _parse_args(raw: str) -> Optional[Dict[str, Any]]:
+        if not raw.strip():
+            return None
+        try:
+            args = json.loads(raw)
+        except ValueError:
+            return None
+        return args if isinstance(args, dict) else None
+
+
+def stream_tool_calls(chunks: Iterable[Any], batch: "ToolBatch") -> Dict[str, Any]:
+    """
+    Consumes a stream of AIMessageChunk and submits each tool call while
+    the model is still generating the next ones.
+
+    Calls are submitted in the order the model emitted them; the batch
+    decides which ones may run concurrently (see tool_scheduler).
+
+    Args:
+        chunks (Iterable): Output of `(prompt | llm.bind_tools(...)).stream(...)`.
+        batch (ToolBatch): Batch that runs the calls.
+
+    Returns:
+        dict: calls, results (in order), content, metadata (the provider's
+            response metadata, e.g. Ollama token counts) and timings in
+            seconds (first_token, first_action, total; None when not reached)
+    """
+    assembler = ToolCallAssembler()
+    calls: List[Dict[str, Any]] = []
+    content: List[str] = []
+    metadata: Dict[str, Any] = {}
+    timings: Dict[str, Optional[float]] = {
+        "first_token": None, "first_action": None, "total": None}
+    started = time.perf_counter()
+
+    def dispatch(ready: List[Dict[str, Any]]):
+        for call in ready:
+            if timings["first_action"] is None:
+                timings["first_action"] = time.perf_counter() - started
+            calls.append(call)
+            batch.submit(call)
+
+    for chunk in chunks:
+        if timings["first_token"] is None:
+            timings["first_token"] = time.perf_counter() - started
+        if isinstance(getattr(chunk, "content", None), str):
+            content.append(chunk.content)
+        metadata.update(getattr(chunk, "response_metadata", None) or {})
+        dispatch(assembler.feed(getattr(chunk, "tool_call_chunks", None)))
+    dispatch(assembler.finish())
+    results = batch.results()
+    timings["total"] = time.perf_counter() - started
+    return {"calls": calls, "results": results, "content": "".join(content),
+            "metadata": metadata, "timings": timings}
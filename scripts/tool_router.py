@@ -0,0 +1,132 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+from helpers import get_logger
+from utils import normalize_text
+from langchain_core.utils.function_calling import convert_to_openai_tool
+import json
+import re
+
+logger = get_logger(__name__)
+
+TOOL_GROUPS = {
+    "window": ("launch_app", "move_window", "close_app", "min_app", "max_app",
+               "split_screen", "launch_chrome"),
+    "audio": ("update_app_volume", "set_audio_input_device"),
+    "system": ("monitor_control", "shutdown", "install_requirements"),
+}
+
+# Palavras (início de palavra, texto normalizado) que indicam cada grupo
+_GROUP_PATTERNS = {
+    "window": re.compile(
+        r"\b(?:abr|inici|execut|lanc|rod|fech|encerr|finaliz|maximiz|minimiz|mov|coloc|jog|mand|"
+        r"pass|divid|lado|esquerd|direit|cima|baixo|topo|tela cheia|janela|app|aplicativo|"
+        r"programa|chrome|navegador|perfil|abas?\b|site|url|open|close|launch|window)"),
+    "audio": re.compile(
+        r"\b(?:volume|som|mudo|audio|microfone|mic|fone|headset|caixa de som|alto|"
+        r"entrada|sound|input)"),
+    "system": re.compile(
+        r"\b(?:monitor|deslig|shutdown|instal|requisit|dependenc|modulo|segunda tela|tela \d)"),
+}
+
+# Descrições curtas para modelos locais pequenos; os argumentos continuam os mesmos
+COMPACT_DESCRIPTIONS = {
+    "launch_app": "Open (or focus) an app. app_name_or_exe: app name or .exe path from the user's app list.",
+    "move_window": "Move an app window. position: Top|Bottom|Left|Right|Maximized; "
+                   "monitor_index starts at 1; title only for Chrome.",
+    "close_app": "Close an app.",
+    "min_app": "Minimize an app window.",
+    "max_app": "Maximize an app window.",
+    "split_screen": "Put two apps side by side (left, right) on a monitor.",
+    "launch_chrome": "Open Chrome with a profile and/or tabs (tabs: JSON list of URLs as a string).",
+    "update_app_volume": "Change volume. action: aumentar|diminuir; value 1-100; app optional (system volume if empty).",
+    "set_audio_input_device": "Switch the active microphone/input device by (partial) name.",
+    "monitor_control": "Enable or disable a monitor. action: enable|disable; monitor starts at 1.",
+    "shutdown": "Shut down the computer.",
+    "install_requirements": "Install the PowerShell modules needed for monitor control.",
+}
+
+
+def schema_tokens(tools: Iterable[Any]) -> int:
+    """Rough token count of the tool schemas sent to the model (~4 characters per token)."""
+    return sum(len(json.dumps(convert_to_openai_tool(t), ensure_ascii=False)) for t in tools) // 4
+
+
+class ToolRouter:
+    """
+    Picks the tool groups a request plausibly needs (window, audio,
+    system) so only those tools are bound to the model call.
+
+    Groups are chosen by keywords in the request and by the action types of
+    the execution plans retrieved for it. Custom app names imply the window
+    group. When nothing matches, every tool is bound. With `compact`, tools
+    are bound with the short descriptions in COMPACT_DESCRIPTIONS instead of
+    their docstrings.
+    """
+
+    def __init__(self, tools: List[Any], settings: Optional[Dict[str, Any]] = None,
+                 compact: bool = True):
+        settings = settings or {}
+        self.compact = compact
+        self._tools = [self._compact(t) for t in tools] if compact else list(tools)
+        self._app_names = [normalize_text(app.get("name", ""))
+                           for app in settings.get("custom_apps", []) or [] if app.get("name")]
+        self.full_tokens = schema_tokens(tools)
+        self._tokens_cache: Dict[FrozenSet[str], int] = {}
+
+    @property
+    def tools(self) -> List[Any]:
+        return self._tools
+
+    def groups_for(self, request: str, plans: Iterable[Dict[str, Any]] = ()) -> FrozenSet[str]:
+        """
+        Args:
+            request (str): User request.
+            plans (Iterable[dict]): Execution plans retrieved for the request.
+
+        Returns:
+            frozenset: Tool group names; empty means "bind everything"
+        """
+        text = normalize_text(request)
+        groups = {group for group, pattern in _GROUP_PATTERNS.items() if pattern.search(text)}
+        if any(name and f" {name} " in f" {text} " for name in self._app_names):
+            groups.add("window")
+        for plan in plans:
+            for action in plan.get("actions", []) or []:
+                groups.update(group for group, names in TOOL_GROUPS.items()
+                              if action.get("action_type") in names)
+        return frozenset(groups)
+
+    def select(self, request: str, plans: Iterable[Dict[str, Any]] = ()) -> List[Any]:
+        """Tools to bind for the request, in the original order."""
+        return self.tools_for(self.groups_for(request, plans))
+
+    def tools_for(self, groups: Iterable[str]) -> List[Any]:
+        """Tools bound for a set of groups (every tool when empty), in the original order."""
+        groups = frozenset(groups)
+        if not groups:
+            return list(self._tools)
+        names = {name for group in groups for name in TOOL_GROUPS[group]}
+        # Ferramentas fora de qualquer grupo sempre vão junto
+        grouped = {name for names_ in TOOL_GROUPS.values() for name in names_}
+        return [t for t in self._tools if t.name in names or t.name not in grouped]
+
+    def common_selections(self) -> List[List[Any]]:
+        """
+        Tool lists requests usually end up with: every tool (nothing
+        matched), then each single group, the window group last since most
+        commands are about windows.
+        """
+        order = sorted(TOOL_GROUPS, key=lambda group: group == "window")
+        return [self.tools_for(())] + [self.tools_for((group,)) for group in order]
+
+    def tokens(self, selected: List[Any]) -> int:
+        key = frozenset(t.name for t in selected)
+        if key not in self._tokens_cache:
+            self._tokens_cache[key] = schema_tokens(selected)
+        return self._tokens_cache[key]
+
+    @staticmethod
+    def _compact(tool: Any) -> Any:
+        description = COMPACT_DESCRIPTIONS.get(tool.name)
+        if not description:
+            return tool
+        return tool.model_copy(update={"description": description})
@@ -0,0 +1,374 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Set
+from helpers import get_logger
+from utils import normalize_text
+import ntpath
+import threading
+import time
+
+logger = get_logger(__name__)
+
+# Ferramentas que mexem no sistema inteiro: esperam tudo o que veio antes e
+# tudo o que vem depois espera por elas
+BARRIER_TOOLS = {"monitor_control", "shutdown",
+                 "install_requirements", "set_audio_input_device"}
+
+# Argumentos que nomeiam o app/janela alvo, por ferramenta
+_TARGET_ARGS = {
+    "launch_app": ("app_name_or_exe",),
+    "move_window": ("app",),
+    "close_app": ("app",),
+    "min_app": ("app",),
+    "max_app": ("app",),
+    "split_screen": ("left", "right"),
+}
+
+
+def _app_key(value: Any) -> str:
+    """'C:\\...\\Spotify.exe', 'spotify.exe' and 'Spotify' -> 'spotify'."""
+    name = ntpath.basename(str(value or "").strip().strip('"'))
+    if name.lower().endswith(".exe"):
+        name = name[:-4]
+    return normalize_text(name)
+
+
+def call_targets(call: Dict[str, Any]) -> Optional[FrozenSet[str]]:
+    """
+    Resources a tool call acts on.
+
+    Returns:
+        frozenset or None: Target keys ("chrome", "volume", ...), or None for
+        barrier tools that must not overlap with anything
+    """
+    name, args = call.get("name"), call.get("args") or {}
+    if name == "launch_chrome":
+        return frozenset({"chrome"})
+    if name == "update_app_volume":
+        # O mixer é um só: ajustes de volume não se sobrepõem
+        return frozenset({"volume"})
+    if name in BARRIER_TOOLS or name not in _TARGET_ARGS:
+        # Ferramenta desconhecida também não arrisca rodar junto com nada
+        return None
+    targets = {_app_key(args.get(arg)) for arg in _TARGET_ARGS[name]}
+    targets.discard("")
+    return frozenset(targets) if targets else None
+
+
+def _launch_path(call: Dict[str, Any]) -> str:
+    if call.get("name") != "launch_app":
+        return ""
+    return normalize_text(str((call.get("args") or {}).get("app_name_or_exe", "")))
+
+
+def calls_conflict(earlier: Dict[str, Any], earlier_targets: Optional[FrozenSet[str]],
+                   targets: Optional[FrozenSet[str]], call: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Whether a call must wait for an earlier one: they share a target, one of
+    them is a barrier, or one launches an exe whose path names the other's
+    target (custom apps are launched by path and then moved by name).
+    """
+    if targets is None or earlier_targets is None:
+        return True
+    if earlier_targets & targets:
+        return True
+    path = _launch_path(earlier)
+    if path and any(target in path for target in targets):
+        return True
+    path = _launch_path(call or {})
+    return bool(path) and any(target in path for target in earlier_targets)
+
+
+def call_groups(calls: List[Dict[str, Any]]) -> List[List[int]]:
+    """
+    Splits calls into groups linked by conflicts (see calls_conflict): calls
+    inside a group must keep their order, different groups are independent.
+
+    Returns:
+        list: Groups of call indexes, each in call order, ordered by first call
+    """
+    parent = list(range(len(calls)))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    targets = [call_targets(call) for call in calls]
+    for j in range(len(calls)):
+        for i in range(j):
+            if calls_conflict(calls[i], targets[i], targets[j], calls[j]):
+                parent[root(j)] = root(i)
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(calls)):
+        groups.setdefault(root(i), []).append(i)
+    return sorted(groups.values(), key=lambda group: group[0])
+
+
+class ToolBatch:
+    """
+    Tool calls of one request, submitted in the order the model emitted
+    them. Each call starts once every earlier call sharing one of its
+    targets (or an earlier barrier) has finished; unrelated calls run
+    concurrently on the scheduler's pool.
+    """
+
+    def __init__(self, scheduler: "ToolScheduler"):
+        self._scheduler = scheduler
+        self._entries: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+
+    def submit(self, call: Dict[str, Any]) -> Future:
+        """
+        Args:
+            call (dict): {"name", "args"} of the tool call.
+
+        Returns:
+            Future: Resolves to the tool output
+        """
+        targets = call_targets(call)
+        depends = [entry["future"] for entry in self._entries
+                   if calls_conflict(entry["call"], entry["targets"], targets, call)]
+        result: Future = Future()
+        entry = {"call": call, "targets": targets, "future": result, "seconds": 0.0}
+        self._entries.append(entry)
+
+        # Uma contagem por dependência e uma pela própria submissão
+        pending = [len(depends) + 1]
+        lock = threading.Lock()
+
+        def ready(_=None):
+            with lock:
+                pending[0] -= 1
+                if pending[0] > 0:
+                    return
+            self._scheduler._dispatch(entry)
+
+        for future in depends:
+            future.add_done_callback(ready)
+        ready()
+        return result
+
+    def results(self) -> List[Any]:
+        """
+        Waits for every call and returns the outputs in submission order;
+        a call that raised yields "Error: ..." instead.
+        """
+        outputs = []
+        for entry in self._entries:
+            try:
+                outputs.append(entry["future"].result())
+            except Exception as e:
+                logger.exception(f"Erro ao executar ferramenta {entry['call'].get('name')}: {e}")
+                outputs.append(f"Error: {e}")
+        if len(self._entries) > 1:
+            elapsed = time.perf_counter() - self.started
+            serial = sum(entry["seconds"] for entry in self._entries)
+            logger.info(
+                f"{len(self._entries)} ferramentas em {elapsed * 1000:.0f} ms "
+                f"(em sequência seriam {serial * 1000:.0f} ms)")
+        return outputs
+
+
+class ToolScheduler:
+    """
+    Runs the tool calls of a request on a bounded thread pool, ordering
+    calls that touch the same app/window and running the rest in parallel.
+
+    Besides the ordering inside a batch, each call holds its targets while
+    it runs, so two actions on the same window never overlap even across
+    requests. Barrier tools (see BARRIER_TOOLS) wait for every running call
+    and run alone.
+
+    With `invoke_batch`, calls that have to run in order anyway (a group,
+    see call_groups) go to the tools in a single invocation when every one
+    of them passes `can_batch`; independent groups still run in parallel.
+    """
+
+    def __init__(self, invoke: Callable[[Dict[str, Any]], Any], max_workers: int = 4,
+                 invoke_batch: Optional[Callable[[List[Dict[str, Any]]], List[Any]]] = None,
+                 can_batch: Optional[Callable[[Dict[str, Any]], bool]] = None):
+        self._invoke = invoke
+        self._invoke_batch = invoke_batch
+        self._can_batch = can_batch or (lambda call: True)
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="tool")
+        self._pool_lock = threading.Lock()
+        # Alvos em uso agora; uma barreira só roda com tudo livre
+        self._busy: Set[str] = set()
+        self._running = 0
+        self._exclusive = False
+        self._cond = threading.Condition()
+
+    def batch(self) -> ToolBatch:
+        return ToolBatch(self)
+
+    def run(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        """Runs a complete list of calls and returns their outputs in order."""
+        if self._invoke_batch is None or len(calls) < 2:
+            batch = self.batch()
+            for call in calls:
+                batch.submit(call)
+            return batch.results()
+
+        started = time.perf_counter()
+        groups = call_groups(calls)
+        futures = [self.submit_group([calls[i] for i in group]) for group in groups]
+        outputs: List[Any] = [None] * len(calls)
+        for group, future in zip(groups, futures):
+            try:
+                group_outputs = future.result()
+            except Exception as e:
+                logger.exception(f"Erro ao executar lote de ferramentas: {e}")
+                group_outputs = [f"Error: {e}"] * len(group)
+            for i, output in zip(group, group_outputs):
+                outputs[i] = output
+        logger.info(
+            f"{len(calls)} ferramentas em {len(groups)} lotes independentes "
+            f"({', '.join(str(len(g)) for g in groups)}) em "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        return outputs
+
+    def submit_group(self, calls: List[Dict[str, Any]],
+                     on_start: Optional[Callable[[], None]] = None) -> Future:
+        """
+        Runs calls in order on one worker, holding all their targets, in a
+        single invocation when they can be batched.
+
+        Args:
+            calls (list): {"name", "args"} of each call.
+            on_start (callable, optional): Called from the worker once it
+                holds the targets and the calls are about to run.
+
+        Returns:
+            Future: Resolves to the list of outputs, in order. Cancelling it
+            before it starts (still queued or waiting for its targets)
+            keeps the calls from running.
+        """
+        if len(calls) == 1:
+            result: Future = Future()
+            single = self.submit(calls[0], on_start)
+
+            def forward(_):
+                if single.cancelled():
+                    result.cancel()
+                    return
+                # Cancelado quando a chamada já rodava: ninguém espera o resultado
+                if result.cancelled():
+                    return
+                try:
+                    result.set_result([single.result()])
+                except Exception as e:
+                    result.set_exception(e)
+
+            def cancel(_):
+                if result.cancelled():
+                    single.cancel()
+
+            result.add_done_callback(cancel)
+            single.add_done_callback(forward)
+            return result
+        targets = [call_targets(call) for call in calls]
+        union = None if any(t is None for t in targets) else frozenset().union(*targets)
+        entry = {"calls": calls, "targets": union, "future": Future(), "seconds": 0.0,
+                 "on_start": on_start}
+        self._dispatch(entry)
+        return entry["future"]
+
+    def submit(self, call: Dict[str, Any], on_start: Optional[Callable[[], None]] = None) -> Future:
+        """
+        Runs one call as soon as a worker and its targets are free, with no
+        ordering against other calls (the caller handles dependencies).
+        """
+        entry = {"call": call, "targets": call_targets(call), "future": Future(), "seconds": 0.0,
+                 "on_start": on_start}
+        self._dispatch(entry)
+        return entry["future"]
+
+    def ensure_workers(self, count: int):
+        """
+        Grows the pool to at least `count` workers (e.g. the width of a
+        plan), so that many independent calls can run at once. Calls
+        already queued finish on the old pool; target ordering is shared.
+        """
+        with self._pool_lock:
+            if count <= self.max_workers:
+                return
+            logger.debug(f"Pool de ferramentas ampliado de {self.max_workers} para {count} workers")
+            old = self._pool
+            self.max_workers = count
+            self._pool = ThreadPoolExecutor(max_workers=count, thread_name_prefix="tool")
+        old.shutdown(wait=False)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+    def _dispatch(self, entry: Dict[str, Any]):
+        try:
+            with self._pool_lock:
+                pool = self._pool
+            pool.submit(self._execute, entry)
+        except RuntimeError as e:
+            # Pool já encerrado
+            entry["future"].set_exception(e)
+
+    def _execute(self, entry: Dict[str, Any]):
+        future: Future = entry["future"]
+        if future.cancelled():
+            return
+        targets = entry["targets"]
+        self._acquire(targets)
+        # Só passa a rodar com os alvos em mãos: até aqui ainda pode ser cancelado
+        if not future.set_running_or_notify_cancel():
+            self._release(targets)
+            return
+        if entry.get("on_start"):
+            entry["on_start"]()
+        started = time.perf_counter()
+        output, error = None, None
+        try:
+            if "calls" in entry:
+                output = self._run_group(entry["calls"])
+            else:
+                output = self._invoke(entry["call"])
+        except Exception as e:
+            error = e
+        entry["seconds"] = time.perf_counter() - started
+        self._release(targets)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(output)
+
+    def _run_group(self, calls: List[Dict[str, Any]]) -> List[Any]:
+        if self._invoke_batch is not None and all(self._can_batch(call) for call in calls):
+            return self._invoke_batch(calls)
+        outputs = []
+        for call in calls:
+            try:
+                outputs.append(self._invoke(call))
+            except Exception as e:
+                logger.exception(f"Erro ao executar ferramenta {call.get('name')}: {e}")
+                outputs.append(f"Error: {e}")
+        return outputs
+
+    def _acquire(self, targets: Optional[FrozenSet[str]]):
+        with self._cond:
+            if targets is None:
+                self._cond.wait_for(lambda: not self._exclusive and self._running == 0)
+                self._exclusive = True
+            else:
+                self._cond.wait_for(
+                    lambda: not self._exclusive and self._busy.isdisjoint(targets))
+                self._busy.update(targets)
+            self._running += 1
+
+    def _release(self, targets: Optional[FrozenSet[str]]):
+        with self._cond:
+            self._running -= 1
+            if targets is None:
+                self._exclusive = False
+            else:
+                self._busy.difference_update(targets)
+            self._cond.notify_all()
@@ -1,17 +1,111 @@
 from pathlib import Path
-from helpers import exec_ahk_command, get_settings, get_root_path
+from helpers import exec_ahk_batch, exec_ahk_command, get_settings, get_root_path
 from langchain_core.tools import tool
+from audio_stream import notify_device_change
 from rapidfuzz import fuzz
 import pyaudio
 import re
 import unicodedata
-from typing import Mapping, Any
+from typing import Any, List, Mapping, Optional
 
 settings = get_settings()
 root_path = get_root_path()
 MODULES_DIR = Path(root_path+"/binaries")
 
 
+# Comando AHK de cada ferramenta, usado tanto pela ferramenta quanto pelos lotes (run_ahk_batch)
+def _launch_app_command(app_name_or_exe: str) -> dict:
+    return {
+        "script": "launch_app.exe",
+        "params": ["--app", app_name_or_exe]
+    }
+
+
+def _move_window_command(app: str, position: str = "Maximized", monitor_index: int = 1, title: str = "") -> dict:
+    params = ["--app", app, "--position", position,
+              "--monitor_index", str(monitor_index)]
+    if title:
+        params += ["--title", title]
+    return {
+        "script": "move_window.exe",
+        "params": params
+    }
+
+
+def _monitor_control_command(action: str, monitor: int) -> dict:
+    return {
+        "script": "monitor_control.exe",
+        "params": ["--action", action, "--monitor", str(monitor)]
+    }
+
+
+def _update_app_volume_command(action: str, value: int = 5, app: str = "") -> dict:
+    params = ["--action", action, "--value", str(value)]
+    if app:
+        params += ["--app", app]
+    return {
+        "script": "update_app_volume.exe",
+        "params": params
+    }
+
+
+def _close_app_command(app: str) -> dict:
+    return {
+        "script": "close_app.exe",
+        "params": ["--app", app]
+    }
+
+
+def _split_screen_command(left: str, right: str, monitor: int = 1) -> dict:
+    params = ["--left", left, "--right", right, "--monitor", str(monitor)]
+    return {
+        "script": "split_screen.exe",
+        "params": params
+    }
+
+
+def _launch_chrome_command(profile: str = "", tabs: str = "") -> dict:
+    if tabs is None:
+        tabs = []
+    params = []
+    if profile:
+        params += ["--profile", profile]
+    if tabs:
+        params += ["--tabs", str(tabs)]
+    return {
+        "script": "launch_chrome.exe",
+        "params": params
+    }
+
+
+def _shutdown_command() -> dict:
+    return {
+        "script": "shutdown.exe",
+        "params": []
+    }
+
+
+def _min_app_command(app: str) -> dict:
+    return {
+        "script": "min.exe",
+        "params": ["--app", app]
+    }
+
+
+def _max_app_command(app: str) -> dict:
+    return {
+        "script": "max.exe",
+        "params": ["--app", app]
+    }
+
+
+def _install_requirements_command() -> dict:
+    return {
+        "script": "install_requirements.exe",
+        "params": []
+    }
+
+
 @tool
 def launch_app(app_name_or_exe: str) -> str:
     """
@@ -26,11 +120,7 @@ def launch_app(app_name_or_exe: str) -> str:
     - For Chrome, use 'chrome'.
     - Automatically normalizes application names.
     """
-    cmd = {
-        "script": "launch_app.exe",
-        "params": ["--app", app_name_or_exe]
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_launch_app_command(app_name_or_exe), MODULES_DIR)
 
 
 @tool
@@ -55,15 +145,7 @@ def move_window(app: str, position: str = "Maximized", monitor_index: int = 1, t
     - If 'monitor_index' is not provided, the primary monitor (1) will be used.
     - Automatically normalizes application and title names.
     """
-    params = ["--app", app, "--position", position,
-              "--monitor_index", str(monitor_index)]
-    if title:
-        params += ["--title", title]
-    cmd = {
-        "script": "move_window.exe",
-        "params": params
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_move_window_command(app, position, monitor_index, title), MODULES_DIR)
 
 
 @tool
@@ -79,11 +161,7 @@ def monitor_control(action: str, monitor: int) -> str:
     - Useful for multi-monitor setups.
     - The primary monitor is usually 1.
     """
-    cmd = {
-        "script": "monitor_control.exe",
-        "params": ["--action", action, "--monitor", str(monitor)]
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_monitor_control_command(action, monitor), MODULES_DIR)
 
 
 @tool
@@ -100,14 +178,7 @@ def update_app_volume(action: str, value: int = 5, app: str = "") -> str:
     - If 'app' is not provided, adjusts the global system volume.
     - Automatically normalizes application names.
     """
-    params = ["--action", action, "--value", str(value)]
-    if app:
-        params += ["--app", app]
-    cmd = {
-        "script": "update_app_volume.exe",
-        "params": params
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_update_app_volume_command(action, value, app), MODULES_DIR)
 
 
 @tool
@@ -121,11 +192,7 @@ def close_app(app: str) -> str:
     Notes:
     - Automatically normalizes application names.
     """
-    cmd = {
-        "script": "close_app.exe",
-        "params": ["--app", app]
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_close_app_command(app), MODULES_DIR)
 
 
 @tool
@@ -142,12 +209,7 @@ def split_screen(left: str, right: str, monitor: int = 1) -> str:
     - Useful for productivity and window organization.
     - Automatically normalizes application names.
     """
-    params = ["--left", left, "--right", right, "--monitor", str(monitor)]
-    cmd = {
-        "script": "split_screen.exe",
-        "params": params
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_split_screen_command(left, right, monitor), MODULES_DIR)
 
 
 @tool
@@ -165,18 +227,7 @@ def launch_chrome(profile: str = "", tabs: str = "") -> str:
     - If 'tabs' is provided, opens the URLs in new tabs.
     - Automatically normalizes profile names.
     """
-    if tabs is None:
-        tabs = []
-    params = []
-    if profile:
-        params += ["--profile", profile]
-    if tabs:
-        params += ["--tabs", str(tabs)]
-    cmd = {
-        "script": "launch_chrome.exe",
-        "params": params
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_launch_chrome_command(profile, tabs), MODULES_DIR)
 
 
 @tool
@@ -192,11 +243,7 @@ def shutdown() -> str:
     - Useful for safe shutdown automations.
     - If no parameter is provided, uses defaults.
     """
-    cmd = {
-        "script": "shutdown.exe",
-        "params": []
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_shutdown_command(), MODULES_DIR)
 
 
 @tool
@@ -210,11 +257,7 @@ def min_app(app: str) -> str:
     Notes:
     - Automatically normalizes application names.
     """
-    cmd = {
-        "script": "min.exe",
-        "params": ["--app", app]
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_min_app_command(app), MODULES_DIR)
 
 
 @tool
@@ -228,11 +271,7 @@ def max_app(app: str) -> str:
     Notes:
     - Automatically normalizes application names.
     """
-    cmd = {
-        "script": "max.exe",
-        "params": ["--app", app]
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_max_app_command(app), MODULES_DIR)
 
 
 @tool
@@ -248,11 +287,7 @@ def install_requirements() -> str:
     - Useful for preparing the environment for monitor automations.
     - Uses default values if no parameter is provided.
     """
-    cmd = {
-        "script": "install_requirements.exe",
-        "params": []
-    }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    return exec_ahk_command(_install_requirements_command(), MODULES_DIR)
 
 
 @tool
@@ -351,4 +386,54 @@ def set_audio_input_device(input_name: str) -> str:
         "script": "set_input_device.exe",
         "params": ["--input_name", best_name]
     }
-    return exec_ahk_command(cmd, MODULES_DIR)
+    result = exec_ahk_command(cmd, MODULES_DIR)
+    notify_device_change()
+    return result
+
+
+# Ferramentas que são só um comando AHK e podem ir num lote
+AHK_COMMANDS = {
+    "launch_app": _launch_app_command,
+    "move_window": _move_window_command,
+    "monitor_control": _monitor_control_command,
+    "update_app_volume": _update_app_volume_command,
+    "close_app": _close_app_command,
+    "split_screen": _split_screen_command,
+    "launch_chrome": _launch_chrome_command,
+    "shutdown": _shutdown_command,
+    "min_app": _min_app_command,
+    "max_app": _max_app_command,
+    "install_requirements": _install_requirements_command,
+}
+
+
+def ahk_command(call: Mapping[str, Any]) -> Optional[dict]:
+    """
+    Args:
+        call (Mapping): Tool call ({"name", "args"}).
+
+    Returns:
+        dict or None: The AHK command the tool would run, or None if the tool
+        does more than that or the arguments do not fit its signature
+    """
+    builder = AHK_COMMANDS.get(call.get("name", ""))
+    if builder is None:
+        return None
+    try:
+        return builder(**(call.get("args") or {}))
+    except TypeError:
+        return None
+
+
+def run_ahk_batch(calls: List[Mapping[str, Any]]) -> List[str]:
+    """
+    Runs tool calls that are plain AHK commands (see ahk_command) in order,
+    in a single invocation.
+
+    Returns:
+        List[str]: Each call's output, as the tool itself would return it
+    """
+    cmds = [ahk_command(call) for call in calls]
+    if any(cmd is None for cmd in cmds):
+        raise ValueError("lote com ferramenta que não é um comando AHK")
+    return [result["output"] for result in exec_ahk_batch(cmds, MODULES_DIR)]
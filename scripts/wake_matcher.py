@@ -0,0 +1,140 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils import normalize_text
+import difflib
+import re
+
+DEFAULT_THRESHOLD = 0.84
+_TOKEN_RE = re.compile(r"\S+")
+
+
+class _Phrase:
+    """Normalized wake phrase with its precomputed bit-parallel match masks."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.length = len(text)
+        self.token_count = len(text.split())
+        self.full_mask = (1 << self.length) - 1
+        self.masks: Dict[str, int] = {}
+        for i, ch in enumerate(text):
+            self.masks[ch] = self.masks.get(ch, 0) | (1 << i)
+
+    def lcs_length(self, candidate: str) -> int:
+        """
+        Length of the longest common subsequence between the phrase and the
+        candidate, using the bit-vector algorithm of Allison-Dix / Hyyrö
+        (one word-sized step per candidate character).
+        """
+        v = self.full_mask
+        masks = self.masks
+        for ch in candidate:
+            u = v & masks.get(ch, 0)
+            v = ((v + u) | (v - u)) & self.full_mask
+        return self.length - bin(v).count("1")
+
+
+class WakeMatcher:
+    """
+    Finds any of several wake phrases (and their aliases) in the wake buffer.
+
+    Whether the phrase was said follows the original check_wake rules: an
+    exact substring match first, then a difflib similarity >= threshold
+    against the buffer's last token window of the phrase's size (and one
+    token longer) and sliding character windows over the buffer suffix.
+    Only after a fuzzy match are token windows at every position searched,
+    to find where the phrase sits (and so where a command after it starts);
+    that never changes whether it matched. Since every difflib ratio is
+    bounded by the LCS ratio 2*LCS/(len(a)+len(b)), candidates are rejected
+    with the bit-parallel LCS first and difflib only runs on the few that
+    could still pass, so the results are identical while most of the
+    per-chunk cost goes away.
+    """
+
+    def __init__(self, phrases: Iterable[str], threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._phrases: List[_Phrase] = []
+        seen = set()
+        for phrase in phrases:
+            text = normalize_text(phrase or "")
+            if text and text not in seen:
+                seen.add(text)
+                self._phrases.append(_Phrase(text))
+
+    @property
+    def phrases(self) -> List[str]:
+        return [p.text for p in self._phrases]
+
+    def find(self, buffer: str) -> Optional[Tuple[str, int, int]]:
+        """
+        Searches the normalized buffer for a wake phrase.
+
+        Args:
+            buffer (str): Normalized text recognized recently.
+
+        Returns:
+            tuple or None: (matched phrase, start, end) span in buffer, or None
+        """
+        if not buffer:
+            return None
+
+        # 1) Checagem exata no buffer agregado
+        for phrase in self._phrases:
+            index = buffer.find(phrase.text)
+            if index >= 0:
+                return phrase.text, index, index + phrase.length
+
+        # 2) Checagem fuzzy de similaridade (tolerância a pequenos erros de ASR)
+        token_spans = [(m.start(), m.end())
+                       for m in _TOKEN_RE.finditer(buffer)]
+        for phrase in self._phrases:
+            for start, end in self._candidates(phrase, buffer, token_spans):
+                if self._similar(phrase, buffer[start:end]):
+                    return (phrase.text,) + self._locate(phrase, buffer, token_spans, start, end)
+
+        return None
+
+    def _candidates(self, phrase: _Phrase, buffer: str, token_spans: List[Tuple[int, int]]):
+        # Candidatos por tokens: últimos tokens (mesmo nº da frase e um a mais)
+        for count in (phrase.token_count, phrase.token_count + 1):
+            if len(token_spans) >= count:
+                yield token_spans[-count][0], token_spans[-1][1]
+
+        # Candidatos por caracteres: sufixo recente com folga
+        suffix_start = max(0, len(buffer) - (phrase.length + 8))
+        if len(buffer) - suffix_start >= phrase.length:
+            for i in range(suffix_start, len(buffer) - phrase.length + 1):
+                yield i, i + phrase.length
+        else:
+            yield suffix_start, len(buffer)
+
+    def _locate(self, phrase: _Phrase, buffer: str, token_spans: List[Tuple[int, int]],
+                start: int, end: int) -> Tuple[int, int]:
+        """
+        Span of the token window (any position, phrase size or one token
+        longer) most similar to the phrase, or the matched candidate's span
+        if no window passes the threshold. Earliest window wins a tie.
+        """
+        best, best_ratio = (start, end), 0.0
+        for i in range(len(token_spans)):
+            for count in (phrase.token_count, phrase.token_count + 1):
+                if i + count > len(token_spans):
+                    continue
+                span = token_spans[i][0], token_spans[i + count - 1][1]
+                ratio = self._ratio(phrase, buffer[span[0]:span[1]])
+                if ratio is not None and ratio > best_ratio:
+                    best, best_ratio = span, ratio
+        return best
+
+    def _similar(self, phrase: _Phrase, candidate: str) -> bool:
+        return self._ratio(phrase, candidate) is not None
+
+    def _ratio(self, phrase: _Phrase, candidate: str) -> Optional[float]:
+        """difflib ratio of the candidate, or None if it is below the threshold."""
+        # Mesma forma de cálculo do difflib (2.0 * M / T) para não divergir por arredondamento
+        total = phrase.length + len(candidate)
+        if 2.0 * min(phrase.length, len(candidate)) / total < self.threshold:
+            return None
+        if 2.0 * phrase.lcs_length(candidate) / total < self.threshold:
+            return None
+        ratio = difflib.SequenceMatcher(None, phrase.text, candidate).ratio()
+        return ratio if ratio >= self.threshold else None